@@ -0,0 +1,120 @@
+/*
+ * Vowel Duration Measurement Package - Automatic vowel duration measurement using structured prediction algorithms
+ * Copyright (C) 2015 Yossi Adi, E-Mail: yossiadidrum@gmail.com
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+import com.structed.data.entities.Example;
+
+import java.util.ArrayList;
+import java.util.Collections;
+import java.util.Comparator;
+
+/**
+ * Limits the labels the inference searches to the frames near the rises and the falls of the vowel evidence of the
+ * phoneme classifier, the IS_VOWEL indicator plus the smoothed SUM_VOWELS of the frame. Most frames of a file have no
+ * vowel evidence at all, so most onsets and offsets the exhaustive search scores are far from any vowel.
+ * The rise at a frame is the mean evidence of the WINDOW frames from it minus the mean of the WINDOW frames before
+ * it. The starts are searched within margin frames of the topK highest local maxima of the rise, the ends within
+ * margin frames of the topK lowest local minima. topK and margin trade the speed for the accuracy, see
+ * evaluate_pruning for how often the pruned label differs from the exhaustive one.
+ * When the evidence is flat (the no classifier features) all the labels are searched.
+ */
+public class CandidatePruning {
+    public static final int IS_VOWEL = 9;
+    public static final int SUM_VOWELS = 13;
+    public static final int DEFAULT_TOP_K = 3;
+    public static final int DEFAULT_MARGIN = 15;
+    static final int WINDOW = 5;
+    //the smallest range of the evidence over a file that is not flat
+    static final double MIN_RANGE = 1e-3;
+
+    public final int topK;
+    public final int margin;
+
+    public CandidatePruning() {
+        this(DEFAULT_TOP_K, DEFAULT_MARGIN);
+    }
+
+    public CandidatePruning(int topK, int margin) {
+        this.topK = topK;
+        this.margin = margin;
+    }
+
+    //the frames that may start and the frames that may end a label, candidates[0][start] and candidates[1][end] for
+    //the labels of InferenceVowelDuration
+    //return null when the evidence is flat, every frame is a candidate
+    public boolean[][] candidates(Example example) {
+        int numFrames = example.sizeOfVector;
+        if (numFrames <= 2)
+            return null;
+
+        //the sum of the evidence of the frames before every frame
+        double[] cumulative = new double[numFrames + 1];
+        double min = Double.MAX_VALUE;
+        double max = -Double.MAX_VALUE;
+        try {
+            for (int frame = 0; frame < numFrames; frame++) {
+                double evidence = VowelFramesExample.getValue(example, frame, IS_VOWEL) +
+                        VowelFramesExample.getValue(example, frame, SUM_VOWELS);
+                if (Double.isNaN(evidence))
+                    evidence = 0;
+                cumulative[frame + 1] = cumulative[frame] + evidence;
+                min = Math.min(min, evidence);
+                max = Math.max(max, evidence);
+            }
+        } catch (IndexOutOfBoundsException e) {
+            //a file without the columns of the classifier
+            return null;
+        }
+        if (max - min < MIN_RANGE)
+            return null;
+
+        double[] rise = new double[numFrames];
+        for (int frame = 0; frame < numFrames; frame++) {
+            double after = cumulative[Math.min(frame + WINDOW, numFrames)] - cumulative[frame];
+            double before = cumulative[frame] - cumulative[Math.max(frame - WINDOW, 0)];
+            rise[frame] = (after - before) / WINDOW;
+        }
+
+        //the local maxima of the rise are the onsets of the evidence, the local minima are the offsets
+        ArrayList<Integer> rises = new ArrayList<Integer>();
+        ArrayList<Integer> falls = new ArrayList<Integer>();
+        for (int frame = 1; frame < numFrames - 1; frame++) {
+            if (rise[frame] > 0 && rise[frame] > rise[frame - 1] && rise[frame] >= rise[frame + 1])
+                rises.add(frame);
+            if (rise[frame] < 0 && rise[frame] < rise[frame - 1] && rise[frame] <= rise[frame + 1])
+                falls.add(frame);
+        }
+        return new boolean[][]{mask(rises, rise, 1, numFrames), mask(falls, rise, -1, numFrames)};
+    }
+
+    //the frames within margin of the topK frames with the largest sign * rise
+    private boolean[] mask(ArrayList<Integer> frames, final double[] rise, final int sign, int numFrames) {
+        Collections.sort(frames, new Comparator<Integer>() {
+            public int compare(Integer a, Integer b) {
+                return Double.compare(sign * rise[b], sign * rise[a]);
+            }
+        });
+        //the labels end one frame after the last frame of the search
+        boolean[] mask = new boolean[numFrames + 2];
+        for (int k = 0; k < Math.min(topK, frames.size()); k++) {
+            int frame = frames.get(k);
+            for (int i = Math.max(frame - margin, 0); i <= Math.min(frame + margin, numFrames + 1); i++)
+                mask[i] = true;
+        }
+        return mask;
+    }
+}
@@ -0,0 +1,104 @@
+/*
+ * Vowel Duration Measurement Package - Automatic vowel duration measurement using structured prediction algorithms
+ * Copyright (C) 2015 Yossi Adi, E-Mail: yossiadidrum@gmail.com
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+/**
+ * Searches the labels of an example coarse to fine: first the labels whose start and vowel length are on a grid of
+ * stride frames (20 ms for a stride of 4 frames of 5 ms), then every label within stride frames of the start and of
+ * the end of the numHypotheses best labels of the grid, at the full resolution of the frames.
+ * The scores of the grid are the exact scores of DecomposedScores, the cumulative values make the mean features of
+ * any label cost the same, so the coarse pass samples the scores of the labels instead of pooling the frames.
+ * With the defaults the search scores about a tenth of the labels of the exhaustive search, see evaluate_pruning for
+ * how often its label differs from the exhaustive one.
+ */
+public class CoarseToFine {
+    public static final int DEFAULT_STRIDE = 4;
+    public static final int DEFAULT_HYPOTHESES = 5;
+
+    public final int stride;
+    public final int numHypotheses;
+
+    public CoarseToFine() {
+        this(DEFAULT_STRIDE, DEFAULT_HYPOTHESES);
+    }
+
+    public CoarseToFine(int stride, int numHypotheses) {
+        this.stride = stride;
+        this.numHypotheses = numHypotheses;
+    }
+
+    //the best label of the coarse to fine search, {start, end} in the frames of the labels of InferenceVowelDuration
+    //candidates: the starts and the ends of CandidatePruning, null searches all of them
+    //return null when no label of the grid is a candidate
+    public int[] search(DecomposedScores scores, int numFrames, SearchBounds bounds, boolean[][] candidates) {
+        //the best labels of the grid, sorted by their score, the first of equal scores in the order of the search
+        int[] hypothesisStarts = new int[numHypotheses];
+        int[] hypothesisEnds = new int[numHypotheses];
+        double[] hypothesisScores = new double[numHypotheses];
+        int numFound = 0;
+        for (int i = bounds.minGapStart; i < numFrames - bounds.minGapEnd; i += stride) {
+            if (candidates != null && !candidates[0][i + 1])
+                continue;
+            for (int j = i + bounds.minVowel; j < i + bounds.maxVowel; j += stride) {
+                if (j > numFrames - bounds.minGapEnd)
+                    break;
+                if (candidates != null && !candidates[1][j + 1])
+                    continue;
+                double score = scores.score(i + 1, j + 1);
+                int loc = Math.min(numFound, numHypotheses);
+                while (loc > 0 && score > hypothesisScores[loc - 1])
+                    loc--;
+                if (loc == numHypotheses)
+                    continue;
+                for (int k = Math.min(numFound, numHypotheses - 1); k > loc; k--) {
+                    hypothesisStarts[k] = hypothesisStarts[k - 1];
+                    hypothesisEnds[k] = hypothesisEnds[k - 1];
+                    hypothesisScores[k] = hypothesisScores[k - 1];
+                }
+                hypothesisStarts[loc] = i;
+                hypothesisEnds[loc] = j;
+                hypothesisScores[loc] = score;
+                numFound++;
+            }
+        }
+        if (numFound == 0)
+            return null;
+
+        //refine every hypothesis at the resolution of the frames, the labels near several of them are scored once
+        //per hypothesis, the ties are broken by the start and then the end as in the exhaustive search
+        int maxStart = -1;
+        int maxEnd = -1;
+        double maxVal = 0;
+        for (int h = 0; h < Math.min(numFound, numHypotheses); h++) {
+            for (int i = hypothesisStarts[h] - stride; i <= hypothesisStarts[h] + stride; i++) {
+                for (int j = hypothesisEnds[h] - stride; j <= hypothesisEnds[h] + stride; j++) {
+                    if (!bounds.contains(i, j, numFrames))
+                        continue;
+                    if (candidates != null && (!candidates[0][i + 1] || !candidates[1][j + 1]))
+                        continue;
+                    double score = scores.score(i + 1, j + 1);
+                    if (maxStart < 0 || score > maxVal || (score == maxVal && (i < maxStart || (i == maxStart && j < maxEnd)))) {
+                        maxStart = i;
+                        maxEnd = j;
+                        maxVal = score;
+                    }
+                }
+            }
+        }
+        return maxStart < 0 ? null : new int[]{maxStart + 1, maxEnd + 1};
+    }
+}
@@ -0,0 +1,117 @@
+/*
+ * Vowel Duration Measurement Package - Automatic vowel duration measurement using structured prediction algorithms
+ * Copyright (C) 2015 Yossi Adi, E-Mail: yossiadidrum@gmail.com
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+import com.structed.data.entities.Example;
+import com.structed.utils.MathHelpers;
+
+/**
+ * The score W*phi(x, start, end) of the labels of an example, split into the features that depend only on the start,
+ * the features that depend only on the end and the features of the pair: the mean of a feature from start to end
+ * compared to its mean before the start or after the end, and the distributions over the vowel length.
+ * The start and end scores are computed once per frame, so scoring a label costs a few additions and a sigmoid per
+ * mean feature instead of building its phi vector.
+ */
+public class DecomposedScores {
+    //the part of the label a feature of phi depends on
+    public static final int START = 0;
+    public static final int END = 1;
+    public static final int MEAN = 2;
+    public static final int GAMMA = 3;
+    public static final int GAUSSIAN = 4;
+
+    //W times the start and the end features of every frame
+    public final double[] startScores;
+    public final double[] endScores;
+    //W times the length features of every vowel length, end - start
+    public final double[] lengthScores;
+
+    //the mean features: their weights, the cumulative values of the features and the mean before the start
+    //(isPrev) or after the end of every frame
+    private final double[] meanWeights;
+    private final boolean[] meanIsPrev;
+    private final double[][] cumulativeValues;
+    private final double[][] outsideMeans;
+    private int numMeans = 0;
+
+    public DecomposedScores(int numFrames, int maxLength, int maxMeans) {
+        startScores = new double[numFrames];
+        endScores = new double[numFrames];
+        lengthScores = new double[maxLength + 1];
+        meanWeights = new double[maxMeans];
+        meanIsPrev = new boolean[maxMeans];
+        cumulativeValues = new double[maxMeans][];
+        outsideMeans = new double[maxMeans][];
+    }
+
+    //the weight of a feature, the weights may be shorter than phi
+    public static double getWeight(double[] weights, int index) {
+        return index < weights.length ? weights[index] : 0;
+    }
+
+    //phi: the features of the label frame-frame, its start and end features are the features of this frame
+    //parts: the part of the label every feature of phi depends on
+    public void addFrame(int frame, double[] phi, double[] weights, int[] parts) {
+        int size = Math.min(parts.length, weights.length);
+        for (int loc = 0; loc < size; loc++) {
+            if (parts[loc] == START)
+                startScores[frame] += weights[loc] * phi[loc];
+            else if (parts[loc] == END)
+                endScores[frame] += weights[loc] * phi[loc];
+        }
+    }
+
+    //the cumulative values of featureNumber at every frame and its mean over win_size frames before (isPrev) or after
+    //every frame, the same values as calculateMean of the feature functions
+    public static double[][] computeMean(Example example, int numFrames, int featureNumber, int win_size, boolean isPrev) {
+        double[] cumulative = new double[numFrames];
+        double[] outside = new double[numFrames];
+        for (int frame = 0; frame < numFrames; frame++)
+            cumulative[frame] = VowelFramesExample.getCumulativeValue(example, frame, featureNumber);
+        for (int frame = 0; frame < numFrames; frame++) {
+            if (isPrev)
+                outside[frame] = (cumulative[frame] - VowelFramesExample.getCumulativeValue(example, frame - win_size, featureNumber)) / win_size;
+            else
+                outside[frame] = (cumulative[frame] - VowelFramesExample.getCumulativeValue(example, frame + win_size, featureNumber)) / win_size;
+        }
+        return new double[][]{cumulative, outside};
+    }
+
+    //the mean of a feature from start to end compared to its mean before the start (isPrev) or after the end
+    //cumulative, outside: the values of computeMean, they may be shared by the scores of several models
+    public void addMean(double[] cumulative, double[] outside, boolean isPrev, double weight) {
+        if (weight == 0)
+            return;
+        meanWeights[numMeans] = weight;
+        meanIsPrev[numMeans] = isPrev;
+        cumulativeValues[numMeans] = cumulative;
+        outsideMeans[numMeans] = outside;
+        numMeans++;
+    }
+
+    //W*phi(x, start, end), start and end are frames of the example
+    public double score(int start, int end) {
+        double score = startScores[start] + endScores[end] + lengthScores[end - start];
+        for (int i = 0; i < numMeans; i++) {
+            double avg = (cumulativeValues[i][end] - cumulativeValues[i][start]) / (end - start);
+            double value = MathHelpers.sigmoid(avg - outsideMeans[i][meanIsPrev[i] ? start : end]);
+            if (!Double.isNaN(value))
+                score += meanWeights[i] * value;
+        }
+        return score;
+    }
+}
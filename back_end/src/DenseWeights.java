@@ -0,0 +1,148 @@
+/*
+ * Vowel Duration Measurement Package - Automatic vowel duration measurement using structured prediction algorithms
+ * Copyright (C) 2015 Yossi Adi, E-Mail: yossiadidrum@gmail.com
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+import com.structed.data.entities.Vector;
+
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.ObjectInputStream;
+import java.io.ObjectOutputStream;
+import java.io.RandomAccessFile;
+import java.nio.ByteBuffer;
+import java.nio.ByteOrder;
+import java.nio.channels.FileChannel;
+
+/**
+ * The weights of a model as a dense double array indexed by the features of phi, so the scores are array loops
+ * instead of HashMap lookups. StructEDModel saves its weights as a serialized Vector, the dense weights files are,
+ * little endian like the binary features files:
+ *   0  magic "VDWT"
+ *   4  int version
+ *   8  int number of weights
+ *   12 the weights as doubles
+ * load reads both, convert_weights converts the files from one to the other.
+ */
+public class DenseWeights {
+    public static final String MAGIC = "VDWT";
+    public static final int VERSION = 1;
+    public static final int HEADER_SIZE = 12;
+
+    //the weights of W, indices that are not in W have no weight
+    public static double[] fromVector(Vector W, int size) {
+        double[] weights = new double[size];
+        for (Integer index : W.keySet()) {
+            if (index >= 0 && index < size)
+                weights[index] = W.get(index);
+        }
+        return weights;
+    }
+
+    //the weights of W up to its largest index
+    public static double[] fromVector(Vector W) {
+        int size = 0;
+        for (Integer index : W.keySet())
+            size = Math.max(size, index + 1);
+        return fromVector(W, size);
+    }
+
+    public static Vector toVector(double[] weights) {
+        Vector W = new Vector();
+        for (int i = 0; i < weights.length; i++)
+            W.put(i, weights[i]);
+        return W;
+    }
+
+    //the dot product of the weights and the features of phi, the weights may be shorter than phi
+    public static double dot(double[] weights, double[] phi) {
+        int size = Math.min(weights.length, phi.length);
+        double result = 0;
+        for (int i = 0; i < size; i++)
+            result += weights[i] * phi[i];
+        return result;
+    }
+
+    public static boolean isDense(String path) throws IOException {
+        FileInputStream in = new FileInputStream(path);
+        try {
+            byte[] magic = new byte[MAGIC.length()];
+            return in.read(magic) == magic.length && new String(magic, "US-ASCII").equals(MAGIC);
+        } finally {
+            in.close();
+        }
+    }
+
+    //reads a dense weights file or a model saved by StructEDModel.saveModel
+    public static double[] load(String path) throws IOException, ClassNotFoundException {
+        if (!isDense(path)) {
+            ObjectInputStream in = new ObjectInputStream(new FileInputStream(path));
+            try {
+                return fromVector((Vector) in.readObject());
+            } finally {
+                in.close();
+            }
+        }
+
+        RandomAccessFile file = new RandomAccessFile(path, "r");
+        try {
+            FileChannel channel = file.getChannel();
+            ByteBuffer buffer = channel.map(FileChannel.MapMode.READ_ONLY, 0, channel.size());
+            buffer.order(ByteOrder.LITTLE_ENDIAN);
+            buffer.position(MAGIC.length());
+            int version = buffer.getInt();
+            if (version > VERSION)
+                throw new IOException("unsupported weights file version " + version + ": " + path);
+            double[] weights = new double[buffer.getInt()];
+            buffer.asDoubleBuffer().get(weights);
+            return weights;
+        } finally {
+            file.close();
+        }
+    }
+
+    //the weights of a model file as the Vector StructEDModel works with
+    public static Vector loadVector(String path) throws IOException, ClassNotFoundException {
+        return toVector(load(path));
+    }
+
+    //writes the weights the same way StructEDModel.saveModel does
+    public static void saveVector(Vector W, String path) throws IOException {
+        ObjectOutputStream out = new ObjectOutputStream(new FileOutputStream(path));
+        try {
+            out.writeObject(W);
+        } finally {
+            out.close();
+        }
+    }
+
+    public static void save(double[] weights, String path) throws IOException {
+        ByteBuffer buffer = ByteBuffer.allocate(HEADER_SIZE + 8 * weights.length);
+        buffer.order(ByteOrder.LITTLE_ENDIAN);
+        buffer.put(MAGIC.getBytes("US-ASCII"));
+        buffer.putInt(VERSION);
+        buffer.putInt(weights.length);
+        buffer.asDoubleBuffer().put(weights);
+
+        FileOutputStream out = new FileOutputStream(path);
+        try {
+            out.write(buffer.array());
+        } finally {
+            out.close();
+        }
+    }
+}
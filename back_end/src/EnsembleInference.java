@@ -0,0 +1,131 @@
+/*
+ * Vowel Duration Measurement Package - Automatic vowel duration measurement using structured prediction algorithms
+ * Copyright (C) 2015 Yossi Adi, E-Mail: yossiadidrum@gmail.com
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+import com.structed.data.entities.Example;
+import com.structed.data.entities.PredictedLabels;
+
+import java.util.ArrayList;
+import java.util.Arrays;
+
+/**
+ * Scores the labels of an example with several models in one pass. The models that share the same feature functions
+ * are decomposed together (IDecomposableFeatureFunctions), so the features of every frame are computed once per
+ * example and not once per model. The prediction of every model is its argmax, the combined prediction is the argmax
+ * of the mean score of the models. Every model searches the labels of its own bounds (SearchBounds), the combined
+ * prediction searches the labels all the models search.
+ */
+public class EnsembleInference {
+    //the feature functions of the models, their weights and the index of every model in the order they were added
+    private final ArrayList<IDecomposableFeatureFunctions> featureFunctions = new ArrayList<IDecomposableFeatureFunctions>();
+    private final ArrayList<ArrayList<double[]>> weights = new ArrayList<ArrayList<double[]>>();
+    private final ArrayList<ArrayList<Integer>> modelIndices = new ArrayList<ArrayList<Integer>>();
+    //the bounds of every model and the bounds that contain all of them
+    private final ArrayList<SearchBounds> bounds = new ArrayList<SearchBounds>();
+    private SearchBounds searchBounds = null;
+    private int numModels = 0;
+
+    //the models with the same class of feature functions and the same bounds are decomposed together
+    public void addModel(IDecomposableFeatureFunctions phi, double[] modelWeights) {
+        int group = 0;
+        while (group < featureFunctions.size() && (featureFunctions.get(group).getClass() != phi.getClass() ||
+                !featureFunctions.get(group).getBounds().equals(phi.getBounds())))
+            group++;
+        if (group == featureFunctions.size()) {
+            featureFunctions.add(phi);
+            weights.add(new ArrayList<double[]>());
+            modelIndices.add(new ArrayList<Integer>());
+        }
+        weights.get(group).add(modelWeights);
+        modelIndices.get(group).add(numModels++);
+        bounds.add(phi.getBounds());
+        searchBounds = searchBounds == null ? phi.getBounds() : searchBounds.union(phi.getBounds());
+    }
+
+    public int getNumModels() {
+        return numModels;
+    }
+
+    //the prediction of every model in the order they were added and the combined prediction last
+    //return null on error
+    public PredictedLabels[] predict(Example example) {
+        try {
+            if (numModels == 0 || example.sizeOfVector <= 0)
+                return null;
+
+            //the scores of every model
+            DecomposedScores[] scores = new DecomposedScores[numModels];
+            for (int group = 0; group < featureFunctions.size(); group++) {
+                double[][] groupWeights = weights.get(group).toArray(new double[0][]);
+                DecomposedScores[] groupScores = featureFunctions.get(group).decompose(example, groupWeights);
+                if (groupScores == null)
+                    return null;
+                for (int m = 0; m < groupScores.length; m++)
+                    scores[modelIndices.get(group).get(m)] = groupScores[m];
+            }
+
+            //the same search as InferenceVowelDuration for every model and for the mean score, over the labels of
+            //all the bounds
+            double[] maxVal = new double[numModels + 1];
+            int[] maxStart = new int[numModels + 1];
+            int[] maxEnd = new int[numModels + 1];
+            boolean[] isFirst = new boolean[numModels + 1];
+            Arrays.fill(isFirst, true);
+            for (int i = searchBounds.minGapStart; i < example.sizeOfVector - (searchBounds.minGapEnd); i++) {
+                for (int j = i + searchBounds.minVowel; j < i + searchBounds.maxVowel; j++) {
+                    if (j > example.sizeOfVector - (searchBounds.minGapEnd))
+                        break;
+
+                    double mean = 0;
+                    boolean inAll = true;
+                    for (int m = 0; m <= numModels; m++) {
+                        double tmp;
+                        if (m < numModels) {
+                            if (!bounds.get(m).contains(i, j, example.sizeOfVector)) {
+                                inAll = false;
+                                continue;
+                            }
+                            tmp = scores[m].score(i + 1, j + 1);
+                            mean += tmp / numModels;
+                        } else if (inAll)
+                            tmp = mean;
+                        else
+                            continue;
+
+                        if (isFirst[m] || tmp > maxVal[m]) {
+                            maxStart[m] = i + 1;
+                            maxEnd[m] = j + 1;
+                            maxVal[m] = tmp;
+                            isFirst[m] = false;
+                        }
+                    }
+                }
+            }
+
+            PredictedLabels[] result = new PredictedLabels[numModels + 1];
+            for (int m = 0; m <= numModels; m++) {
+                result[m] = new PredictedLabels();
+                result[m].put(isFirst[m] ? "" : new VowelLabel(maxStart[m], maxEnd[m]).toString(), maxVal[m]);
+            }
+            return result;
+
+        } catch (Exception e) {
+            e.printStackTrace();
+            return null;
+        }
+    }
+}
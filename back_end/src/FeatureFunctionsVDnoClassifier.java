@@ -1,21 +1,15 @@
 
-import com.structed.constants.Consts;
-import com.structed.data.CacheVowelData;
 import com.structed.data.Factory;
 import com.structed.data.Logger;
 import com.structed.data.entities.Example;
-import com.structed.data.entities.Vector;
-import com.structed.data.featurefunctions.IFeatureFunctions;
 import com.structed.models.kernels.IKernel;
-import com.structed.utils.ConverterHelplers;
 import com.structed.utils.MathHelpers;
-import jsc.distributions.Gamma;
 
 /**
  * Created by yossiadi on 05/01/2016.
  *
  */
-public class FeatureFunctionsVDnoClassifier implements IFeatureFunctions {
+public class FeatureFunctionsVDnoClassifier implements IDecomposableFeatureFunctions {
 
     int sizeOfVector = 42;
     final int offset_10 = 2;
@@ -47,262 +41,385 @@ public class FeatureFunctionsVDnoClassifier implements IFeatureFunctions {
     final int F_1 = 20;
     final int F_2 = 21;
 
-    //return null on error
-    @Override
-    public Example convert(Example example, String label, IKernel kernel) {
-        try {
-            Example newExample = Factory.getExample(0);
-
-            String labelValues[] = label.split(Consts.CLASSIFICATION_SPLITTER);
-            Vector phiFeatures = new Vector();
-
-            //convert full vector
-            if (ConverterHelplers.tryParseInt(labelValues[0])) {
-
-                int start = Integer.parseInt(labelValues[0]);
-                int end = Integer.parseInt(labelValues[1]);
-
-                //=================calculate the features=================//
-                //=========Difference 5 and 10 frames from location=======//
-                int loc = 0;
-                //====Short Term Energy====//
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, start, SHORT_TERM_ENERGY));//short term energy, start location - 20 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_20, start, SHORT_TERM_ENERGY));//short term energy, start location - 30 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_25, start, SHORT_TERM_ENERGY));//short term energy, start location - 30 window
-                loc++;
-
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, end, SHORT_TERM_ENERGY));//short term energy, end location - 30 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_20, end, SHORT_TERM_ENERGY));//short term energy, end location - 30 window
-                loc++;
-
-                //====Total Energy====//
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_40, start, TOTAL_ENERGY)));//total energy, start location - 20 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_50, start, TOTAL_ENERGY)));//total energy, start location - 30 window
-                loc++;
-                // offsets
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_40, start - offset_10, TOTAL_ENERGY)));//total energy, start location - 20 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_50, start - offset_20, TOTAL_ENERGY)));//total energy, start location - 30 window
-                loc++;
-
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_40, end, TOTAL_ENERGY)));//total energy, start location - 30 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_50, end, TOTAL_ENERGY)));//total energy, start location - 30 window
-                loc++;
-
-
-                //====Low Energy====//
-                phiFeatures.put(loc, calculateDiff(example, win_size_30, start, LOW_ENERGY));//low energy, start location - 30 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_40, start, LOW_ENERGY));//low energy, start location - 30 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, start, LOW_ENERGY));//low energy, start location - 40 window
-                loc++;
-                // offsets
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_40, start - offset_10, LOW_ENERGY)));//total energy, start location - 20 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_50, start - offset_20, LOW_ENERGY)));//total energy, start location - 30 window
-                loc++;
-
-                phiFeatures.put(loc, calculateDiff(example, win_size_40, end, LOW_ENERGY));//low energy, end location - 20 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, end, LOW_ENERGY));//low energy, end location - 30 window
-                loc++;
-
-                //====High Energy====//
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_40, start, HIGH_ENERGY)));//high energy, end location - 30 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_50, start, HIGH_ENERGY)));//high energy, end location - 30 window
-                loc++;
-                // offsets
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_40, start - offset_10, HIGH_ENERGY)));//total energy, start location - 20 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_50, start - offset_20, HIGH_ENERGY)));//total energy, start location - 30 window
-                loc++;
-
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_40, end, HIGH_ENERGY)));//high energy, end location - 30 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_50, end, HIGH_ENERGY)));//high energy, end location - 30 window
-                loc++;
-
-                //====Wiener Entropy====//
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_40, start, WIENER_ENTROPY)));//wiener entropy, start location - 30 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_50, start, WIENER_ENTROPY)));//wiener entropy, start location - 30 window
-                loc++;
-
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_40, end, WIENER_ENTROPY)));//wiener entropy, start location - 30 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_50, end, WIENER_ENTROPY)));//wiener entropy, start location - 30 window
-                loc++;
-
-                //===========Auto Correlation==========//
-                phiFeatures.put(loc, calculateDiff(example, win_size_5, start, AUTO_CORRELATION));//auto correlation, start location - 5 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_10, start, AUTO_CORRELATION));//auto correlation, start location - 10 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, start, AUTO_CORRELATION));//auto correlation, start location - 15 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_20, start, AUTO_CORRELATION));//auto correlation, start location - 15 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_25, start, AUTO_CORRELATION));//auto correlation, start location - 15 window
-                loc++;
-
-                //==========Difference 5 and 15 frames from start=========//
-                //====Pitch====//
-                phiFeatures.put(loc, calculateDiff(example, win_size_40, start, PITCH));//pitch, start location - 20 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, start, PITCH));//pitch, start location - 30 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_40, end, PITCH));//pitch, start location - 20 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, end, PITCH));//pitch, start location - 30 window
-                loc++;
-
-                //====Voicing====//
-                phiFeatures.put(loc, calculateDiff(example, win_size_40, start, VOICING));//voicing, start location - 15 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, start, VOICING));//voicing, start location - 20 window
-                loc++;
-
-                phiFeatures.put(loc, calculateDiff(example, win_size_40, end, VOICING));//voicing, end location - 30 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, end, VOICING));//voicing, end location - 30 window
-                loc++;
+    //the part of the label every feature of convert depends on, in the order of convert
+    private static final int START = DecomposedScores.START;
+    private static final int END = DecomposedScores.END;
+    private static final int MEAN = DecomposedScores.MEAN;
+    private static final int GAMMA = DecomposedScores.GAMMA;
+    private static final int GAUSSIAN = DecomposedScores.GAUSSIAN;
+    private static final int[] FEATURE_PARTS = {
+            START, START, START, END, END, //short term energy
+            START, START, START, START, END, END, //total energy
+            START, START, START, START, START, END, END, //low energy
+            START, START, START, START, END, END, //high energy
+            START, START, END, END, //wiener entropy
+            START, START, START, START, START, //auto correlation
+            START, START, END, END, //pitch
+            START, START, END, END, //voicing
+            START, START, END, END, //zero-crossing
+            START, START, END, END, //mfcc_1
+            START, START, END, END, //mfcc_2
+            START, START, END, END, //mfcc_3
+            START, START, END, END, //mfcc_4
+            MEAN, MEAN, MEAN, MEAN, MEAN, MEAN, MEAN, MEAN, MEAN, MEAN, MEAN, MEAN, //mean value from start to end
+            START, START, START, START, //max function
+            START, START, START, START, //mfcc at the start
+            END, END, END, END, //mfcc at the end
+            GAMMA, //gamma distribution over the vowel length
+            GAUSSIAN //gaussian distribution over the vowel length
+    };
+    //the features of the mean values from start to end, each one is compared to the mean before the start and then to
+    //the mean after the end
+    final int[] MEAN_FEATURES = {SHORT_TERM_ENERGY, TOTAL_ENERGY, HIGH_ENERGY, LOW_ENERGY, VOICING, ZERO_CROSSING};
+
+    //the priors over the vowel length and the longest vowel of the decomposed scores
+    private final SearchBounds bounds;
+
+    public FeatureFunctionsVDnoClassifier() {
+        this(SearchBounds.DEFAULT);
+    }
 
-                //====Zero-Crossing====//
-                phiFeatures.put(loc, calculateDiff(example, win_size_40, start, ZERO_CROSSING));//zero-crossing, start location - 20 window
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, start, ZERO_CROSSING));//zero-crossing, start location - 30 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_40, end, ZERO_CROSSING)));//zero-crossing, end location - 20 window
-                loc++;
-                phiFeatures.put(loc, Math.abs(calculateDiff(example, win_size_50, end, ZERO_CROSSING)));//zero-crossing, end location - 30 window
-                loc++;
+    public FeatureFunctionsVDnoClassifier(SearchBounds bounds) {
+        this.bounds = bounds;
+    }
 
-                //==== DELTA ====//
-                // MFCC_1
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, start, MFCC_1));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, start, MFCC_1));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, end, MFCC_1));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, end, MFCC_1));
-                loc++;
+    @Override
+    public SearchBounds getBounds() {
+        return bounds;
+    }
 
-                // MFCC_2
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, start, MFCC_2));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, start, MFCC_2));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, end, MFCC_2));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, end, MFCC_2));
-                loc++;
+    //return null on error
+    @Override
+    public Example convert(Example example, String label, IKernel kernel) {
+        VowelLabel vowelLabel = VowelLabel.parse(label);
+        if (vowelLabel == null)
+            return null;
+        return convert(example, vowelLabel.start, vowelLabel.end);
+    }
 
-                // MFCC_3
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, start, MFCC_3));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, start, MFCC_3));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, end, MFCC_3));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, end, MFCC_3));
-                loc++;
+    //the features of the label start-end
+    //return null on error
+    public Example convert(Example example, int start, int end) {
+        double[] phi = computeFeatures(example, start, end);
+        if (phi == null)
+            return null;
+        Example newExample = Factory.getExample(0);
+        newExample.setFeatures(DenseWeights.toVector(phi));
+        return newExample;
+    }
 
-                // MFCC_4
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, start, MFCC_4));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, start, MFCC_4));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_15, end, MFCC_4));
-                loc++;
-                phiFeatures.put(loc, calculateDiff(example, win_size_50, end, MFCC_4));
-                loc++;
+    //the features of the label start-end as a dense array, in the order of FEATURE_PARTS
+    //return null on error
+    public double[] computeFeatures(Example example, int start, int end) {
+        return computeFeatures(example, start, end, false);
+    }
 
-                //==============Mean value from start to end==============//
-                //true means prev the start point, false means after the end point
-                phiFeatures.put(loc, calculateMean(example, start, end, SHORT_TERM_ENERGY, win_size_50, true));//Mean of short-term energy
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, SHORT_TERM_ENERGY, win_size_50, false));//Mean of short-term energy
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, TOTAL_ENERGY, win_size_50, true));//Mean of low energy
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, TOTAL_ENERGY, win_size_50, false));//Mean of low energy
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, HIGH_ENERGY, win_size_50, true));//Mean of low energy
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, HIGH_ENERGY, win_size_50, false));//Mean of low energy
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, LOW_ENERGY, win_size_50, true));//Mean of low energy
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, LOW_ENERGY, win_size_50, false));//Mean of low energy
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, VOICING, win_size_50, true));//Mean of voicing
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, VOICING, win_size_50, false));//Mean of voicing
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, ZERO_CROSSING, win_size_50, true));//Mean of zero-crossing
-                loc++;
-                phiFeatures.put(loc, calculateMean(example, start, end, ZERO_CROSSING, win_size_50, false));//Mean of zero-crossing
-                loc++;
+    //the START and the END features of a frame, the features of the label frame-frame without the mean and the prior
+    //features, which depend on both ends of a label and are left zero
+    //return null on error
+    public double[] computeBoundaryFeatures(Example example, int frame) {
+        return computeFeatures(example, frame, frame, true);
+    }
 
-                // ==== MAX FUNCTION ==== //
-                phiFeatures.put(loc, example.getFeatures2D().get(start).get(TOTAL_ENERGY));
-                loc++;
-                phiFeatures.put(loc, example.getFeatures2D().get(start).get(LOW_ENERGY));
-                loc++;
-                phiFeatures.put(loc, example.getFeatures2D().get(start).get(HIGH_ENERGY));
-                loc++;
-                phiFeatures.put(loc, example.getFeatures2D().get(start).get(AUTO_CORRELATION));
+    //boundaryOnly: skip the MEAN, GAMMA and GAUSSIAN features
+    //return null on error
+    private double[] computeFeatures(Example example, int start, int end, boolean boundaryOnly) {
+        try {
+            double[] phiFeatures = new double[FEATURE_PARTS.length];
+
+            //=================calculate the features=================//
+            //=========Difference 5 and 10 frames from location=======//
+            int loc = 0;
+            //====Short Term Energy====//
+            phiFeatures[loc] = calculateDiff(example, win_size_15, start, SHORT_TERM_ENERGY);//short term energy, start location - 20 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_20, start, SHORT_TERM_ENERGY);//short term energy, start location - 30 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_25, start, SHORT_TERM_ENERGY);//short term energy, start location - 30 window
+            loc++;
+
+            phiFeatures[loc] = calculateDiff(example, win_size_15, end, SHORT_TERM_ENERGY);//short term energy, end location - 30 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_20, end, SHORT_TERM_ENERGY);//short term energy, end location - 30 window
+            loc++;
+
+            //====Total Energy====//
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_40, start, TOTAL_ENERGY));//total energy, start location - 20 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_50, start, TOTAL_ENERGY));//total energy, start location - 30 window
+            loc++;
+            // offsets
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_40, start - offset_10, TOTAL_ENERGY));//total energy, start location - 20 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_50, start - offset_20, TOTAL_ENERGY));//total energy, start location - 30 window
+            loc++;
+
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_40, end, TOTAL_ENERGY));//total energy, start location - 30 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_50, end, TOTAL_ENERGY));//total energy, start location - 30 window
+            loc++;
+
+
+            //====Low Energy====//
+            phiFeatures[loc] = calculateDiff(example, win_size_30, start, LOW_ENERGY);//low energy, start location - 30 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_40, start, LOW_ENERGY);//low energy, start location - 30 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, start, LOW_ENERGY);//low energy, start location - 40 window
+            loc++;
+            // offsets
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_40, start - offset_10, LOW_ENERGY));//total energy, start location - 20 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_50, start - offset_20, LOW_ENERGY));//total energy, start location - 30 window
+            loc++;
+
+            phiFeatures[loc] = calculateDiff(example, win_size_40, end, LOW_ENERGY);//low energy, end location - 20 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, end, LOW_ENERGY);//low energy, end location - 30 window
+            loc++;
+
+            //====High Energy====//
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_40, start, HIGH_ENERGY));//high energy, end location - 30 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_50, start, HIGH_ENERGY));//high energy, end location - 30 window
+            loc++;
+            // offsets
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_40, start - offset_10, HIGH_ENERGY));//total energy, start location - 20 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_50, start - offset_20, HIGH_ENERGY));//total energy, start location - 30 window
+            loc++;
+
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_40, end, HIGH_ENERGY));//high energy, end location - 30 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_50, end, HIGH_ENERGY));//high energy, end location - 30 window
+            loc++;
+
+            //====Wiener Entropy====//
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_40, start, WIENER_ENTROPY));//wiener entropy, start location - 30 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_50, start, WIENER_ENTROPY));//wiener entropy, start location - 30 window
+            loc++;
+
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_40, end, WIENER_ENTROPY));//wiener entropy, start location - 30 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_50, end, WIENER_ENTROPY));//wiener entropy, start location - 30 window
+            loc++;
+
+            //===========Auto Correlation==========//
+            phiFeatures[loc] = calculateDiff(example, win_size_5, start, AUTO_CORRELATION);//auto correlation, start location - 5 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_10, start, AUTO_CORRELATION);//auto correlation, start location - 10 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_15, start, AUTO_CORRELATION);//auto correlation, start location - 15 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_20, start, AUTO_CORRELATION);//auto correlation, start location - 15 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_25, start, AUTO_CORRELATION);//auto correlation, start location - 15 window
+            loc++;
+
+            //==========Difference 5 and 15 frames from start=========//
+            //====Pitch====//
+            phiFeatures[loc] = calculateDiff(example, win_size_40, start, PITCH);//pitch, start location - 20 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, start, PITCH);//pitch, start location - 30 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_40, end, PITCH);//pitch, start location - 20 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, end, PITCH);//pitch, start location - 30 window
+            loc++;
+
+            //====Voicing====//
+            phiFeatures[loc] = calculateDiff(example, win_size_40, start, VOICING);//voicing, start location - 15 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, start, VOICING);//voicing, start location - 20 window
+            loc++;
+
+            phiFeatures[loc] = calculateDiff(example, win_size_40, end, VOICING);//voicing, end location - 30 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, end, VOICING);//voicing, end location - 30 window
+            loc++;
+
+            //====Zero-Crossing====//
+            phiFeatures[loc] = calculateDiff(example, win_size_40, start, ZERO_CROSSING);//zero-crossing, start location - 20 window
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, start, ZERO_CROSSING);//zero-crossing, start location - 30 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_40, end, ZERO_CROSSING));//zero-crossing, end location - 20 window
+            loc++;
+            phiFeatures[loc] = Math.abs(calculateDiff(example, win_size_50, end, ZERO_CROSSING));//zero-crossing, end location - 30 window
+            loc++;
+
+            //==== DELTA ====//
+            // MFCC_1
+            phiFeatures[loc] = calculateDiff(example, win_size_15, start, MFCC_1);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, start, MFCC_1);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_15, end, MFCC_1);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, end, MFCC_1);
+            loc++;
+
+            // MFCC_2
+            phiFeatures[loc] = calculateDiff(example, win_size_15, start, MFCC_2);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, start, MFCC_2);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_15, end, MFCC_2);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, end, MFCC_2);
+            loc++;
+
+            // MFCC_3
+            phiFeatures[loc] = calculateDiff(example, win_size_15, start, MFCC_3);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, start, MFCC_3);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_15, end, MFCC_3);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, end, MFCC_3);
+            loc++;
+
+            // MFCC_4
+            phiFeatures[loc] = calculateDiff(example, win_size_15, start, MFCC_4);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, start, MFCC_4);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_15, end, MFCC_4);
+            loc++;
+            phiFeatures[loc] = calculateDiff(example, win_size_50, end, MFCC_4);
+            loc++;
+
+            //==============Mean value from start to end==============//
+            //true means prev the start point, false means after the end point
+            if(boundaryOnly)
+                loc += MEAN_FEATURES.length * 2;
+            else {
+                phiFeatures[loc] = calculateMean(example, start, end, SHORT_TERM_ENERGY, win_size_50, true);//Mean of short-term energy
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, SHORT_TERM_ENERGY, win_size_50, false);//Mean of short-term energy
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, TOTAL_ENERGY, win_size_50, true);//Mean of low energy
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, TOTAL_ENERGY, win_size_50, false);//Mean of low energy
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, HIGH_ENERGY, win_size_50, true);//Mean of low energy
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, HIGH_ENERGY, win_size_50, false);//Mean of low energy
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, LOW_ENERGY, win_size_50, true);//Mean of low energy
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, LOW_ENERGY, win_size_50, false);//Mean of low energy
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, VOICING, win_size_50, true);//Mean of voicing
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, VOICING, win_size_50, false);//Mean of voicing
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, ZERO_CROSSING, win_size_50, true);//Mean of zero-crossing
+                loc++;
+                phiFeatures[loc] = calculateMean(example, start, end, ZERO_CROSSING, win_size_50, false);//Mean of zero-crossing
                 loc++;
+            }
 
-                //============== Delta MFCC Feature Function==============//
-                //======================= START ==========================//
-                phiFeatures.put(loc, NORMALIZE * example.getFeatures2D().get(start).get(MFCC_1));
-                loc++;
-                phiFeatures.put(loc, NORMALIZE * example.getFeatures2D().get(start).get(MFCC_2));
-                loc++;
-                phiFeatures.put(loc, NORMALIZE * example.getFeatures2D().get(start).get(MFCC_3));
-                loc++;
-                phiFeatures.put(loc, NORMALIZE * example.getFeatures2D().get(start).get(MFCC_4));
-                loc++;
+            // ==== MAX FUNCTION ==== //
+            phiFeatures[loc] = VowelFramesExample.getValue(example, start, TOTAL_ENERGY);
+            loc++;
+            phiFeatures[loc] = VowelFramesExample.getValue(example, start, LOW_ENERGY);
+            loc++;
+            phiFeatures[loc] = VowelFramesExample.getValue(example, start, HIGH_ENERGY);
+            loc++;
+            phiFeatures[loc] = VowelFramesExample.getValue(example, start, AUTO_CORRELATION);
+            loc++;
+
+            //============== Delta MFCC Feature Function==============//
+            //======================= START ==========================//
+            phiFeatures[loc] = NORMALIZE * VowelFramesExample.getValue(example, start, MFCC_1);
+            loc++;
+            phiFeatures[loc] = NORMALIZE * VowelFramesExample.getValue(example, start, MFCC_2);
+            loc++;
+            phiFeatures[loc] = NORMALIZE * VowelFramesExample.getValue(example, start, MFCC_3);
+            loc++;
+            phiFeatures[loc] = NORMALIZE * VowelFramesExample.getValue(example, start, MFCC_4);
+            loc++;
+
+            //=======================END=======================//
+            phiFeatures[loc] = NORMALIZE * VowelFramesExample.getValue(example, end, MFCC_1);
+            loc++;
+            phiFeatures[loc] = NORMALIZE * VowelFramesExample.getValue(example, end, MFCC_2);
+            loc++;
+            phiFeatures[loc] = NORMALIZE * VowelFramesExample.getValue(example, end, MFCC_3);
+            loc++;
+            phiFeatures[loc] = NORMALIZE * VowelFramesExample.getValue(example, end, MFCC_4);
+            loc++;
+
+            if(boundaryOnly)
+                return phiFeatures;
+
+            //===============Gamma Distribution Over The Vowel Length==============//
+            double vowelLength = end - start;
+            phiFeatures[loc] = bounds.gammaPrior(vowelLength);
+            loc++;
+
+            //===============Gaussian Distribution Over The Vowel Length==============//
+            phiFeatures[loc] = bounds.gaussianPrior(vowelLength);
+
+            return phiFeatures;
 
-                //=======================END=======================//
-                phiFeatures.put(loc, NORMALIZE * example.getFeatures2D().get(end).get(MFCC_1));
-                loc++;
-                phiFeatures.put(loc, NORMALIZE * example.getFeatures2D().get(end).get(MFCC_2));
-                loc++;
-                phiFeatures.put(loc, NORMALIZE * example.getFeatures2D().get(end).get(MFCC_3));
-                loc++;
-                phiFeatures.put(loc, NORMALIZE * example.getFeatures2D().get(end).get(MFCC_4));
-                loc++;
+        } catch (Exception e) {
+            e.printStackTrace();
+            return null;
+        }
+    }
 
-                //===============Gamma Distribution Over The Vowel Length==============//
-                //shape = mean^2/var
-                //scale = var/mean
-                double variance = Math.pow(Consts.STD_VOWEL_LENGTH, 2);
-                double shape = Math.pow(Consts.MEAN_VOWEL_LENGTH, 2) / variance;
-                double scale = variance / Consts.MEAN_VOWEL_LENGTH;
-                Gamma gamma = new Gamma(shape, scale);
-                double vowelLength = end - start;
-                phiFeatures.put(loc, gamma.pdf(vowelLength) / gamma.pdf(Consts.MAX_VOWEL_LENGTH));
-                loc++;
+    //the scores of all the labels of the example, W*phi(x, start, end) = start score + end score + pair score
+    //return null on error
+    @Override
+    public DecomposedScores decompose(Example example, double[] weights) {
+        DecomposedScores[] scores = decompose(example, new double[][]{weights});
+        return scores == null ? null : scores[0];
+    }
 
-                //===============Gaussian Distribution Over The Vowel Length==============//
-                double numerator = -Math.pow((vowelLength - Consts.MEAN_VOWEL_LENGTH), 2);
-                double denominator = 2 * Math.pow(Consts.STD_VOWEL_LENGTH, 2);
-                phiFeatures.put(loc, Math.exp(numerator / denominator));
+    //the scores of several models at once, the features of every frame and the means are computed once for all of them
+    //return null on error
+    @Override
+    public DecomposedScores[] decompose(Example example, double[][] weights) {
+        try {
+            DecomposedScores[] scores = new DecomposedScores[weights.length];
+            for (int m = 0; m < weights.length; m++)
+                scores[m] = new DecomposedScores(example.sizeOfVector, bounds.maxVowel, MEAN_FEATURES.length * 2);
+
+            //the start and the end features of a frame are the features of the label frame-frame
+            for (int frame = 0; frame < example.sizeOfVector; frame++) {
+                double[] phi = computeBoundaryFeatures(example, frame);
+                if (phi == null)
+                    return null;
+                for (int m = 0; m < weights.length; m++)
+                    scores[m].addFrame(frame, phi, weights[m], FEATURE_PARTS);
+            }
 
-                newExample.setFeatures(phiFeatures);
-                return newExample;
+            int meanIndex = 0;
+            for (int loc = 0; loc < FEATURE_PARTS.length; loc++) {
+                if (FEATURE_PARTS[loc] == MEAN) {
+                    boolean isPrev = meanIndex % 2 == 0;
+                    double[][] mean = null;
+                    for (int m = 0; m < weights.length; m++) {
+                        double weight = DecomposedScores.getWeight(weights[m], loc);
+                        if (weight == 0)
+                            continue;
+                        if (mean == null)
+                            mean = DecomposedScores.computeMean(example, example.sizeOfVector, MEAN_FEATURES[meanIndex / 2], win_size_50, isPrev);
+                        scores[m].addMean(mean[0], mean[1], isPrev, weight);
+                    }
+                    meanIndex++;
+                } else if (FEATURE_PARTS[loc] == GAMMA || FEATURE_PARTS[loc] == GAUSSIAN) {
+                    for (int length = 0; length <= bounds.maxVowel; length++) {
+                        double value = FEATURE_PARTS[loc] == GAMMA ? bounds.gammaPrior(length) : bounds.gaussianPrior(length);
+                        for (int m = 0; m < weights.length; m++)
+                            scores[m].lengthScores[length] += DecomposedScores.getWeight(weights[m], loc) * value;
+                    }
+                }
             }
-            return null;
+            return scores;
 
         } catch (Exception e) {
             e.printStackTrace();
@@ -323,8 +440,8 @@ public class FeatureFunctionsVDnoClassifier implements IFeatureFunctions {
         try {
             double preVal;
             //get the cumulative values of featureNumber
-            double startVal = CacheVowelData.getCumulativeValue(example, location - win_size, featureNumber);
-            double endVal = CacheVowelData.getCumulativeValue(example, location, featureNumber);
+            double startVal = VowelFramesExample.getCumulativeValue(example, location - win_size, featureNumber);
+            double endVal = VowelFramesExample.getCumulativeValue(example, location, featureNumber);
 
             preVal = endVal - startVal;
             preVal /= win_size;
@@ -333,7 +450,7 @@ public class FeatureFunctionsVDnoClassifier implements IFeatureFunctions {
             double afterVal;
             //get the cumulative values of featureNumber
             startVal = endVal;
-            endVal = CacheVowelData.getCumulativeValue(example, location + win_size, featureNumber);
+            endVal = VowelFramesExample.getCumulativeValue(example, location + win_size, featureNumber);
 
             afterVal = endVal - startVal;
             afterVal /= win_size;
@@ -361,8 +478,8 @@ public class FeatureFunctionsVDnoClassifier implements IFeatureFunctions {
             int counter = end - start;
 
             //get the cumulative values of featureNumber
-            double startVal = CacheVowelData.getCumulativeValue(example,start,featureNumber);
-            double endVal = CacheVowelData.getCumulativeValue(example,end,featureNumber);
+            double startVal = VowelFramesExample.getCumulativeValue(example,start,featureNumber);
+            double endVal = VowelFramesExample.getCumulativeValue(example,end,featureNumber);
 
             //computer the mean
             avg = endVal-startVal;
@@ -372,15 +489,15 @@ public class FeatureFunctionsVDnoClassifier implements IFeatureFunctions {
             double val;
             if(isPrev) {
                 //get the cumulative values of featureNumber
-                startVal = CacheVowelData.getCumulativeValue(example, start - win_size, featureNumber);
-                endVal = CacheVowelData.getCumulativeValue(example, start, featureNumber);
+                startVal = VowelFramesExample.getCumulativeValue(example, start - win_size, featureNumber);
+                endVal = VowelFramesExample.getCumulativeValue(example, start, featureNumber);
 
                 val = endVal - startVal;
                 val /= win_size;
             } else {
                 //get the cumulative values of featureNumber
-                startVal = CacheVowelData.getCumulativeValue(example, end, featureNumber);
-                endVal = CacheVowelData.getCumulativeValue(example, end + win_size, featureNumber);
+                startVal = VowelFramesExample.getCumulativeValue(example, end, featureNumber);
+                endVal = VowelFramesExample.getCumulativeValue(example, end + win_size, featureNumber);
 
                 val = startVal - endVal;
                 val /= win_size;
@@ -0,0 +1,37 @@
+/*
+ * Vowel Duration Measurement Package - Automatic vowel duration measurement using structured prediction algorithms
+ * Copyright (C) 2015 Yossi Adi, E-Mail: yossiadidrum@gmail.com
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+import com.structed.data.entities.Example;
+import com.structed.data.featurefunctions.IFeatureFunctions;
+
+/**
+ * Feature functions whose score W*phi(x, start, end) splits into start, end and pair scores, so the inference can
+ * score all the labels of an example without converting every label (see DecomposedScores).
+ */
+public interface IDecomposableFeatureFunctions extends IFeatureFunctions {
+    //weights: the dense weights of the model (DenseWeights)
+    //return null on error
+    DecomposedScores decompose(Example example, double[] weights);
+
+    //the scores of several models that share these feature functions, the features of the example are computed once
+    //return null on error
+    DecomposedScores[] decompose(Example example, double[][] weights);
+
+    //the bounds of the model the feature functions were built for, the longest vowel of the scores and the priors
+    SearchBounds getBounds();
+}
@@ -31,6 +31,42 @@ import com.structed.utils.MathHelpers;
  *
  */
 public class InferenceVowelDuration implements IInference {
+    //the labels that are searched, pruned to the candidates of the vowel evidence when pruning is set and searched
+    //coarse to fine when coarseToFine is set
+    private final SearchBounds bounds;
+    private final CandidatePruning pruning;
+    private final CoarseToFine coarseToFine;
+    //the dense weights of the model and the weights vector they were converted to, set once by the predictions so
+    //W is not converted back to a dense array for every example. the training updates W after every example, so
+    //without them W is converted for every example
+    private double[] weights;
+    private Vector weightsVector;
+
+    public InferenceVowelDuration() {
+        this(SearchBounds.DEFAULT);
+    }
+
+    public InferenceVowelDuration(SearchBounds bounds) {
+        this(bounds, null);
+    }
+
+    public InferenceVowelDuration(SearchBounds bounds, CandidatePruning pruning) {
+        this(bounds, pruning, null);
+    }
+
+    public InferenceVowelDuration(SearchBounds bounds, CandidatePruning pruning, CoarseToFine coarseToFine) {
+        this.bounds = bounds;
+        this.pruning = pruning;
+        this.coarseToFine = coarseToFine;
+    }
+
+    //the dense weights are used for as long as the weights vector W of the predictions is weightsVector, W must not be
+    //updated afterwards. set before the inference is shared by threads
+    public void setDenseWeights(double[] weights, Vector weightsVector) {
+        this.weights = weights;
+        this.weightsVector = weightsVector;
+    }
+
     //predict function
     //argmax(yS,yE) (W*Phi(Xi,yS,yE)) + Task Loss
     //this function assumes that the argument vector has already been converted to phi vector
@@ -39,7 +75,8 @@ public class InferenceVowelDuration implements IInference {
     {
         try{
             double maxVal = 0;
-            String maxLabel = "";
+            int maxStart = 0;
+            int maxEnd = 0;
             boolean isFirst = true;
 
             //validation
@@ -49,35 +86,84 @@ public class InferenceVowelDuration implements IInference {
                 return null;
             }
 
-            //loop over all the classifications of this specific example
-            for(int i=Consts.MIN_GAP_START ; i<vector.sizeOfVector-(Consts.MIN_GAP_END) ; i++)
+            //feature functions that split into start, end and pair scores are decomposed once per example with the
+            //dense weights, otherwise every label is converted to its phi vector
+            DecomposedScores scores = null;
+            if(classifierData.phi instanceof IDecomposableFeatureFunctions)
+                scores = ((IDecomposableFeatureFunctions) classifierData.phi).decompose(vector,
+                        W == weightsVector && weights != null ? weights : DenseWeights.fromVector(W));
+
+            //the task loss of the vowel duration is computed on the frames, the real class is parsed once
+            TaskLossVowelDuration vowelTaskLoss = null;
+            VowelLabel realLabel = null;
+            if(epsilonArgMax != 0 && realClass != null && classifierData.taskLoss instanceof TaskLossVowelDuration) {
+                vowelTaskLoss = (TaskLossVowelDuration) classifierData.taskLoss;
+                realLabel = VowelLabel.parse(realClass);
+            }
+
+            //the starts and the ends of the pruned search, when no pair of them is a label all the labels are searched
+            boolean[][] candidates = pruning == null ? null : pruning.candidates(vector);
+
+            //the coarse to fine search needs the decomposed scores and is used for the predictions only, the task
+            //loss of the training changes the best labels of the grid
+            if(coarseToFine != null && scores != null && epsilonArgMax == 0)
             {
-                for(int j=i+Consts.MIN_VOWEL ; j<i+Consts.MAX_VOWEL ; j++)
+                int[] best = coarseToFine.search(scores, vector.sizeOfVector, bounds, candidates);
+                if(best != null) {
+                    maxStart = best[0];
+                    maxEnd = best[1];
+                    maxVal = scores.score(best[0], best[1]);
+                    isFirst = false;
+                }
+            }
+
+            //the exhaustive search, skipped when the coarse to fine search found a label
+            for(int pass = candidates != null ? 0 : 1 ; pass < 2 && isFirst ; pass++)
+            {
+                boolean[][] mask = pass == 0 ? candidates : null;
+
+                //loop over all the classifications of this specific example
+                for(int i=bounds.minGapStart ; i<vector.sizeOfVector-(bounds.minGapEnd) ; i++)
                 {
-                    if(j>vector.sizeOfVector-(Consts.MIN_GAP_END))
-                        break;
+                    if(mask != null && !mask[0][i+1])
+                        continue;
+                    for(int j=i+bounds.minVowel ; j<i+bounds.maxVowel ; j++)
+                    {
+                        if(j>vector.sizeOfVector-(bounds.minGapEnd))
+                            break;
+                        if(mask != null && !mask[1][j+1])
+                            continue;
 
-                    Example phiData = classifierData.phi.convert(vector,(i+1)+Consts.CLASSIFICATION_SPLITTER+(j+1),classifierData.kernel);
-                    //multiple the vectors
-                    double tmp = MathHelpers.multipleVectors(W, phiData.getFeatures());
+                        double tmp;
+                        if(scores != null)
+                            tmp = scores.score(i + 1, j + 1);
+                        else {
+                            Example phiData = classifierData.phi.convert(vector,(i+1)+Consts.CLASSIFICATION_SPLITTER+(j+1),classifierData.kernel);
+                            //multiple the vectors
+                            tmp = MathHelpers.multipleVectors(W, phiData.getFeatures());
+                        }
 
-                    if(epsilonArgMax != 0){
-                        //add the task loss
-                        tmp += epsilonArgMax*classifierData.taskLoss.computeTaskLoss((i+1)+Consts.CLASSIFICATION_SPLITTER+(j+1), realClass, classifierData.arguments);
-                    }
+                        if(epsilonArgMax != 0){
+                            //add the task loss
+                            if(realLabel != null)
+                                tmp += epsilonArgMax*vowelTaskLoss.computeTaskLoss(i+1, j+1, realLabel.start, realLabel.end, classifierData.arguments);
+                            else
+                                tmp += epsilonArgMax*classifierData.taskLoss.computeTaskLoss((i+1)+Consts.CLASSIFICATION_SPLITTER+(j+1), realClass, classifierData.arguments);
+                        }
 
-                    if(isFirst) {
-                        maxLabel = (i + 1) + Consts.CLASSIFICATION_SPLITTER + (j + 1);
-                        maxVal = tmp;
-                        isFirst = false;
-                    }
-                    else if(tmp > maxVal) {
-                        maxLabel = (i + 1) + Consts.CLASSIFICATION_SPLITTER + (j + 1);
-                        maxVal = tmp;
+                        if(isFirst || tmp > maxVal) {
+                            maxStart = i + 1;
+                            maxEnd = j + 1;
+                            maxVal = tmp;
+                            isFirst = false;
+                        }
                     }
                 }
             }
 
+            //the label is built once, for the best classification
+            String maxLabel = isFirst ? "" : new VowelLabel(maxStart, maxEnd).toString();
+
             PredictedLabels result = new PredictedLabels();
             result.put(maxLabel, maxVal);
 
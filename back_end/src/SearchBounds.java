@@ -0,0 +1,185 @@
+/*
+ * Vowel Duration Measurement Package - Automatic vowel duration measurement using structured prediction algorithms
+ * Copyright (C) 2015 Yossi Adi, E-Mail: yossiadidrum@gmail.com
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+import com.structed.constants.Consts;
+import com.structed.data.Logger;
+import jsc.distributions.Gamma;
+
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.FileReader;
+import java.io.FileWriter;
+import java.io.IOException;
+import java.util.HashMap;
+
+/**
+ * The labels the inference searches and the priors over the vowel length of a model. By default these are the
+ * constants of the jar (Consts), a model trained on another corpus keeps its own in <model>.bounds next to it,
+ * written by utils/search_bounds.py from the labels of the corpus. Every line of the file is: <key> <value>, the keys
+ * that are missing keep the value of Consts.
+ * The inference searches the labels (i + 1, j + 1) for minGapStart <= i < numFrames - minGapEnd and
+ * i + minVowel <= j < i + maxVowel, j <= numFrames - minGapEnd.
+ */
+public class SearchBounds {
+    public static final String EXTENSION = ".bounds";
+    public static final SearchBounds DEFAULT = new SearchBounds();
+    //the boundary features read the frames after the offset, an offset closer than this to the end of the example is
+    //out of its frames
+    public static final int MIN_GAP_END_FLOOR = 2;
+
+    public final int minGapStart;
+    public final int minGapEnd;
+    public final int minVowel;
+    public final int maxVowel;
+    public final double meanVowelLength;
+    public final double stdVowelLength;
+    //the gamma prior is normalized by its value at this length
+    public final double maxVowelLength;
+
+    //the gamma distribution of the prior, its parameters are fixed so it is built once
+    private final Gamma gamma;
+    private final double gammaNorm;
+
+    public SearchBounds() {
+        this(Consts.MIN_GAP_START, Consts.MIN_GAP_END, Consts.MIN_VOWEL, Consts.MAX_VOWEL, Consts.MEAN_VOWEL_LENGTH,
+                Consts.STD_VOWEL_LENGTH, Consts.MAX_VOWEL_LENGTH);
+    }
+
+    public SearchBounds(int minGapStart, int minGapEnd, int minVowel, int maxVowel, double meanVowelLength,
+                        double stdVowelLength, double maxVowelLength) {
+        this.minGapStart = minGapStart;
+        this.minGapEnd = minGapEnd;
+        this.minVowel = minVowel;
+        this.maxVowel = maxVowel;
+        this.meanVowelLength = meanVowelLength;
+        this.stdVowelLength = stdVowelLength;
+        this.maxVowelLength = maxVowelLength;
+
+        //shape = mean^2/var
+        //scale = var/mean
+        double variance = Math.pow(stdVowelLength, 2);
+        gamma = new Gamma(Math.pow(meanVowelLength, 2) / variance, variance / meanVowelLength);
+        gammaNorm = gamma.pdf(maxVowelLength);
+    }
+
+    //the bounds of the model, the default bounds when it has no bounds file
+    public static SearchBounds forModel(String modelPath) throws IOException {
+        File file = new File(modelPath + EXTENSION);
+        return file.exists() ? load(file.getPath()) : DEFAULT;
+    }
+
+    public static SearchBounds load(String path) throws IOException {
+        HashMap<String, String> values = new HashMap<String, String>();
+        BufferedReader reader = new BufferedReader(new FileReader(path));
+        try {
+            String line;
+            while ((line = reader.readLine()) != null) {
+                line = line.trim();
+                if (line.isEmpty() || line.startsWith("#"))
+                    continue;
+                String parts[] = line.split("\\s+");
+                if (parts.length > 1)
+                    values.put(parts[0], parts[1]);
+            }
+        } finally {
+            reader.close();
+        }
+        int minGapEnd = getInt(values, "min_gap_end", Consts.MIN_GAP_END);
+        if (minGapEnd < MIN_GAP_END_FLOOR) {
+            Logger.error("min_gap_end of " + path + " is " + minGapEnd + ", " + MIN_GAP_END_FLOOR + " is used");
+            minGapEnd = MIN_GAP_END_FLOOR;
+        }
+        return new SearchBounds(
+                getInt(values, "min_gap_start", Consts.MIN_GAP_START),
+                minGapEnd,
+                getInt(values, "min_vowel", Consts.MIN_VOWEL),
+                getInt(values, "max_vowel", Consts.MAX_VOWEL),
+                getDouble(values, "mean_vowel_length", Consts.MEAN_VOWEL_LENGTH),
+                getDouble(values, "std_vowel_length", Consts.STD_VOWEL_LENGTH),
+                getDouble(values, "max_vowel_length", Consts.MAX_VOWEL_LENGTH));
+    }
+
+    public void save(String path) throws IOException {
+        FileWriter writer = new FileWriter(path);
+        try {
+            writer.write("min_gap_start " + minGapStart + "\n");
+            writer.write("min_gap_end " + minGapEnd + "\n");
+            writer.write("min_vowel " + minVowel + "\n");
+            writer.write("max_vowel " + maxVowel + "\n");
+            writer.write("mean_vowel_length " + meanVowelLength + "\n");
+            writer.write("std_vowel_length " + stdVowelLength + "\n");
+            writer.write("max_vowel_length " + maxVowelLength + "\n");
+        } finally {
+            writer.close();
+        }
+    }
+
+    private static int getInt(HashMap<String, String> values, String key, int defaultValue) {
+        return values.containsKey(key) ? Integer.parseInt(values.get(key)) : defaultValue;
+    }
+
+    private static double getDouble(HashMap<String, String> values, String key, double defaultValue) {
+        return values.containsKey(key) ? Double.parseDouble(values.get(key)) : defaultValue;
+    }
+
+    //whether the inference searches the label (i + 1, j + 1) of an example of numFrames frames
+    public boolean contains(int i, int j, int numFrames) {
+        return i >= minGapStart && i < numFrames - minGapEnd && j >= i + minVowel && j < i + maxVowel &&
+                j <= numFrames - minGapEnd;
+    }
+
+    //the smallest bounds that contain the labels of both, with the priors of this one
+    public SearchBounds union(SearchBounds other) {
+        return new SearchBounds(Math.min(minGapStart, other.minGapStart), Math.min(minGapEnd, other.minGapEnd),
+                Math.min(minVowel, other.minVowel), Math.max(maxVowel, other.maxVowel), meanVowelLength,
+                stdVowelLength, maxVowelLength);
+    }
+
+    //the gamma distribution over the vowel length, normalized by its value at maxVowelLength
+    public double gammaPrior(double vowelLength) {
+        return gamma.pdf(vowelLength) / gammaNorm;
+    }
+
+    //the gaussian distribution over the vowel length, without the normalization
+    public double gaussianPrior(double vowelLength) {
+        double numerator = -Math.pow((vowelLength - meanVowelLength), 2);
+        double denominator = 2 * Math.pow(stdVowelLength, 2);
+        return Math.exp(numerator / denominator);
+    }
+
+    @Override
+    public boolean equals(Object o) {
+        if (!(o instanceof SearchBounds))
+            return false;
+        SearchBounds other = (SearchBounds) o;
+        return minGapStart == other.minGapStart && minGapEnd == other.minGapEnd && minVowel == other.minVowel &&
+                maxVowel == other.maxVowel && meanVowelLength == other.meanVowelLength &&
+                stdVowelLength == other.stdVowelLength && maxVowelLength == other.maxVowelLength;
+    }
+
+    @Override
+    public int hashCode() {
+        int result = minGapStart;
+        result = 31 * result + minGapEnd;
+        result = 31 * result + minVowel;
+        result = 31 * result + maxVowel;
+        result = 31 * result + Double.valueOf(meanVowelLength).hashCode();
+        result = 31 * result + Double.valueOf(stdVowelLength).hashCode();
+        return 31 * result + Double.valueOf(maxVowelLength).hashCode();
+    }
+}
@@ -30,9 +30,6 @@ public class TaskLossVowelDuration implements ITaskLoss {
     //max{0, |ys - ys'| - epsilon} + max{0, |ye - ye'| - epsilon}
     public double computeTaskLoss(String predictClass, String actualClass, List<Double> params) {
         try {
-            Double epsilon_onset = params.get(0);
-            Double epsilon_offset = params.get(1);
-
             String predictValues[] = predictClass.split(Consts.CLASSIFICATION_SPLITTER);
             String actualClassValues[] = actualClass.split(Consts.CLASSIFICATION_SPLITTER);
 
@@ -42,22 +39,30 @@ public class TaskLossVowelDuration implements ITaskLoss {
             double predictResEnd = Double.parseDouble(predictValues[1]);
             double actualResEnd = Double.parseDouble(actualClassValues[1]);
 
-            double diffStart = Math.abs(predictResStart - actualResStart);
-            double diffEnd = Math.abs(predictResEnd - actualResEnd);
-
-            //subtract the epsilon
-            double absRes = 0;
-            if(diffStart >=  epsilon_onset)
-                absRes += diffStart;
-            if(diffEnd >= epsilon_offset)
-                absRes += diffEnd;
-
-            //get the max from the absolute result minus epsilon and 0
-            return absRes;
+            return computeTaskLoss(predictResStart, predictResEnd, actualResStart, actualResEnd, params);
 
         } catch (Exception e){
             e.printStackTrace();
             return 0;
         }
     }
+
+    //the task loss of the onsets and offsets themselves, without parsing the labels
+    public double computeTaskLoss(double predictResStart, double predictResEnd, double actualResStart, double actualResEnd, List<Double> params) {
+        double epsilon_onset = params.get(0);
+        double epsilon_offset = params.get(1);
+
+        double diffStart = Math.abs(predictResStart - actualResStart);
+        double diffEnd = Math.abs(predictResEnd - actualResEnd);
+
+        //subtract the epsilon
+        double absRes = 0;
+        if(diffStart >=  epsilon_onset)
+            absRes += diffStart;
+        if(diffEnd >= epsilon_offset)
+            absRes += diffEnd;
+
+        //get the max from the absolute result minus epsilon and 0
+        return absRes;
+    }
 }
@@ -0,0 +1,175 @@
+/*
+ * Vowel Duration Measurement Package - Automatic vowel duration measurement using structured prediction algorithms
+ * Copyright (C) 2015 Yossi Adi, E-Mail: yossiadidrum@gmail.com
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+import com.structed.constants.Consts;
+import com.structed.dal.LazyReader;
+import com.structed.data.InstancesContainer;
+import com.structed.data.LazyInstancesContainer;
+import com.structed.data.Logger;
+import com.structed.data.entities.Example;
+import com.structed.utils.ConverterHelplers;
+
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.FileInputStream;
+import java.io.FileReader;
+import java.io.IOException;
+import java.io.RandomAccessFile;
+import java.nio.ByteBuffer;
+import java.nio.ByteOrder;
+import java.nio.FloatBuffer;
+import java.nio.channels.FileChannel;
+import java.util.ArrayList;
+import java.util.Arrays;
+
+/**
+ * Reads the features files of the examples like LazyReader, the files are either text .data files or the float32
+ * binary container of front_end/feature_format.py (the layout is described there), which is mapped into memory
+ * instead of being parsed. The format is found by the magic at the start of the file.
+ * The examples are VowelFramesExample objects: the frames are a double matrix with the cumulative sums of the
+ * columns, so the examples need no CacheVowelData entry.
+ */
+public class VowelFeaturesReader extends LazyReader {
+    public static final String MAGIC = "VDFT";
+    public static final int VERSION = 1;
+
+    //the same lazy container as LazyReader, its examples are read by this reader
+    @Override
+    public InstancesContainer readData(String path, String columnSpliter, String labelSpliter) {
+        InstancesContainer container = new VowelInstancesContainer(this);
+        container.setPaths(readFile(path, columnSpliter));
+        return container;
+    }
+
+    //paths: the features file and the labels file of the example
+    //return null on error
+    @Override
+    public Example readExample(ArrayList<String> paths) throws Exception {
+        VowelFramesExample example = isBinary(paths.get(0)) ? readBinary(paths.get(0)) : readText(paths.get(0));
+        if (example == null)
+            return null;
+
+        //the label is the second line of the labels file, as in LazyReader
+        ArrayList<ArrayList<String>> labels = readFile(paths.get(1), Consts.SPACE);
+        example.setLabel(labels.get(1).get(0) + Consts.CLASSIFICATION_SPLITTER + labels.get(1).get(1));
+        return example;
+    }
+
+    public static boolean isBinary(String path) throws IOException {
+        FileInputStream in = new FileInputStream(path);
+        try {
+            byte[] magic = new byte[MAGIC.length()];
+            return in.read(magic) == magic.length && new String(magic, "US-ASCII").equals(MAGIC);
+        } finally {
+            in.close();
+        }
+    }
+
+    //reads a binary features file, nan values are zero as in the text files
+    public static VowelFramesExample readBinary(String path) throws IOException {
+        RandomAccessFile file = new RandomAccessFile(path, "r");
+        try {
+            FileChannel channel = file.getChannel();
+            ByteBuffer buffer = channel.map(FileChannel.MapMode.READ_ONLY, 0, channel.size());
+            buffer.order(ByteOrder.LITTLE_ENDIAN);
+            buffer.position(MAGIC.length());
+            int version = buffer.getInt();
+            if (version > VERSION)
+                throw new IOException("unsupported features file version " + version + ": " + path);
+            int numFrames = buffer.getInt();
+            int numColumns = buffer.getInt();
+            buffer.getFloat(); //the frame rate
+            int dataOffset = buffer.getInt();
+
+            buffer.position(dataOffset);
+            FloatBuffer floats = buffer.asFloatBuffer();
+            double[] values = new double[numFrames * numColumns];
+            for (int i = 0; i < values.length; i++) {
+                float value = floats.get(i);
+                values[i] = Float.isNaN(value) ? 0.0 : (double) value;
+            }
+            return new VowelFramesExample(values, numColumns);
+        } finally {
+            file.close();
+        }
+    }
+
+    //reads a text features file like LazyReader: a line of space separated values per frame, nan values are zero
+    //return null on error
+    public static VowelFramesExample readText(String path) throws IOException {
+        BufferedReader in = new BufferedReader(new FileReader(path));
+        try {
+            double[] values = new double[1 << 12];
+            int size = 0;
+            int numColumns = 0;
+            String line;
+            while ((line = in.readLine()) != null) {
+                if (line.isEmpty())
+                    continue;
+                String columns[] = line.split(Consts.SPACE);
+                if (size == 0)
+                    numColumns = columns.length;
+                else if (columns.length != numColumns) {
+                    Logger.error("Error converting example, the frames have different sizes: " + path);
+                    return null;
+                }
+                if (size + numColumns > values.length)
+                    values = Arrays.copyOf(values, Math.max(2 * values.length, size + numColumns));
+
+                for (String column : columns) {
+                    if (column.equalsIgnoreCase("nan"))
+                        values[size++] = 0.0;
+                    else if (ConverterHelplers.tryParseDouble(column))
+                        values[size++] = Double.parseDouble(column);
+                    else {
+                        Logger.error("Error converting example.");
+                        return null;
+                    }
+                }
+            }
+            return new VowelFramesExample(Arrays.copyOf(values, size), numColumns);
+        } finally {
+            in.close();
+        }
+    }
+
+    //LazyInstancesContainer that reads its examples with a VowelFeaturesReader
+    private static class VowelInstancesContainer extends LazyInstancesContainer {
+        private final VowelFeaturesReader reader;
+
+        VowelInstancesContainer(VowelFeaturesReader reader) {
+            this.reader = reader;
+        }
+
+        @Override
+        public Example getInstance(int index) {
+            try {
+                ArrayList<String> paths = getPaths().get(index);
+                if (!new File(paths.get(0)).exists())
+                    return null;
+                Example example = reader.readExample(paths);
+                if (example != null)
+                    example.path = paths.get(0);
+                return example;
+            } catch (Exception e) {
+                e.printStackTrace();
+                return null;
+            }
+        }
+    }
+}
@@ -0,0 +1,80 @@
+/*
+ * Vowel Duration Measurement Package - Automatic vowel duration measurement using structured prediction algorithms
+ * Copyright (C) 2015 Yossi Adi, E-Mail: yossiadidrum@gmail.com
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+import com.structed.data.CacheVowelData;
+import com.structed.data.entities.Example;
+import com.structed.data.entities.Example2D;
+
+/**
+ * An example whose frames are a row major double matrix, with the cumulative sums of every column computed once
+ * when it is read. The feature functions read the frames and the cumulative values from the arrays instead of the
+ * lists of Vectors of getFeatures2D (which stays empty) and the cache of CacheVowelData.
+ */
+public class VowelFramesExample extends Example2D {
+    public final int numColumns;
+    //the values of the frames and the sums of every column over the frames 0..frame, row after row
+    private final double[] values;
+    private final double[] cumulative;
+
+    public VowelFramesExample(double[] values, int numColumns) {
+        this.numColumns = numColumns;
+        this.values = values;
+        this.sizeOfVector = numColumns == 0 ? 0 : values.length / numColumns;
+
+        cumulative = new double[values.length];
+        if (sizeOfVector > 0)
+            System.arraycopy(values, 0, cumulative, 0, numColumns);
+        for (int i = numColumns; i < values.length; i++)
+            cumulative[i] = cumulative[i - numColumns] + values[i];
+    }
+
+    public double getValue(int frame, int column) {
+        checkColumn(column);
+        return values[frame * numColumns + column];
+    }
+
+    //the sum of the column over the frames 0..location, the location is clamped to the frames of the example
+    //the same as CacheVowelData.getCumulativeValue
+    public double getCumulativeValue(int location, int column) {
+        checkColumn(column);
+        if (location <= 0)
+            location = 0;
+        else if (location >= sizeOfVector)
+            location = sizeOfVector - 1;
+        return cumulative[location * numColumns + column];
+    }
+
+    private void checkColumn(int column) {
+        if (column < 0 || column >= numColumns)
+            throw new IndexOutOfBoundsException("column " + column + " of an example of " + numColumns + " columns");
+    }
+
+    //the value of featureNumber at the frame of any example
+    public static double getValue(Example example, int frame, int featureNumber) {
+        if (example instanceof VowelFramesExample)
+            return ((VowelFramesExample) example).getValue(frame, featureNumber);
+        return example.getFeatures2D().get(frame).get(featureNumber);
+    }
+
+    //the cumulative value of featureNumber of any example, the others are read from CacheVowelData
+    public static double getCumulativeValue(Example example, int location, int featureNumber) {
+        if (example instanceof VowelFramesExample)
+            return ((VowelFramesExample) example).getCumulativeValue(location, featureNumber);
+        return CacheVowelData.getCumulativeValue(example, location, featureNumber);
+    }
+}
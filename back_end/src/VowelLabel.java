@@ -0,0 +1,51 @@
+/*
+ * Vowel Duration Measurement Package - Automatic vowel duration measurement using structured prediction algorithms
+ * Copyright (C) 2015 Yossi Adi, E-Mail: yossiadidrum@gmail.com
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+import com.structed.constants.Consts;
+
+/**
+ * The onset and the offset frames of a vowel. The inference, the feature functions and the task loss work on the
+ * frames, the start-end strings of StructED are only parsed and formatted where the labels are read and written.
+ */
+public class VowelLabel {
+    public final int start;
+    public final int end;
+
+    public VowelLabel(int start, int end) {
+        this.start = start;
+        this.end = end;
+    }
+
+    //parses a start-end label
+    //return null if the label is not a pair of frames
+    public static VowelLabel parse(String label) {
+        String labelValues[] = label.split(Consts.CLASSIFICATION_SPLITTER);
+        if (labelValues.length < 2)
+            return null;
+        try {
+            return new VowelLabel(Integer.parseInt(labelValues[0]), Integer.parseInt(labelValues[1]));
+        } catch (NumberFormatException e) {
+            return null;
+        }
+    }
+
+    @Override
+    public String toString() {
+        return start + Consts.CLASSIFICATION_SPLITTER + end;
+    }
+}
@@ -0,0 +1,31 @@
+import com.structed.data.Logger;
+
+/**
+ * Converts a model between the serialized Vector of StructEDModel.saveModel and the dense weights file of
+ * DenseWeights, the format of the input is found by its magic and the output is the other format.
+ *
+ * usage: java -cp back_end.jar convert_weights <input weights> <output weights>
+ */
+public class convert_weights {
+    public static void main(String[] args) {
+        try{
+            if (args.length < 2) {
+                Logger.error("usage: convert_weights <input weights> <output weights>");
+                return;
+            }
+            String inputPath = args[0];
+            String outputPath = args[1];
+
+            boolean isDense = DenseWeights.isDense(inputPath);
+            double[] weights = DenseWeights.load(inputPath);
+            if (isDense)
+                DenseWeights.saveVector(DenseWeights.toVector(weights), outputPath);
+            else
+                DenseWeights.save(weights, outputPath);
+            Logger.info("Converted " + weights.length + " weights to " + outputPath);
+
+        } catch (Exception e) {
+            e.printStackTrace();
+        }
+    }
+}
@@ -0,0 +1,196 @@
+import com.structed.constants.Consts;
+import com.structed.data.InstancesContainer;
+import com.structed.data.Logger;
+import com.structed.data.entities.Example;
+import com.structed.data.entities.PredictedLabels;
+import com.structed.data.entities.Vector;
+import com.structed.data.featurefunctions.IFeatureFunctions;
+import com.structed.models.ClassifierData;
+
+import java.util.ArrayDeque;
+import java.util.concurrent.Callable;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+
+/**
+ * Decodes every file of a manifest with the exhaustive search and with the fast search, the pruned search
+ * (CandidatePruning) for a positive top k and the coarse to fine search (CoarseToFine) for a stride above 1, and
+ * reports how often the fast label differs from the exhaustive one, the share of the labels the pruning keeps, the
+ * onset and offset errors of both against the labels of the manifest (as the logs of train_cv) and the decoding time
+ * of both. The files that differ are listed with both labels.
+ * The manifest is the output of utils/sum_files.py, the files are decoded on a pool of threads, one per core.
+ *
+ * usage: java -cp back_end.jar evaluate_pruning <manifest> <model> [classifier|no_classifier] [top k] [margin] [stride]
+ */
+public class evaluate_pruning {
+    public static void main(String[] args) {
+        try{
+            if (args.length < 2) {
+                Logger.error("usage: evaluate_pruning <manifest> <model> [classifier|no_classifier] [top k] [margin] [stride]");
+                return;
+            }
+            String manifestPath = args[0];
+            String modelPath = args[1];
+            boolean noClassifier = args.length > 2 && args[2].equals("no_classifier");
+            int topK = args.length > 3 ? Integer.parseInt(args[3]) : CandidatePruning.DEFAULT_TOP_K;
+            int margin = args.length > 4 ? Integer.parseInt(args[4]) : CandidatePruning.DEFAULT_MARGIN;
+
+            SearchBounds bounds = SearchBounds.forModel(modelPath);
+            IFeatureFunctions featureFunctions = noClassifier ? new FeatureFunctionsVDnoClassifier(bounds) : new FeatureFunctionsVD(bounds);
+            double[] weights = DenseWeights.load(modelPath);
+            Vector W = DenseWeights.toVector(weights);
+            int stride = args.length > 5 ? Integer.parseInt(args[5]) : 0;
+            CandidatePruning pruning = topK > 0 ? new CandidatePruning(topK, margin) : null;
+            CoarseToFine coarseToFine = stride > 1 ? new CoarseToFine(stride, CoarseToFine.DEFAULT_HYPOTHESES) : null;
+
+            InstancesContainer instances = new VowelFeaturesReader().readData(manifestPath, Consts.SPACE, Consts.COLON_SPLITTER);
+            if (instances.getSize() == 0) return;
+
+            int numThreads = Runtime.getRuntime().availableProcessors();
+            ExecutorService pool = Executors.newFixedThreadPool(numThreads);
+            int numFiles = 0;
+            int numDiffer = 0;
+            long searched = 0;
+            long total = 0;
+            int[] onsetErrors = new int[2];
+            int[] offsetErrors = new int[2];
+            long[] nanos = new long[2];
+            try {
+                ArrayDeque<Future<Comparison>> pending = new ArrayDeque<Future<Comparison>>();
+                int next = 0;
+                while (next < instances.getSize() || !pending.isEmpty()) {
+                    while (next < instances.getSize() && pending.size() < predict_batch.IN_FLIGHT_PER_THREAD * numThreads)
+                        pending.add(pool.submit(new CompareTask(instances, next++, weights, W, featureFunctions, bounds, pruning, coarseToFine)));
+
+                    // a task that throws fails its file only, the rest of the manifest is still decoded
+                    int index = next - pending.size();
+                    Comparison comparison;
+                    try {
+                        comparison = pending.poll().get();
+                    } catch (ExecutionException e) {
+                        Logger.error("Error comparing example number: " + index + ", " + e.getCause());
+                        continue;
+                    }
+                    if (comparison == null)
+                        continue;
+                    numFiles++;
+                    searched += comparison.searched;
+                    total += comparison.total;
+                    if (!comparison.labels[0].equals(comparison.labels[1])) {
+                        numDiffer++;
+                        Logger.info("Differs: " + comparison.path + " exhaustive " + comparison.labels[0] + " fast " +
+                                comparison.labels[1] + " labeled " + comparison.actual);
+                    }
+                    for (int s = 0; s < 2; s++) {
+                        nanos[s] += comparison.nanos[s];
+                        VowelLabel predicted = VowelLabel.parse(comparison.labels[s]);
+                        if (predicted == null || comparison.actual == null)
+                            continue;
+                        if (Math.abs(predicted.start - comparison.actual.start) > train_cv.ONSET_ERROR_FRAMES)
+                            onsetErrors[s]++;
+                        if (Math.abs(predicted.end - comparison.actual.end) > train_cv.OFFSET_ERROR_FRAMES)
+                            offsetErrors[s]++;
+                    }
+                }
+            } finally {
+                pool.shutdown();
+            }
+
+            String[] names = {"Exhaustive", "Fast"};
+            Logger.info("==============================================================");
+            if (pruning != null)
+                Logger.info("Pruning: top " + topK + " rises and falls, margin " + margin + " frames");
+            if (coarseToFine != null)
+                Logger.info("Coarse to fine: stride " + stride + " frames, " + coarseToFine.numHypotheses + " hypotheses");
+            Logger.info("Total files: " + numFiles);
+            Logger.info("Files the fast label differs from the exhaustive one: " + numDiffer + " (" +
+                    String.format("%.2f", 100.0 * numDiffer / Math.max(numFiles, 1)) + "%)");
+            Logger.info("Labels the pruning keeps: " + String.format("%.2f", 100.0 * searched / Math.max(total, 1)) + "%");
+            for (int s = 0; s < 2; s++) {
+                Logger.info(names[s] + ": more than 30 ms at the onset " + onsetErrors[s] + ", more than 50 ms at the offset " +
+                        offsetErrors[s] + ", decoding " + String.format("%.1f", nanos[s] / 1e6) + " ms");
+            }
+            Logger.info("==============================================================");
+
+        } catch (Exception e) {
+            e.printStackTrace();
+        }
+    }
+
+    // the labels of a file with both searches
+    static class Comparison {
+        String path;
+        VowelLabel actual;
+        final String[] labels = new String[2];
+        final long[] nanos = new long[2];
+        long searched;
+        long total;
+    }
+
+    // reads an example and decodes it with both searches
+    //return null on error
+    static class CompareTask implements Callable<Comparison> {
+        final InstancesContainer instances;
+        final int index;
+        final double[] weights;
+        final Vector W;
+        final IFeatureFunctions featureFunctions;
+        final SearchBounds bounds;
+        final CandidatePruning pruning;
+        final CoarseToFine coarseToFine;
+
+        CompareTask(InstancesContainer instances, int index, double[] weights, Vector W,
+                    IFeatureFunctions featureFunctions,
+                    SearchBounds bounds, CandidatePruning pruning, CoarseToFine coarseToFine) {
+            this.instances = instances;
+            this.index = index;
+            this.weights = weights;
+            this.W = W;
+            this.featureFunctions = featureFunctions;
+            this.bounds = bounds;
+            this.pruning = pruning;
+            this.coarseToFine = coarseToFine;
+        }
+
+        public Comparison call() {
+            Example example = instances.getInstance(index);
+            if (example == null) {
+                Logger.error("Error reading example number: " + index);
+                return null;
+            }
+            Comparison comparison = new Comparison();
+            comparison.path = example.path;
+            comparison.actual = VowelLabel.parse(example.getLabel());
+
+            for (int s = 0; s < 2; s++) {
+                ClassifierData classifierData = new ClassifierData();
+                InferenceVowelDuration inference = s == 0 ? new InferenceVowelDuration(bounds) : new InferenceVowelDuration(bounds, pruning, coarseToFine);
+                inference.setDenseWeights(weights, W);
+                classifierData.inference = inference;
+                classifierData.taskLoss = new TaskLossVowelDuration();
+                classifierData.phi = featureFunctions;
+                long start = System.nanoTime();
+                PredictedLabels prediction = classifierData.inference.predictForTest(example, W, "", classifierData, 0);
+                comparison.nanos[s] = System.nanoTime() - start;
+                if (prediction == null || prediction.size() == 0) {
+                    Logger.error("Error predicting example: " + example.path);
+                    return null;
+                }
+                comparison.labels[s] = (String) prediction.firstKey();
+            }
+
+            // the labels of the exhaustive search and the ones the pruning keeps
+            boolean[][] candidates = pruning == null ? null : pruning.candidates(example);
+            for (int i = bounds.minGapStart; i < example.sizeOfVector - bounds.minGapEnd; i++) {
+                for (int j = i + bounds.minVowel; j < i + bounds.maxVowel && j <= example.sizeOfVector - bounds.minGapEnd; j++) {
+                    comparison.total++;
+                    if (candidates == null || (candidates[0][i + 1] && candidates[1][j + 1]))
+                        comparison.searched++;
+                }
+            }
+            return comparison;
+        }
+    }
+}
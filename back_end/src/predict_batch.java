@@ -0,0 +1,153 @@
+import com.structed.constants.Consts;
+import com.structed.dal.Reader;
+import com.structed.dal.Writer;
+import com.structed.data.InstancesContainer;
+import com.structed.data.Logger;
+import com.structed.data.entities.Example;
+import com.structed.data.entities.PredictedLabels;
+import com.structed.data.entities.Vector;
+import com.structed.data.featurefunctions.IFeatureFunctions;
+import com.structed.models.ClassifierData;
+
+import java.util.ArrayDeque;
+import java.util.ArrayList;
+import java.util.concurrent.Callable;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+
+import static com.structed.data.Factory.getWriter;
+
+/**
+ * Scores all the files of a manifest in a single JVM, the model is loaded once.
+ * Every line of the manifest is: <data file> <labels file>, the output gets one line per scored file
+ * in the same format as res/res.txt: <data file> <onset>-<offset>:<score>
+ * The files are read and decoded on a pool of threads, by default one per core, and the output is in the order of
+ * the manifest. The labels and the priors of <model>.bounds are used when it exists (SearchBounds).
+ * A positive top k searches only the labels near the top k rises and falls of the vowel evidence, within margin
+ * frames of them (CandidatePruning), by default all the labels are searched. A stride above 1 searches the labels
+ * coarse to fine, on a grid of stride frames first and then near its best labels (CoarseToFine).
+ *
+ * usage: java -cp back_end.jar predict_batch <manifest> <model> <output file> [classifier|no_classifier] [threads] [top k] [margin] [stride]
+ */
+public class predict_batch {
+    // the number of files read or decoded ahead of the output, per thread
+    static final int IN_FLIGHT_PER_THREAD = 4;
+
+    public static void main(String[] args) {
+        try{
+            if (args.length < 3) {
+                Logger.error("usage: predict_batch <manifest> <model> <output file> [classifier|no_classifier] [threads] [top k] [margin] [stride]");
+                return;
+            }
+            String manifestPath = args[0];
+            String modelPath = args[1];
+            String outputFile = args[2];
+            SearchBounds bounds = SearchBounds.forModel(modelPath);
+            IFeatureFunctions featureFunctions = new FeatureFunctionsVD(bounds);
+            if (args.length > 3 && args[3].equals("no_classifier"))
+                featureFunctions = new FeatureFunctionsVDnoClassifier(bounds);
+            int numThreads = args.length > 4 ? Integer.parseInt(args[4]) : Runtime.getRuntime().availableProcessors();
+            numThreads = Math.max(1, numThreads);
+            int topK = args.length > 5 ? Integer.parseInt(args[5]) : 0;
+            int margin = args.length > 6 ? Integer.parseInt(args[6]) : CandidatePruning.DEFAULT_MARGIN;
+            CandidatePruning pruning = topK > 0 ? new CandidatePruning(topK, margin) : null;
+            int stride = args.length > 7 ? Integer.parseInt(args[7]) : 0;
+            CoarseToFine coarseToFine = stride > 1 ? new CoarseToFine(stride, CoarseToFine.DEFAULT_HYPOTHESES) : null;
+
+            Reader reader = new VowelFeaturesReader(); // text or binary features files
+
+            // load the data, the examples themselves are read lazily one at a time
+            InstancesContainer vowelTestInstances = reader.readData(manifestPath, Consts.SPACE, Consts.COLON_SPLITTER);
+            if (vowelTestInstances.getSize() == 0) return;
+
+            // load the model once, either a model saved by StructEDModel or dense weights (convert_weights)
+            double[] weights = DenseWeights.load(modelPath);
+            Vector W = DenseWeights.toVector(weights);
+            ArrayList<Double> task_loss_params = new ArrayList<Double>(){{add(0.0);add(0.0);}}; // task loss parameters
+
+            // the inference, the feature functions and the weights are only read, the threads share them
+            ClassifierData classifierData = new ClassifierData();
+            InferenceVowelDuration inference = new InferenceVowelDuration(bounds, pruning, coarseToFine);
+            inference.setDenseWeights(weights, W);
+            classifierData.inference = inference;
+            classifierData.taskLoss = new TaskLossVowelDuration();
+            classifierData.phi = featureFunctions;
+            classifierData.arguments = task_loss_params;
+
+            // decode the examples one by one so a file that can't be read doesn't shift the results of the others,
+            // the results are written in the order of the manifest as soon as they are ready
+            Writer writer = getWriter(0);
+            writer.clearPrevResult(outputFile);
+            ExecutorService pool = Executors.newFixedThreadPool(numThreads);
+            try {
+                ArrayDeque<Future<Prediction>> pending = new ArrayDeque<Future<Prediction>>();
+                int next = 0;
+                while (next < vowelTestInstances.getSize() || !pending.isEmpty()) {
+                    // a bounded number of files in flight, so the memory doesn't grow with the manifest
+                    while (next < vowelTestInstances.getSize() && pending.size() < IN_FLIGHT_PER_THREAD * numThreads)
+                        pending.add(pool.submit(new PredictTask(vowelTestInstances, next++, W, classifierData)));
+
+                    // a task that throws fails its file only, the rest of the manifest is still decoded
+                    int index = next - pending.size();
+                    Prediction prediction;
+                    try {
+                        prediction = pending.poll().get();
+                    } catch (ExecutionException e) {
+                        Logger.error("Error predicting example number: " + index + ", " + e.getCause());
+                        continue;
+                    }
+                    if (prediction != null)
+                        writer.writeScoresFile(prediction.path, outputFile, prediction.labels, 1);
+                }
+            } finally {
+                pool.shutdown();
+            }
+
+        } catch (Exception e) {
+            e.printStackTrace();
+        }
+    }
+
+    // the predicted labels of a file
+    static class Prediction {
+        final String path;
+        final PredictedLabels labels;
+
+        Prediction(String path, PredictedLabels labels) {
+            this.path = path;
+            this.labels = labels;
+        }
+    }
+
+    // reads and decodes an example of the manifest
+    //return null on error
+    static class PredictTask implements Callable<Prediction> {
+        final InstancesContainer instances;
+        final int index;
+        final Vector W;
+        final ClassifierData classifierData;
+
+        PredictTask(InstancesContainer instances, int index, Vector W, ClassifierData classifierData) {
+            this.instances = instances;
+            this.index = index;
+            this.W = W;
+            this.classifierData = classifierData;
+        }
+
+        public Prediction call() {
+            Example example = instances.getInstance(index);
+            if (example == null) {
+                Logger.error("Error reading example number: " + index);
+                return null;
+            }
+            PredictedLabels prediction = classifierData.inference.predictForTest(example, W, "", classifierData, 0);
+            if (prediction == null || prediction.size() == 0) {
+                Logger.error("Error predicting example: " + example.path);
+                return null;
+            }
+            return new Prediction(example.path, prediction);
+        }
+    }
+}
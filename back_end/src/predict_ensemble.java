@@ -0,0 +1,137 @@
+import com.structed.constants.Consts;
+import com.structed.data.InstancesContainer;
+import com.structed.data.Logger;
+import com.structed.data.entities.Example;
+import com.structed.data.entities.PredictedLabels;
+
+import java.io.BufferedWriter;
+import java.io.FileWriter;
+import java.util.ArrayDeque;
+import java.util.Map;
+import java.util.concurrent.Callable;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+
+/**
+ * Scores all the files of a manifest with several models in one pass (EnsembleInference): every file is read once
+ * and the features of its frames are computed once for all the models with the same feature functions.
+ * The feature functions of the models are set by classifier or no_classifier before them, by default classifier.
+ * Every model uses the labels and the priors of its <model>.bounds when it exists (SearchBounds).
+ * Every line of the manifest is: <data file> <labels file>, the output gets one line per scored file:
+ * <data file> <onset>-<offset>:<score> followed by the prediction of every model in the order of the arguments,
+ * the first prediction is the argmax of the mean score of the models so the first two columns are as in res/res.txt.
+ * The files are decoded on a pool of threads, one per core, and the output is in the order of the manifest.
+ *
+ * usage: java -cp back_end.jar predict_ensemble <manifest> <output file> [classifier|no_classifier] <model> ...
+ */
+public class predict_ensemble {
+    public static void main(String[] args) {
+        try{
+            if (args.length < 3) {
+                Logger.error("usage: predict_ensemble <manifest> <output file> [classifier|no_classifier] <model> ...");
+                return;
+            }
+            String manifestPath = args[0];
+            String outputFile = args[1];
+
+            // load the models once, either models saved by StructEDModel or dense weights (convert_weights)
+            EnsembleInference ensemble = new EnsembleInference();
+            boolean noClassifier = false;
+            for (int i = 2; i < args.length; i++) {
+                if (args[i].equals("classifier"))
+                    noClassifier = false;
+                else if (args[i].equals("no_classifier"))
+                    noClassifier = true;
+                else {
+                    SearchBounds bounds = SearchBounds.forModel(args[i]);
+                    IDecomposableFeatureFunctions featureFunctions = noClassifier ?
+                            new FeatureFunctionsVDnoClassifier(bounds) : new FeatureFunctionsVD(bounds);
+                    ensemble.addModel(featureFunctions, DenseWeights.load(args[i]));
+                    Logger.info("Loaded model " + ensemble.getNumModels() + ": " + args[i]);
+                }
+            }
+            if (ensemble.getNumModels() == 0) {
+                Logger.error("No models to score with.");
+                return;
+            }
+
+            // load the data, the examples themselves are read lazily one at a time
+            InstancesContainer vowelTestInstances = new VowelFeaturesReader().readData(manifestPath, Consts.SPACE,
+                    Consts.COLON_SPLITTER);
+            if (vowelTestInstances.getSize() == 0) return;
+
+            int numThreads = Runtime.getRuntime().availableProcessors();
+            ExecutorService pool = Executors.newFixedThreadPool(numThreads);
+            BufferedWriter writer = new BufferedWriter(new FileWriter(outputFile));
+            try {
+                ArrayDeque<Future<String>> pending = new ArrayDeque<Future<String>>();
+                int next = 0;
+                while (next < vowelTestInstances.getSize() || !pending.isEmpty()) {
+                    // a bounded number of files in flight, as in predict_batch
+                    while (next < vowelTestInstances.getSize() && pending.size() < predict_batch.IN_FLIGHT_PER_THREAD * numThreads)
+                        pending.add(pool.submit(new EnsembleTask(vowelTestInstances, next++, ensemble)));
+
+                    // a task that throws fails its file only, the rest of the manifest is still decoded
+                    int index = next - pending.size();
+                    String line;
+                    try {
+                        line = pending.poll().get();
+                    } catch (ExecutionException e) {
+                        Logger.error("Error predicting example number: " + index + ", " + e.getCause());
+                        continue;
+                    }
+                    if (line != null)
+                        writer.write(line + System.getProperty("line.separator"));
+                }
+            } finally {
+                writer.close();
+                pool.shutdown();
+            }
+
+        } catch (Exception e) {
+            e.printStackTrace();
+        }
+    }
+
+    // reads an example of the manifest and returns its output line
+    //return null on error
+    static class EnsembleTask implements Callable<String> {
+        final InstancesContainer instances;
+        final int index;
+        final EnsembleInference ensemble;
+
+        EnsembleTask(InstancesContainer instances, int index, EnsembleInference ensemble) {
+            this.instances = instances;
+            this.index = index;
+            this.ensemble = ensemble;
+        }
+
+        public String call() {
+            Example example = instances.getInstance(index);
+            if (example == null) {
+                Logger.error("Error reading example number: " + index);
+                return null;
+            }
+            PredictedLabels[] predictions = ensemble.predict(example);
+            if (predictions == null) {
+                Logger.error("Error predicting example: " + example.path);
+                return null;
+            }
+
+            // the combined prediction first, then the models
+            StringBuilder line = new StringBuilder(example.path);
+            line.append(' ').append(format(predictions[predictions.length - 1]));
+            for (int m = 0; m < predictions.length - 1; m++)
+                line.append(' ').append(format(predictions[m]));
+            return line.toString();
+        }
+
+        // the label and the score, as Writer.writeScoresFile writes them
+        static String format(PredictedLabels prediction) {
+            Map.Entry<String, Double> entry = prediction.firstEntry();
+            return entry.getKey() + ":" + entry.getValue();
+        }
+    }
+}
@@ -0,0 +1,82 @@
+import com.structed.constants.Consts;
+import com.structed.data.Logger;
+import com.structed.data.entities.Example;
+import com.structed.data.entities.PredictedLabels;
+import com.structed.data.entities.Vector;
+import com.structed.data.featurefunctions.IFeatureFunctions;
+import com.structed.models.ClassifierData;
+
+import java.io.BufferedReader;
+import java.io.InputStreamReader;
+import java.util.ArrayList;
+import java.util.Map;
+
+/**
+ * Keeps the model loaded and scores files as long as the process lives.
+ * Every line read from the standard input is: <data file> <labels file>, for every line a single line is written
+ * to the standard output: RESULT <data file> <onset>-<offset>:<score> or ERROR <data file>
+ * The labels and the priors of <model>.bounds are used when it exists (SearchBounds).
+ *
+ * usage: java -cp back_end.jar predict_server <model> [classifier|no_classifier]
+ */
+public class predict_server {
+    public static void main(String[] args) {
+        try{
+            if (args.length < 1) {
+                Logger.error("usage: predict_server <model> [classifier|no_classifier]");
+                return;
+            }
+            String modelPath = args[0];
+            SearchBounds bounds = SearchBounds.forModel(modelPath);
+            IFeatureFunctions featureFunctions = new FeatureFunctionsVD(bounds);
+            if (args.length > 1 && args[1].equals("no_classifier"))
+                featureFunctions = new FeatureFunctionsVDnoClassifier(bounds);
+
+            // load the model once, either a model saved by StructEDModel or dense weights (convert_weights)
+            double[] weights = DenseWeights.load(modelPath);
+            Vector W = DenseWeights.toVector(weights);
+            ArrayList<Double> task_loss_params = new ArrayList<Double>(){{add(0.0);add(0.0);}}; // task loss parameters
+
+            ClassifierData classifierData = new ClassifierData();
+            InferenceVowelDuration inference = new InferenceVowelDuration(bounds);
+            inference.setDenseWeights(weights, W);
+            classifierData.inference = inference;
+            classifierData.taskLoss = new TaskLossVowelDuration();
+            classifierData.phi = featureFunctions;
+            classifierData.arguments = task_loss_params;
+
+            VowelFeaturesReader reader = new VowelFeaturesReader();
+            BufferedReader in = new BufferedReader(new InputStreamReader(System.in));
+            String line;
+            while ((line = in.readLine()) != null) {
+                line = line.trim();
+                if (line.isEmpty())
+                    continue;
+                String values[] = line.split(Consts.SPACE);
+                String result = "ERROR " + values[0];
+                try {
+                    ArrayList<String> paths = new ArrayList<String>();
+                    for (String value : values)
+                        paths.add(value);
+                    Example example = reader.readExample(paths);
+                    if (example != null) {
+                        example.path = values[0];
+                        PredictedLabels prediction = classifierData.inference.predictForTest(example, W, "",
+                                classifierData, 0);
+                        if (prediction != null && prediction.size() > 0) {
+                            Map.Entry entry = prediction.firstEntry();
+                            result = "RESULT " + values[0] + " " + entry.getKey() + Consts.COLON_SPLITTER + entry.getValue();
+                        }
+                    }
+                } catch (Exception e) {
+                    e.printStackTrace();
+                }
+                System.out.println(result);
+                System.out.flush();
+            }
+
+        } catch (Exception e) {
+            e.printStackTrace();
+        }
+    }
+}
@@ -10,7 +10,6 @@ import com.structed.models.algorithms.PassiveAggressive;
 
 import java.util.ArrayList;
 
-import static com.structed.data.Factory.getReader;
 import static com.structed.data.Factory.getWriter;
 
 /**
@@ -25,9 +24,8 @@ public class test {
             String testPath = "data/tutorial/test.txt";
             String model_path = "models/pa.tutorial.vowel.model";
 
-            int readerType = 2;
             int numExamples2Display = 1;
-            Reader reader = getReader(readerType);
+            Reader reader = new VowelFeaturesReader(); // text or binary features files
 
             // load the data
             InstancesContainer vowelTestInstances = reader.readData(testPath, Consts.SPACE, Consts.COLON_SPLITTER);
@@ -42,11 +40,14 @@ public class test {
             Logger.info("===================================================");
             Logger.info("============= PASSIVE AGGRESSIVE ============");
             Logger.info("");
-            W = new Vector() {{put(0, 0.0);}}; // init the first weight vector
+            double[] weights = DenseWeights.load(model_path); // a model saved by StructEDModel or dense weights
+            W = DenseWeights.toVector(weights);
+            SearchBounds bounds = SearchBounds.forModel(model_path); // the bounds saved with the model, if any
+            InferenceVowelDuration inference = new InferenceVowelDuration(bounds);
+            inference.setDenseWeights(weights, W); // the model only predicts, W is not updated
             arguments = new ArrayList<Double>() {{add(0.5);}}; // model parameters for PA: eta and lambda
             vowel_model = new StructEDModel(W, new PassiveAggressive(), new TaskLossVowelDuration(),
-                    new InferenceVowelDuration(), null, new FeatureFunctionsVD(), arguments); // create the model
-            vowel_model.loadModel(model_path);
+                    inference, null, new FeatureFunctionsVD(bounds), arguments); // create the model
             ArrayList<PredictedLabels> labels = vowel_model.predict(vowelTestInstances, task_loss_params, numExamples2Display, true); // predict
 
             String outputFile = "res/res.txt";
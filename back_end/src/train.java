@@ -29,8 +29,6 @@ import com.structed.models.algorithms.PassiveAggressive;
 import java.io.File;
 import java.util.ArrayList;
 
-import static com.structed.data.Factory.getReader;
-
 /**
  * Created by yossiadi on 03/11/2015.
  *
@@ -43,12 +41,12 @@ public class train {
             Logger.info("Loading vowel duration data.");
             String trainPath = "data/tutorial/train.txt";
             String testPath = "data/tutorial/test.txt";
+            String modelPath = "models/pa.tutorial.vowel.model";
 
             int epochNum = 1;
-            int readerType = 2;
             int isAvg = 1;
             int numExamples2Display = 1;
-            Reader reader = getReader(readerType);
+            Reader reader = new VowelFeaturesReader(); // text or binary features files
 
             // load the data
             InstancesContainer vowelTrainInstances = reader.readData(trainPath, Consts.SPACE, Consts.COLON_SPLITTER);
@@ -70,17 +68,21 @@ public class train {
             Logger.info("============= PASSIVE AGGRESSIVE ============");
             Logger.info("");
 
+            // the labels of <model>.bounds (utils/search_bounds.py) are searched when it exists, as in train_parallel
+            SearchBounds bounds = SearchBounds.forModel(modelPath);
+
             // ======= PA ====== //
             W = new Vector() {{put(0, 0.0);}}; // init the first weight vector
             arguments = new ArrayList<Double>() {{
                 add(0.5);}}; // model parameters for PA: only C
             vowel_model = new StructEDModel(W, new PassiveAggressive(), new TaskLossVowelDuration(),
-                    new InferenceVowelDuration(), null, new FeatureFunctionsVD(), arguments); // create the model
+                    new InferenceVowelDuration(bounds), null, new FeatureFunctionsVD(bounds), arguments); // create the model
             vowel_model.train(vowelTrainInstances, task_loss_params, null, epochNum, isAvg, true); // train
             vowel_model.predict(vowelTestInstances, task_loss_params, numExamples2Display, true); // predict
 
-            // save the model
-            vowel_model.saveModel("models/pa.tutorial.vowel.model");
+            // save the model and the bounds it was trained with
+            vowel_model.saveModel(modelPath);
+            bounds.save(modelPath + SearchBounds.EXTENSION);
         } catch (Exception e) {
             e.printStackTrace();
         }
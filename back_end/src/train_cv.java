@@ -0,0 +1,245 @@
+import com.structed.constants.Consts;
+import com.structed.data.InstancesContainer;
+import com.structed.data.Logger;
+import com.structed.data.entities.Example;
+import com.structed.data.entities.PredictedLabels;
+import com.structed.data.entities.Vector;
+import com.structed.data.featurefunctions.IFeatureFunctions;
+import com.structed.models.ClassifierData;
+import com.structed.models.StructEDModel;
+import com.structed.models.algorithms.DirectLoss;
+import com.structed.models.algorithms.IUpdateRule;
+import com.structed.models.algorithms.PassiveAggressive;
+
+import java.io.File;
+import java.io.FileWriter;
+import java.io.IOException;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.concurrent.Callable;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+
+/**
+ * K-fold cross validation in a single JVM: the examples of the manifest are read once and shared by all the folds,
+ * the folds are trained and evaluated concurrently on a thread pool and the average of the fold models is saved.
+ * The manifest is the output of utils/sum_files.py, fold k holds the k-th contiguous block of its lines.
+ * Writes <output prefix>_fold_NN.weights and <output prefix>_fold_NN.log for every fold and <output prefix>_avg.weights
+ * The folds search the labels of <output prefix>.bounds (utils/search_bounds.py) when it exists, and every model is saved
+ * with a copy of the bounds it was trained with.
+ *
+ * usage: java -cp back_end.jar train_cv <manifest> <output prefix> [folds] [epochs] [pa|dl] [classifier|no_classifier] [threads]
+ */
+public class train_cv {
+    // the errors the evaluation counts, the frames are 5 ms
+    static final int ONSET_ERROR_FRAMES = 6; // 30 ms
+    static final int OFFSET_ERROR_FRAMES = 10; // 50 ms
+
+    public static void main(String[] args) {
+        try{
+            if (args.length < 2) {
+                Logger.error("usage: train_cv <manifest> <output prefix> [folds] [epochs] [pa|dl] [classifier|no_classifier] [threads]");
+                return;
+            }
+            String manifestPath = args[0];
+            String outputPrefix = args[1];
+            int numFolds = args.length > 2 ? Integer.parseInt(args[2]) : 10;
+            int epochNum = args.length > 3 ? Integer.parseInt(args[3]) : 5;
+            String algorithm = args.length > 4 ? args[4] : "dl";
+            boolean noClassifier = args.length > 5 && args[5].equals("no_classifier");
+            int numThreads = args.length > 6 ? Integer.parseInt(args[6]) : Runtime.getRuntime().availableProcessors();
+            ArrayList<Double> task_loss_params = new ArrayList<Double>(){{add(1.0);add(2.0);}}; // task loss parameters
+
+            SearchBounds bounds = SearchBounds.forModel(outputPrefix);
+
+            ExecutorService pool = Executors.newFixedThreadPool(Math.max(1, numThreads));
+            try {
+                // load the data once, the folds share the examples
+                Logger.info("Loading vowel duration data.");
+                ArrayList<Example> examples = loadExamples(manifestPath, pool);
+                if (examples.size() < numFolds) {
+                    Logger.error("The manifest has " + examples.size() + " examples, less than " + numFolds + " folds");
+                    return;
+                }
+                File outputDir = new File(outputPrefix).getAbsoluteFile().getParentFile();
+                if (outputDir != null && !outputDir.exists())
+                    outputDir.mkdirs();
+
+                // train and evaluate the folds
+                Logger.info("Training " + numFolds + " folds on " + examples.size() + " examples.");
+                ArrayList<Future<Vector>> folds = new ArrayList<Future<Vector>>();
+                for (int fold = 0; fold < numFolds; fold++)
+                    folds.add(pool.submit(new FoldTask(examples, fold, numFolds, epochNum, algorithm, noClassifier,
+                            bounds, task_loss_params, outputPrefix)));
+
+                // average the fold models
+                ArrayList<double[]> weights = new ArrayList<double[]>();
+                for (Future<Vector> fold : folds)
+                    weights.add(DenseWeights.fromVector(fold.get()));
+                String avgPath = outputPrefix + "_avg.weights";
+                DenseWeights.saveVector(DenseWeights.toVector(average(weights)), avgPath);
+                bounds.save(avgPath + SearchBounds.EXTENSION);
+                Logger.info("Saved the average model: " + avgPath);
+            } finally {
+                pool.shutdown();
+            }
+
+        } catch (Exception e) {
+            e.printStackTrace();
+        }
+    }
+
+    // reads all the examples of the manifest on the pool, the examples that can't be read are skipped
+    static ArrayList<Example> loadExamples(String manifestPath, ExecutorService pool) throws Exception {
+        final InstancesContainer instances = new VowelFeaturesReader().readData(manifestPath, Consts.SPACE,
+                Consts.COLON_SPLITTER);
+        ArrayList<Future<Example>> futures = new ArrayList<Future<Example>>();
+        for (int i = 0; i < instances.getSize(); i++) {
+            final int index = i;
+            futures.add(pool.submit(new Callable<Example>() {
+                public Example call() {
+                    return instances.getInstance(index);
+                }
+            }));
+        }
+
+        ArrayList<Example> examples = new ArrayList<Example>();
+        for (int i = 0; i < futures.size(); i++) {
+            Example example = futures.get(i).get();
+            if (example == null)
+                Logger.error("Error reading example number: " + i);
+            else
+                examples.add(example);
+        }
+        return examples;
+    }
+
+    static double[] average(List<double[]> weights) {
+        int size = 0;
+        for (double[] w : weights)
+            size = Math.max(size, w.length);
+        double[] avg = new double[size];
+        for (double[] w : weights)
+            for (int i = 0; i < w.length; i++)
+                avg[i] += w[i];
+        for (int i = 0; i < size; i++)
+            avg[i] /= weights.size();
+        return avg;
+    }
+
+    // trains the model of a fold on the other folds, saves it and evaluates it on the fold
+    static class FoldTask implements Callable<Vector> {
+        final ArrayList<Example> examples;
+        final int fold;
+        final int numFolds;
+        final int epochNum;
+        final String algorithm;
+        final boolean noClassifier;
+        final SearchBounds bounds;
+        final ArrayList<Double> taskLossParams;
+        final String outputPrefix;
+
+        FoldTask(ArrayList<Example> examples, int fold, int numFolds, int epochNum, String algorithm,
+                 boolean noClassifier, SearchBounds bounds, ArrayList<Double> taskLossParams, String outputPrefix) {
+            this.examples = examples;
+            this.fold = fold;
+            this.numFolds = numFolds;
+            this.epochNum = epochNum;
+            this.algorithm = algorithm;
+            this.noClassifier = noClassifier;
+            this.bounds = bounds;
+            this.taskLossParams = taskLossParams;
+            this.outputPrefix = outputPrefix;
+        }
+
+        public Vector call() throws Exception {
+            // the fold is a contiguous block of the examples, every fold has its own lists so it can shuffle them
+            int start = fold * examples.size() / numFolds;
+            int end = (fold + 1) * examples.size() / numFolds;
+            ArrayList<Example> trainExamples = new ArrayList<Example>(examples.subList(0, start));
+            trainExamples.addAll(examples.subList(end, examples.size()));
+            ArrayList<Example> testExamples = new ArrayList<Example>(examples.subList(start, end));
+            InstancesContainer trainInstances = new InstancesContainer();
+            trainInstances.setInstances(trainExamples);
+
+            // every fold has its own model, the feature functions, inference and task loss hold no state
+            IFeatureFunctions featureFunctions = noClassifier ? new FeatureFunctionsVDnoClassifier(bounds) : new FeatureFunctionsVD(bounds);
+            IUpdateRule updateRule;
+            ArrayList<Double> arguments;
+            if (algorithm.equals("pa")) {
+                updateRule = new PassiveAggressive();
+                arguments = new ArrayList<Double>() {{add(0.5);}}; // model parameters for PA: only C
+            } else {
+                updateRule = new DirectLoss();
+                arguments = new ArrayList<Double>() {{add(0.01);add(-2.45);}}; // model parameters for DL: eta and epsilon
+            }
+            Vector W = new Vector() {{put(0, 0.0);}}; // init the first weight vector
+            StructEDModel vowel_model = new StructEDModel(W, updateRule, new TaskLossVowelDuration(),
+                    new InferenceVowelDuration(bounds), null, featureFunctions, arguments); // create the model
+            vowel_model.train(trainInstances, taskLossParams, null, epochNum, 1, false); // train
+
+            String foldName = String.format("%s_fold_%02d", outputPrefix, fold + 1);
+            vowel_model.saveModel(foldName + ".weights");
+            bounds.save(foldName + ".weights" + SearchBounds.EXTENSION);
+            evaluate(vowel_model.getWeights(), featureFunctions, testExamples, foldName + ".log");
+            Logger.info("Fold " + (fold + 1) + " done: " + foldName + ".weights");
+            return vowel_model.getWeights();
+        }
+
+        // predicts the examples of the fold and writes the errors in the format of the logs of back_end/log
+        void evaluate(Vector W, IFeatureFunctions featureFunctions, List<Example> testExamples, String logPath) throws IOException {
+            ClassifierData classifierData = new ClassifierData();
+            classifierData.inference = new InferenceVowelDuration(bounds);
+            classifierData.taskLoss = new TaskLossVowelDuration();
+            classifierData.phi = featureFunctions;
+            classifierData.arguments = taskLossParams;
+            TaskLossVowelDuration taskLoss = new TaskLossVowelDuration();
+
+            int numPredicted = 0;
+            int onsetErrors = 0;
+            int offsetErrors = 0;
+            double onsetLoss = 0;
+            double offsetLoss = 0;
+            double cumulativeLoss = 0;
+            for (Example example : testExamples) {
+                PredictedLabels prediction = classifierData.inference.predictForTest(example, W, "", classifierData, 0);
+                if (prediction == null || prediction.size() == 0) {
+                    Logger.error("Error predicting example: " + example.path);
+                    continue;
+                }
+                VowelLabel predicted = VowelLabel.parse((String) prediction.firstKey());
+                VowelLabel actual = VowelLabel.parse(example.getLabel());
+                if (predicted == null || actual == null)
+                    continue;
+
+                int onsetDiff = Math.abs(predicted.start - actual.start);
+                int offsetDiff = Math.abs(predicted.end - actual.end);
+                numPredicted++;
+                if (onsetDiff > ONSET_ERROR_FRAMES)
+                    onsetErrors++;
+                if (offsetDiff > OFFSET_ERROR_FRAMES)
+                    offsetErrors++;
+                onsetLoss += onsetDiff;
+                offsetLoss += offsetDiff;
+                cumulativeLoss += taskLoss.computeTaskLoss(predicted.start, predicted.end, actual.start, actual.end,
+                        taskLossParams);
+            }
+
+            int total = Math.max(numPredicted, 1);
+            FileWriter writer = new FileWriter(logPath);
+            try {
+                writer.write("==============================================================\n");
+                writer.write("Total files predicted: " + numPredicted + "\n");
+                writer.write("Total files that have more then 30 ms difference at the onset: " + onsetErrors + "\n");
+                writer.write("Total files that have more then 50 ms difference at the offset: " + offsetErrors + "\n");
+                writer.write("Cumulative onset loss: " + onsetLoss / total + "\n");
+                writer.write("Cumulative offset loss: " + offsetLoss / total + "\n");
+                writer.write("Cumulative task loss: " + cumulativeLoss / total + "\n");
+                writer.write("==============================================================");
+            } finally {
+                writer.close();
+            }
+        }
+    }
+}
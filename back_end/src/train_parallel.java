@@ -0,0 +1,199 @@
+import com.structed.data.Logger;
+import com.structed.data.entities.Example;
+import com.structed.data.entities.Vector;
+import com.structed.data.featurefunctions.IFeatureFunctions;
+import com.structed.models.ClassifierData;
+import com.structed.models.algorithms.PassiveAggressive;
+
+import java.io.File;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Collections;
+import java.util.Comparator;
+import java.util.List;
+import java.util.Random;
+import java.util.concurrent.Callable;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+
+/**
+ * Trains a PA model on several cores with iterative parameter mixing: every epoch the shuffled examples are split
+ * into a shard per worker, the workers run the PA updates on their shards starting from the same weights and at every
+ * sync point the weights of the workers are mixed (averaged, weighted by the number of examples they processed) and
+ * given back to all of them. The saved model is the average of the mixed weights over the sync points, as the
+ * averaged model of StructEDModel.train.
+ * The sync point is a number of examples per worker, 0 mixes once at the end of every epoch.
+ * The manifest is the output of utils/sum_files.py. The labels of <output model>.bounds (utils/search_bounds.py) are
+ * searched when it exists, the bounds are saved with the model either way.
+ *
+ * usage: java -cp back_end.jar train_parallel <manifest> <output model> [epochs] [workers] [sync] [classifier|no_classifier]
+ */
+public class train_parallel {
+    static final long SEED = 1234;
+
+    public static void main(String[] args) {
+        try{
+            if (args.length < 2) {
+                Logger.error("usage: train_parallel <manifest> <output model> [epochs] [workers] [sync] [classifier|no_classifier]");
+                return;
+            }
+            String manifestPath = args[0];
+            String outputPath = args[1];
+            int epochNum = args.length > 2 ? Integer.parseInt(args[2]) : 5;
+            int numWorkers = args.length > 3 ? Integer.parseInt(args[3]) : Runtime.getRuntime().availableProcessors();
+            int syncSize = args.length > 4 ? Integer.parseInt(args[4]) : 0;
+            boolean noClassifier = args.length > 5 && args[5].equals("no_classifier");
+            ArrayList<Double> task_loss_params = new ArrayList<Double>(){{add(1.0);add(2.0);}}; // task loss parameters
+            numWorkers = Math.max(1, numWorkers);
+            SearchBounds bounds = SearchBounds.forModel(outputPath);
+
+            ExecutorService pool = Executors.newFixedThreadPool(numWorkers);
+            try {
+                Logger.info("Loading vowel duration data.");
+                ArrayList<Example> examples = train_cv.loadExamples(manifestPath, pool);
+                if (examples.size() == 0) {
+                    Logger.error("No examples to train on: " + manifestPath);
+                    return;
+                }
+                File outputDir = new File(outputPath).getAbsoluteFile().getParentFile();
+                if (outputDir != null && !outputDir.exists())
+                    outputDir.mkdirs();
+
+                // every worker keeps its update rule and classifier data for the whole training
+                ArrayList<Worker> workers = new ArrayList<Worker>();
+                for (int i = 0; i < numWorkers; i++)
+                    workers.add(new Worker(noClassifier ? new FeatureFunctionsVDnoClassifier(bounds) : new FeatureFunctionsVD(bounds),
+                            bounds, task_loss_params));
+
+                Vector W = new Vector() {{put(0, 0.0);}}; // init the first weight vector
+                double[] sumWeights = new double[0];
+                long sumExamples = 0;
+                Random random = new Random(SEED);
+                for (int epoch = 0; epoch < epochNum; epoch++) {
+                    Logger.info("Epoch " + (epoch + 1) + " of " + epochNum + ", " + numWorkers + " workers.");
+                    ArrayList<Example> shuffled = new ArrayList<Example>(examples);
+                    Collections.shuffle(shuffled, random);
+                    ArrayList<List<Example>> shards = shard(shuffled, numWorkers);
+                    int shardSize = shards.get(0).size();
+                    int roundSize = syncSize > 0 ? syncSize : shardSize;
+
+                    for (int start = 0; start < shardSize; start += roundSize) {
+                        // every worker runs over its part of the round from the mixed weights
+                        ArrayList<Future<Vector>> results = new ArrayList<Future<Vector>>();
+                        ArrayList<Integer> counts = new ArrayList<Integer>();
+                        for (int i = 0; i < numWorkers; i++) {
+                            List<Example> shard = shards.get(i);
+                            int end = Math.min(start + roundSize, shard.size());
+                            if (start >= end)
+                                continue;
+                            results.add(pool.submit(workers.get(i).round(W, shard.subList(start, end))));
+                            counts.add(end - start);
+                        }
+
+                        // mix the weights of the workers
+                        ArrayList<double[]> weights = new ArrayList<double[]>();
+                        for (Future<Vector> result : results) {
+                            Vector workerW = result.get();
+                            if (workerW == null) {
+                                Logger.error("Error training, the update of a worker failed.");
+                                return;
+                            }
+                            weights.add(DenseWeights.fromVector(workerW));
+                        }
+                        double[] mixed = mix(weights, counts);
+                        W = DenseWeights.toVector(mixed);
+
+                        // the averaged model, every example counts the weights after its round
+                        int roundExamples = 0;
+                        for (int count : counts)
+                            roundExamples += count;
+                        if (sumWeights.length < mixed.length)
+                            sumWeights = Arrays.copyOf(sumWeights, mixed.length);
+                        for (int i = 0; i < mixed.length; i++)
+                            sumWeights[i] += roundExamples * mixed[i];
+                        sumExamples += roundExamples;
+                    }
+                }
+
+                for (int i = 0; i < sumWeights.length; i++)
+                    sumWeights[i] /= sumExamples;
+                DenseWeights.saveVector(DenseWeights.toVector(sumWeights), outputPath);
+                bounds.save(outputPath + SearchBounds.EXTENSION);
+                Logger.info("Saved the model: " + outputPath);
+            } finally {
+                pool.shutdown();
+            }
+
+        } catch (Exception e) {
+            e.printStackTrace();
+        }
+    }
+
+    // splits the examples into numShards contiguous shards, their sizes differ by one example at most
+    static ArrayList<List<Example>> shard(List<Example> examples, int numShards) {
+        ArrayList<List<Example>> shards = new ArrayList<List<Example>>();
+        for (int i = 0; i < numShards; i++) {
+            int start = i * examples.size() / numShards;
+            int end = (i + 1) * examples.size() / numShards;
+            shards.add(examples.subList(start, end));
+        }
+        // the first shard is the largest so it bounds the rounds of the epoch
+        Collections.sort(shards, new Comparator<List<Example>>() {
+            public int compare(List<Example> a, List<Example> b) {
+                return b.size() - a.size();
+            }
+        });
+        return shards;
+    }
+
+    // the average of the weights, weighted by the number of examples behind every one of them
+    static double[] mix(List<double[]> weights, List<Integer> counts) {
+        int size = 0;
+        for (double[] w : weights)
+            size = Math.max(size, w.length);
+        double[] mixed = new double[size];
+        double total = 0;
+        for (int k = 0; k < weights.size(); k++) {
+            double[] w = weights.get(k);
+            for (int i = 0; i < w.length; i++)
+                mixed[i] += counts.get(k) * w[i];
+            total += counts.get(k);
+        }
+        for (int i = 0; i < size; i++)
+            mixed[i] /= total;
+        return mixed;
+    }
+
+    // runs the PA updates of one worker, the same updates Classifier.train does for every example
+    static class Worker {
+        final ClassifierData classifierData = new ClassifierData();
+
+        Worker(IFeatureFunctions featureFunctions, SearchBounds bounds, ArrayList<Double> taskLossParams) {
+            PassiveAggressive updateRule = new PassiveAggressive();
+            updateRule.init(new ArrayList<Double>() {{add(0.5);}}); // model parameters for PA: only C
+            classifierData.updateRule = updateRule;
+            classifierData.taskLoss = new TaskLossVowelDuration();
+            classifierData.inference = new InferenceVowelDuration(bounds);
+            classifierData.phi = featureFunctions;
+            classifierData.arguments = taskLossParams;
+        }
+
+        // the task of a round: the weights after the updates of the examples, starting from a copy of W
+        //return null on error
+        Callable<Vector> round(final Vector W, final List<Example> examples) {
+            return new Callable<Vector>() {
+                public Vector call() {
+                    Vector localW = new Vector(W);
+                    for (Example example : examples) {
+                        classifierData.iteration++;
+                        localW = classifierData.updateRule.update(localW, example, classifierData);
+                        if (localW == null)
+                            return null;
+                    }
+                    return localW;
+                }
+            };
+        }
+    }
+}
@@ -0,0 +1,327 @@
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import argparse
+import platform
+import tempfile
+from subprocess import Popen, PIPE
+import numpy as np
+
+import predict
+import front_end.feature_cache as feature_cache
+import front_end.profiler as profiler
+import utils.run_back_end as model
+
+__author__ = 'yossiadi'
+
+# the bundled inputs
+example_wav = os.path.join(predict.root_dir, "data/wav/ex.wav")
+tutorial_features_dir = os.path.join(predict.root_dir, "back_end/data/tutorial/feat")
+# the metrics compared between two runs, for each one whether higher is better
+compared_metrics = [("files_per_s", True), ("p50_s", False), ("p90_s", False), ("p99_s", False)]
+# the parts of the pipeline that can be measured: the full pipeline with and without the phoneme classifier, the java
+# back end (a JVM per file and a JVM per batch) and its numpy port. on linux the binaries of the classifier don't run,
+# predict_no_classifier and back_end_native measure the pipeline there
+predict_sections = ["predict", "predict_no_classifier"]
+all_sections = predict_sections + ["back_end", "back_end_native"]
+default_sections = ["predict", "back_end"]
+
+
+def get_revision():
+    try:
+        process = Popen(["git", "rev-parse", "--short", "HEAD"], cwd=predict.root_dir, stdout=PIPE, stderr=PIPE)
+        revision = process.communicate()[0].strip()
+        return revision if process.returncode == 0 else "unknown"
+    except OSError:
+        return "unknown"
+
+
+# writes a wav file of the given duration by repeating the samples of the example file
+def make_synthetic_wav(path, duration):
+    example = wave.open(example_wav, 'rb')
+    params = example.getparams()
+    frames = example.readframes(example.getnframes())
+    example.close()
+
+    frame_size = params[0] * params[1]
+    total_size = int(duration * params[2]) * frame_size
+    data = (frames * (total_size / len(frames) + 1))[:total_size]
+    out = wave.open(path, 'wb')
+    out.setnchannels(params[0])
+    out.setsampwidth(params[1])
+    out.setframerate(params[2])
+    out.writeframes(data)
+    out.close()
+
+
+def get_wav_duration(path):
+    wav_file = wave.open(path, 'rb')
+    duration = wav_file.getnframes() / float(wav_file.getframerate())
+    wav_file.close()
+    return duration
+
+
+# files/sec and latency percentiles of a list of latencies
+def summarize(latencies, total_s, failures=0):
+    latencies = np.array(latencies, dtype=float)
+    return {"files": len(latencies), "failures": failures, "total_s": total_s,
+            "files_per_s": len(latencies) / total_s if total_s > 0 else 0.0,
+            "mean_s": float(np.mean(latencies)), "p50_s": float(np.percentile(latencies, 50)),
+            "p90_s": float(np.percentile(latencies, 90)), "p99_s": float(np.percentile(latencies, 99))}
+
+
+# the latency as a linear function of the duration: seconds of processing per second of audio and a fixed cost
+def fit_scaling(durations, latencies):
+    if len(set(durations)) < 2:
+        return {"s_per_audio_s": None, "fixed_s": None}
+    slope, intercept = np.polyfit(durations, latencies, 1)
+    return {"s_per_audio_s": float(slope), "fixed_s": float(intercept)}
+
+
+# the full pipeline (predict.py) on every wav file, every stage is profiled
+# native: decode with the numpy port of the back end, classifier: when False the phoneme classifier is skipped and
+# the no classifier model predicts, its stages are recorded under no_classifier/<stage>
+def bench_predict(wav_files, repeat, scratch_dir, native=False, classifier=True):
+    latencies = list()
+    durations = list()
+    records = list()
+    failures = 0
+    out_file = os.path.join(scratch_dir, "out.TextGrid")
+    start = time.time()
+    for i in range(repeat):
+        for wav_file in wav_files:
+            duration = get_wav_duration(wav_file)
+            profiler.start(os.path.basename(wav_file))
+            file_start = time.time()
+            if not predict.main(wav_file, out_file, scratch_dir, native, classifier):
+                failures += 1
+            latencies.append(time.time() - file_start)
+            durations.append(duration)
+            for record in profiler.stop().records:
+                record["duration_s"] = duration
+                if not classifier:
+                    record["stage"] = "no_classifier/" + record["stage"]
+                records.append(record)
+    result = summarize(latencies, time.time() - start, failures)
+    result["scaling"] = fit_scaling(durations, latencies)
+
+    # the latency of every duration
+    result["by_duration"] = dict()
+    for duration in sorted(set(durations)):
+        duration_latencies = [l for d, l in zip(durations, latencies) if d == duration]
+        result["by_duration"]["%.2f" % duration] = float(np.mean(duration_latencies))
+    return result, records
+
+
+# the mean time of every stage and how it scales with the duration
+def summarize_stages(records):
+    stages = dict()
+    for record in records:
+        stages.setdefault(record["stage"], list()).append(record)
+    result = dict()
+    for name, stage_records in stages.items():
+        walls = [r["wall_s"] for r in stage_records]
+        result[name] = {"count": len(walls), "mean_s": float(np.mean(walls)),
+                        "cpu_mean_s": float(np.mean([r["user_s"] + r["sys_s"] for r in stage_records])),
+                        "max_rss_kb": max(r["max_rss_kb"] for r in stage_records)}
+        result[name].update(fit_scaling([r["duration_s"] for r in stage_records], walls))
+    return result
+
+
+# scores a data file with one of the back ends of run_back_end, returns False when the back end failed: it raised
+# (the per file JVM raises IOError when it wrote no result) or wrote no labels file
+def score_file(score, data_file, labels_file, *args):
+    if os.path.exists(labels_file):
+        os.remove(labels_file)
+    try:
+        score(data_file, labels_file, *args)
+    except (IOError, OSError) as e:
+        print >> sys.stderr, "could not score %s: %s" % (data_file, e)
+        return False
+    return os.path.exists(labels_file) and os.path.getsize(labels_file) > 0
+
+
+# the back end alone on the bundled feature files, a JVM per file
+def bench_back_end_per_file(data_files, repeat, scratch_dir):
+    labels_file = os.path.join(scratch_dir, "tmp.labels")
+    latencies = list()
+    failures = 0
+    start = time.time()
+    for i in range(repeat):
+        for data_file in data_files:
+            file_start = time.time()
+            if not score_file(model.main, data_file, labels_file, scratch_dir):
+                failures += 1
+            latencies.append(time.time() - file_start)
+    return summarize(latencies, time.time() - start, failures)
+
+
+# the numpy port of the back end on the bundled feature files, in this process
+def bench_back_end_native(data_files, repeat, scratch_dir):
+    labels_file = os.path.join(scratch_dir, "tmp.labels")
+    latencies = list()
+    failures = 0
+    start = time.time()
+    for i in range(repeat):
+        for data_file in data_files:
+            file_start = time.time()
+            if not score_file(model.main_native, data_file, labels_file):
+                failures += 1
+            latencies.append(time.time() - file_start)
+    return summarize(latencies, time.time() - start, failures)
+
+
+# the back end alone on the bundled feature files, in a single JVM per batch
+def bench_back_end_batch(data_files, repeat, scratch_dir):
+    labels_files = [os.path.join(scratch_dir, "%d.labels" % i) for i in range(len(data_files))]
+    latencies = list()
+    failures = 0
+    start = time.time()
+    for i in range(repeat):
+        batch_start = time.time()
+        failures += len(model.main_batch(data_files, labels_files, scratch_dir))
+        # every file of the batch waits for the whole batch
+        latencies += [time.time() - batch_start] * len(data_files)
+    return summarize(latencies, time.time() - start, failures)
+
+
+def print_section(name, result):
+    print "%-20s %6d files %4d failed %8.3f files/s   p50 %.3fs  p90 %.3fs  p99 %.3fs" % (
+        name, result["files"], result["failures"], result["files_per_s"], result["p50_s"], result["p90_s"],
+        result["p99_s"])
+
+
+def print_results(results):
+    print ""
+    print "revision %s, %s" % (results["revision"], results["date"])
+    for name in sorted(results["sections"]):
+        print_section(name, results["sections"][name])
+    for name in predict_sections:
+        if name not in results["sections"]:
+            continue
+        section = results["sections"][name]
+        print ""
+        print "%s latency by duration: " % name + ", ".join("%ss: %.3fs" % (d, section["by_duration"][d])
+                                                          for d in sorted(section["by_duration"], key=float))
+        if section["scaling"]["s_per_audio_s"] is not None:
+            print "%s scaling: %.3fs per second of audio + %.3fs fixed" % (name, section["scaling"]["s_per_audio_s"],
+                                                                         section["scaling"]["fixed_s"])
+    for name in sorted(results["errors"]):
+        print "%-20s FAILED: %s" % (name, results["errors"][name])
+    if results["stages"]:
+        print ""
+        print "%-36s %10s %10s %14s %12s" % ("stage", "mean_s", "cpu_s", "s_per_audio_s", "max_rss_kb")
+        for name in sorted(results["stages"], key=lambda n: -results["stages"][n]["mean_s"]):
+            stage = results["stages"][name]
+            slope = stage["s_per_audio_s"]
+            print "%-36s %10.3f %10.3f %14s %12d" % (name, stage["mean_s"], stage["cpu_mean_s"],
+                                                     "-" if slope is None else "%.4f" % slope, stage["max_rss_kb"])
+
+
+# prints the change of every metric against a previous run, returns the regressions above the tolerance
+def compare(results, previous, tolerance):
+    print ""
+    print "compared to revision %s, %s" % (previous["revision"], previous["date"])
+    regressions = list()
+    for name in sorted(results["sections"]):
+        if name not in previous["sections"]:
+            continue
+        for metric, higher_is_better in compared_metrics:
+            old = previous["sections"][name][metric]
+            new = results["sections"][name][metric]
+            if old == 0:
+                continue
+            change = (new - old) / old
+            is_regression = -change > tolerance if higher_is_better else change > tolerance
+            print "%-20s %-12s %10.3f -> %10.3f %+7.1f%%%s" % (name, metric, old, new, 100 * change,
+                                                               "  REGRESSION" if is_regression else "")
+            if is_regression:
+                regressions.append((name, metric))
+    return regressions
+
+
+# durations: the lengths in seconds of the synthetic wav files
+# sections: which of all_sections to run, a section that fails is reported and the others are still run and saved
+# use_cache: keep the feature cache on, by default every file runs through the whole front end
+# native: the predict sections decode with the numpy port of the back end instead of the JVM
+def main(durations, repeat, output, previous=None, tolerance=0.1, sections=default_sections, use_cache=False,
+         native=False):
+    if not use_cache:
+        feature_cache.cache_size_mb = 0
+
+    scratch_dir = tempfile.mkdtemp(prefix="benchmark_")
+    results = {"revision": get_revision(), "date": time.strftime("%Y-%m-%d %H:%M:%S"), "host": platform.node(),
+               "config": {"durations": list(durations), "repeat": repeat, "use_cache": use_cache,
+                          "native": native},
+               "sections": dict(), "stages": dict(), "errors": dict()}
+    try:
+        records = list()
+        wav_files = [example_wav]
+        for duration in durations:
+            wav_file = os.path.join(scratch_dir, "synthetic_%.2f.wav" % duration)
+            make_synthetic_wav(wav_file, duration)
+            wav_files.append(wav_file)
+        data_files = sorted(os.path.join(tutorial_features_dir, f) for f in os.listdir(tutorial_features_dir)
+                            if f.endswith(".data"))
+
+        for name in [name for name in all_sections if name in sections]:
+            try:
+                if name in predict_sections:
+                    results["sections"][name], section_records = bench_predict(
+                        wav_files, repeat, scratch_dir, native, name == "predict")
+                    records += section_records
+                elif name == "back_end":
+                    results["sections"]["back_end"] = bench_back_end_per_file(data_files, repeat, scratch_dir)
+                    results["sections"]["back_end_batch"] = bench_back_end_batch(data_files, repeat, scratch_dir)
+                else:
+                    results["sections"][name] = bench_back_end_native(data_files, repeat, scratch_dir)
+            except Exception as e:
+                print >> sys.stderr, "the %s section failed: %s" % (name, e)
+                results["errors"][name] = str(e)
+        results["stages"] = summarize_stages(records)
+    finally:
+        shutil.rmtree(scratch_dir)
+
+    print_results(results)
+    output_dir = os.path.dirname(os.path.abspath(output))
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    fid = open(output, 'w')
+    json.dump(results, fid, indent=1, sort_keys=True)
+    fid.close()
+    print ""
+    print "results saved to " + output
+
+    if previous is not None:
+        fid = open(previous)
+        regressions = compare(results, json.load(fid), tolerance)
+        fid.close()
+        return len(regressions) == 0
+    return True
+
+if __name__ == "__main__":
+    # -------------MENU-------------- #
+    # command line arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--durations", type=float, nargs="+", default=[0.5, 1, 2, 4, 8],
+                        help="The durations in seconds of the synthetic wav files (the example file is repeated)")
+    parser.add_argument("--repeat", type=int, default=3, help="The number of times every input is scored")
+    parser.add_argument("--sections", nargs="+", default=default_sections, choices=all_sections,
+                        help="The parts of the pipeline to measure")
+    parser.add_argument("--native", action="store_true",
+                        help="Decode the predict sections with the numpy port of the back end instead of the JVM")
+    parser.add_argument("--output", default=os.path.join("benchmarks", time.strftime("%Y%m%d_%H%M%S") + ".json"),
+                        help="The results file")
+    parser.add_argument("--compare", default=None, help="The results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="The relative change that counts as a regression when comparing")
+    parser.add_argument("--use_cache", action="store_true", help="Read the features from the feature cache")
+    args = parser.parse_args()
+
+    # main function
+    if not main(args.durations, args.repeat, args.output, args.compare, args.tolerance, args.sections,
+                args.use_cache, args.native):
+        sys.exit(1)
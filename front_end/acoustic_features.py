@@ -0,0 +1,197 @@
+# coding=utf-8
+# !/usr/bin/env python
+
+import sys
+import argparse
+import numpy as np
+import audio
+
+__author__ = 'yossiadi'
+
+# computes the first nine acoustic features of the front end in numpy, frame by frame at a 5 ms hop:
+# short term energy, total energy, low energy, high energy, wiener entropy, auto correlation, pitch, voicing and
+# zero crossing. all the frames are computed together as matrices (the pitch in blocks of frames to bound the
+# memory), so no process is started per file. the output has the layout of bin/VowelDurationFrontEnd: a header line
+# and a row of normalized features per frame.
+
+# consts
+sample_rate = 16000
+frame_hop = 80  # 5 ms
+# every frame is analyzed on the 10 ms that start at it
+window_size = 160
+fft_size = 256
+low_band = (0.0, 300.0)
+high_band = (3000.0, 8000.0)
+# the lag of the auto correlation feature, in samples
+auto_correlation_lag = 2
+# the pitch is the peak of the normalized auto correlation of a 40 ms window in the 60-400 Hz lag range, computed
+# on the signal decimated to 8khz. the frame is voiced when the peak is above the threshold, the pitch of unvoiced
+# frames is zero
+pitch_window = 640
+pitch_decimation = 2
+pitch_filter_size = 31
+pitch_offset = (window_size - pitch_window) // 2
+min_f0 = 60.0
+max_f0 = 400.0
+voicing_threshold = 0.7
+pitch_block_size = 2048
+# the end of the signal that is not used, the same margin extract_features gives the binary front end
+end_margin = 0.01
+eps = 1e-10
+# the floor of the power spectrum in the wiener entropy
+spectrum_floor = 1e-6
+num_features = 9
+
+
+# the signal with enough zeros on both sides for every window
+def pad_samples(samples):
+    return np.concatenate((np.zeros(pitch_window), samples, np.zeros(2 * pitch_window)))
+
+
+# the frame i covers the samples [i * hop + offset, i * hop + offset + size) of the signal padded by pad_samples
+def frame_matrix(padded, first_frame, num_frames, size, offset=0):
+    starts = (first_frame + np.arange(num_frames)) * frame_hop + offset + pitch_window
+    return padded[starts[:, None] + np.arange(size)[None, :]]
+
+
+def get_num_frames(num_samples, rate):
+    length = num_samples / float(rate) - end_margin
+    return max(int(length * rate) // frame_hop, 0)
+
+
+def energy_features(padded, num_frames):
+    frames = frame_matrix(padded, 0, num_frames, window_size)
+    short_term_energy = np.sum(frames ** 2, axis=1)
+    auto_correlation = np.sum(frames[:, auto_correlation_lag:] * frames[:, :-auto_correlation_lag], axis=1)
+    signs = np.sign(frames)
+    signs[signs == 0] = 1
+    zero_crossing = np.sum(signs[:, 1:] != signs[:, :-1], axis=1) / float(window_size - 1)
+
+    # the log energies of the bands of the hamming windowed power spectrum
+    spectrum = np.abs(np.fft.rfft(frames * np.hamming(window_size), fft_size, axis=1)) ** 2
+    freqs = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)
+    low = (freqs >= low_band[0]) & (freqs < low_band[1])
+    high = (freqs >= high_band[0]) & (freqs <= high_band[1])
+    total_energy = np.log(np.sum(spectrum, axis=1) + eps)
+    low_energy = np.log(np.sum(spectrum[:, low], axis=1) + eps)
+    high_energy = np.log(np.sum(spectrum[:, high], axis=1) + eps)
+
+    # the wiener entropy (spectral flatness) without the dc bin: log of the arithmetic over the geometric mean
+    spectrum = spectrum[:, 1:] + spectrum_floor
+    wiener_entropy = np.log(np.mean(spectrum, axis=1)) - np.mean(np.log(spectrum), axis=1)
+    return short_term_energy, total_energy, low_energy, high_energy, wiener_entropy, auto_correlation, zero_crossing
+
+
+# low pass filters the signal below the new nyquist frequency and keeps every factor-th sample
+def decimate(samples, factor):
+    taps = np.arange(pitch_filter_size) - (pitch_filter_size - 1) / 2.0
+    low_pass = np.sinc(taps / factor) * np.hamming(pitch_filter_size)
+    low_pass /= low_pass.sum()
+    return np.convolve(samples, low_pass, 'same')[::factor]
+
+
+def pitch_features(padded, num_frames):
+    rate = sample_rate / pitch_decimation
+    hop = frame_hop / pitch_decimation
+    size = pitch_window / pitch_decimation
+    min_lag = int(rate / max_f0)
+    max_lag = int(rate / min_f0)
+    n_fft = 1
+    while n_fft < 2 * size:
+        n_fft *= 2
+    window = np.hanning(size)
+    # the pitch windows are centered on the analysis windows, the padding of pad_samples keeps them in the signal
+    decimated = decimate(padded, pitch_decimation)
+    first_sample = (pitch_window + pitch_offset) / pitch_decimation
+    # the auto correlation of the window itself, removes its taper from the normalized auto correlation
+    window_correlation = np.fft.irfft(np.abs(np.fft.rfft(window, n_fft)) ** 2, n_fft)[:max_lag + 1]
+
+    pitch = np.zeros(num_frames)
+    voicing = np.zeros(num_frames)
+    for start in range(0, num_frames, pitch_block_size):
+        count = min(pitch_block_size, num_frames - start)
+        starts = first_sample + (start + np.arange(count)) * hop
+        frames = decimated[starts[:, None] + np.arange(size)[None, :]]
+        frames = frames - frames.mean(axis=1)[:, None]
+        correlation = np.fft.irfft(np.abs(np.fft.rfft(frames * window, n_fft, axis=1)) ** 2, n_fft, axis=1)
+        correlation = correlation[:, :max_lag + 1] / window_correlation[None, :]
+        correlation /= correlation[:, :1] + eps
+        peak_lag = min_lag + np.argmax(correlation[:, min_lag:], axis=1)
+        peak = correlation[np.arange(count), peak_lag]
+        is_voiced = peak > voicing_threshold
+        voicing[start:start + count] = is_voiced
+        pitch[start:start + count] = np.where(is_voiced, rate / peak_lag.astype(np.float64), 0.0)
+    return pitch, voicing
+
+
+# input: samples - the signal in [-1, 1], at 16khz
+# output: matrix of frames x 9 features, every column normalized to zero mean and unit variance unless normalize
+# is False
+def compute_features(samples, rate=sample_rate, normalize=True):
+    if rate != sample_rate:
+        raise ValueError("the sample rate should be %d and not %d" % (sample_rate, rate))
+    num_frames = get_num_frames(len(samples), rate)
+    features = np.zeros((num_frames, num_features))
+    if num_frames == 0:
+        return features
+
+    padded = pad_samples(samples)
+    ste, te, le, he, we, ac, zc = energy_features(padded, num_frames)
+    pitch, voicing = pitch_features(padded, num_frames)
+    features[:, 0] = ste
+    features[:, 1] = te
+    features[:, 2] = le
+    features[:, 3] = he
+    features[:, 4] = we
+    features[:, 5] = ac
+    features[:, 6] = pitch
+    features[:, 7] = voicing
+    features[:, 8] = zc
+
+    if normalize:
+        std = features.std(axis=0)
+        std[std == 0] = 1.0
+        features = (features - features.mean(axis=0)) / std
+    return features
+
+
+# the same layout as the binary front end: a header line and then a line per frame that ends with a space
+def write_features(features, output_file):
+    fid = open(output_file, 'w')
+    fid.write("%d %d\n" % features.shape)
+    for row in features:
+        fid.write(" ".join("%f" % value for value in row) + " \n")
+    fid.close()
+
+
+# reads the features written by write_features or by the binary front end
+def read_features(features_file):
+    fid = open(features_file)
+    fid.readline()
+    values = np.fromstring(fid.read(), sep=" ")
+    fid.close()
+    return values.reshape(-1, num_features)
+
+
+def main(wav_file, output_file, normalize=True):
+    samples = audio.load(wav_file) / audio.max_value
+    write_features(compute_features(samples, normalize=normalize), output_file)
+
+
+if __name__ == "__main__":
+    # the first argument is the wav file
+    # the second argument is the output features file
+    # -------------MENU-------------- #
+    # command line arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("wav_filename", help="The wav file, it is resampled to 16khz")
+    parser.add_argument("output_file", help="The output features file")
+    parser.add_argument("--no_normalize", action="store_true", help="Don't normalize the features")
+    args = parser.parse_args()
+
+    # main function
+    try:
+        main(args.wav_filename, args.output_file, not args.no_normalize)
+    except ValueError as e:
+        print >> sys.stderr, e
+        sys.exit(1)
@@ -0,0 +1,114 @@
+# coding=utf-8
+# !/usr/bin/env python
+
+import wave
+import numpy as np
+from fractions import gcd
+
+__author__ = 'yossiadi'
+
+# decodes a wav file once into a mono 16 bit pcm buffer at 16khz, every stage of the front end reads this buffer
+# instead of converting the file again with sox. the channels are averaged and other sample rates are resampled by
+# a polyphase filter, a file that is already 16khz is only decoded
+
+# consts
+sample_rate = 16000
+max_value = 32768.0
+# the low pass filter of the resampling: a kaiser windowed sinc of filter_half_width zero crossings on each side
+filter_half_width = 10
+kaiser_beta = 5.0
+# the number of output samples computed together, bounds the memory of the resampling
+resample_block_size = 65536
+
+
+# returns the samples of the wav file as floats in [-1, 1] and the sample rate, the channels are averaged
+def read_wav(wav_file):
+    wav = wave.open(wav_file, 'rb')
+    channels = wav.getnchannels()
+    width = wav.getsampwidth()
+    rate = wav.getframerate()
+    frames = wav.readframes(wav.getnframes())
+    wav.close()
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float64) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float64) / max_value
+    elif width == 3:
+        # 24 bit samples are moved to the high bytes of 32 bit integers to keep their sign
+        data = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        padded = np.zeros((len(data), 4), dtype=np.uint8)
+        padded[:, 1:] = data
+        samples = padded.view('<i4').ravel().astype(np.float64) / 2147483648.0
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float64) / 2147483648.0
+    else:
+        raise ValueError("unsupported sample width: %d" % width)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+# the filter of every phase: row p holds the taps h[p], h[p + up], h[p + 2 * up], ...
+def polyphase_filter(up, down):
+    max_rate = max(up, down)
+    half_len = filter_half_width * max_rate
+    taps = np.arange(-half_len, half_len + 1)
+    # the cutoff is the lower of the two nyquist frequencies, the gain of up makes up for the inserted zeros
+    h = np.sinc(taps / float(max_rate)) * np.kaiser(len(taps), kaiser_beta)
+    h *= up / h.sum()
+    num_taps = -(-len(h) // up)
+    h = np.concatenate((h, np.zeros(num_taps * up - len(h))))
+    return h.reshape(num_taps, up).T, half_len
+
+
+# resamples by the rational factor new_rate / rate: upsampling by up, filtering and keeping every down-th sample,
+# only the filter taps that fall on the original samples are computed
+def resample(samples, rate, new_rate=sample_rate):
+    if rate == new_rate:
+        return samples
+    factor = gcd(rate, new_rate)
+    up, down = new_rate // factor, rate // factor
+    poly, half_len = polyphase_filter(up, down)
+    num_taps = poly.shape[1]
+    num_samples = -(-len(samples) * up // down)
+
+    # the output sample n is the sum of poly[phase, j] * samples[last - j], for the position n * down of the
+    # upsampled signal, centered by half_len
+    padded = np.concatenate((np.zeros(num_taps), samples, np.zeros(num_taps)))
+    result = np.zeros(num_samples)
+    for start in range(0, num_samples, resample_block_size):
+        positions = np.arange(start, min(start + resample_block_size, num_samples)) * down + half_len
+        last, phase = positions // up, positions % up
+        indices = last[:, None] - np.arange(num_taps)[None, :] + num_taps
+        result[start:start + len(positions)] = np.sum(poly[phase] * padded[indices], axis=1)
+    return result
+
+
+# rounds samples in [-1, 1] to 16 bit integers
+def to_pcm16(samples):
+    return np.clip(np.round(samples * max_value), -max_value, max_value - 1).astype(np.int16)
+
+
+# input: wav_file - a wav file of any sample rate, sample width and number of channels
+# output: the mono signal at the given rate as 16 bit integers
+def load(wav_file, rate=sample_rate):
+    samples, wav_rate = read_wav(wav_file)
+    return to_pcm16(resample(samples, wav_rate, rate))
+
+
+# whether the file is already a mono 16 bit wav at this rate, so programs that read files can use it as is
+def is_pcm16_mono(wav_file, rate=sample_rate):
+    wav = wave.open(wav_file, 'rb')
+    params = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+    wav.close()
+    return params == (1, 2, rate)
+
+
+def write_wav(pcm, wav_file, rate=sample_rate):
+    wav = wave.open(wav_file, 'wb')
+    wav.setnchannels(1)
+    wav.setsampwidth(2)
+    wav.setframerate(rate)
+    wav.writeframes(pcm.astype('<i2').tostring())
+    wav.close()
@@ -0,0 +1,183 @@
+import struct
+import numpy as np
+
+__author__ = 'adiyoss'
+
+# computes the HTK MFCC_E_D_A_Z features of config/htk.config in numpy, all the frames at once, the same way HCopy
+# does: zero mean frames, energy, pre-emphasis, hamming window, mel filter bank of the fft magnitude, dct, lifter,
+# normalized energy, cepstral mean normalization and the delta and acceleration coefficients.
+# it also computes the cepstral distances of config/htk_ceps_dist on the mfcc.stats normalized features.
+
+# the HTK defaults of the parameters htk.config doesn't set
+defaults = {"SOURCERATE": 625.0, "TARGETRATE": 100000.0, "WINDOWSIZE": 256000.0, "ZMEANSOURCE": False,
+            "USEHAMMING": True, "PREEMCOEF": 0.97, "NUMCHANS": 20, "NUMCEPS": 12, "CEPLIFTER": 22,
+            "ENORMALISE": True, "ESCALE": 0.1, "SILFLOOR": 50.0, "DELTAWINDOW": 2, "ACCWINDOW": 2,
+            "LOFREQ": -1.0, "HIFREQ": -1.0, "TARGETKIND": "MFCC_E_D_A_Z", "BYTEORDER": "VAX"}
+
+# HTK parameter kinds
+htk_mfcc = 6
+htk_qualifiers = {"E": 0o100, "D": 0o400, "A": 0o1000, "Z": 0o4000}
+# the number of previous frames htk_ceps_dist measures the distance to, -1 before the first frame
+num_distances = 4
+
+
+def read_config(config_file):
+    config = dict(defaults)
+    for line in open(config_file):
+        if "=" not in line:
+            continue
+        key, value = [item.strip() for item in line.split("=", 1)]
+        if value in ("T", "F"):
+            config[key] = value == "T"
+        else:
+            try:
+                config[key] = float(value)
+            except ValueError:
+                config[key] = value
+    return config
+
+
+def mel(freq):
+    return 1127.0 * np.log(1.0 + freq / 700.0)
+
+
+# the triangular filters of HTK as a matrix of fft bins x channels, the bins below klo and above khi are unused
+def mel_filter_bank(fft_size, sample_rate, num_chans, lo_freq, hi_freq):
+    num_bins = fft_size // 2
+    fres = sample_rate / (fft_size * 700.0)
+    klo = 2 if lo_freq < 0 else max(int(lo_freq / sample_rate * fft_size + 2.5), 2)
+    khi = num_bins if hi_freq < 0 else min(int(hi_freq / sample_rate * fft_size + 0.5), num_bins)
+    mlo = 0.0 if lo_freq < 0 else mel(lo_freq)
+    mhi = mel(sample_rate / 2.0) if hi_freq < 0 else mel(hi_freq)
+    centers = mlo + (mhi - mlo) / (num_chans + 1) * np.arange(1, num_chans + 2)
+
+    filters = np.zeros((num_bins + 1, num_chans))
+    for k in range(klo, khi + 1):
+        bin_mel = 1127.0 * np.log(1.0 + (k - 1) * fres)
+        chan = 0
+        while chan < num_chans + 1 and centers[chan] < bin_mel:
+            chan += 1
+        # the bin is between the centers of the channels chan - 1 and chan (1 based in HTK)
+        lo_chan = chan
+        if lo_chan > 0:
+            lo_weight = (centers[lo_chan] - bin_mel) / (centers[lo_chan] - centers[lo_chan - 1])
+        else:
+            lo_weight = (centers[0] - bin_mel) / (centers[0] - mlo)
+        if lo_chan > 0:
+            filters[k - 1, lo_chan - 1] += lo_weight
+        if lo_chan < num_chans:
+            filters[k - 1, lo_chan] += 1.0 - lo_weight
+    return filters
+
+
+# the regression coefficients of HTK, the edge frames are repeated
+def deltas(features, window):
+    window = int(window)
+    padded = np.concatenate([features[:1]] * window + [features] + [features[-1:]] * window)
+    num_frames = len(features)
+    result = np.zeros(features.shape)
+    for theta in range(1, window + 1):
+        result += theta * (padded[window + theta:window + theta + num_frames] -
+                           padded[window - theta:window - theta + num_frames])
+    return result / (2.0 * sum(theta * theta for theta in range(1, window + 1)))
+
+
+# input: samples - the signal as 16 bit integer values
+#        config  - the parameters read by read_config
+# output: matrix of frames x 39 features, in the HTK order c1..c12 E, their deltas and their accelerations
+def compute(samples, config):
+    sample_period = config["SOURCERATE"]
+    frame_size = int(config["WINDOWSIZE"] / sample_period)
+    frame_hop = int(config["TARGETRATE"] / sample_period)
+    sample_rate = 1e7 / sample_period
+    num_chans = int(config["NUMCHANS"])
+    num_ceps = int(config["NUMCEPS"])
+    lifter = config["CEPLIFTER"]
+    kind = config["TARGETKIND"].split("_")
+
+    num_frames = max((len(samples) - frame_size) // frame_hop + 1, 0)
+    frames = samples[(np.arange(num_frames) * frame_hop)[:, None] + np.arange(frame_size)[None, :]]
+    frames = frames.astype(np.float64)
+    if config["ZMEANSOURCE"]:
+        frames -= frames.mean(axis=1)[:, None]
+    log_energy = np.log(np.maximum(np.sum(frames ** 2, axis=1), 2.45e-308))
+
+    # pre-emphasis, the first sample is scaled by 1 - k
+    k = config["PREEMCOEF"]
+    frames[:, 1:] -= k * frames[:, :-1].copy()
+    frames[:, 0] *= 1.0 - k
+    if config["USEHAMMING"]:
+        frames *= 0.54 - 0.46 * np.cos(2 * np.pi * np.arange(frame_size) / (frame_size - 1))
+
+    fft_size = 2
+    while fft_size < frame_size:
+        fft_size *= 2
+    magnitude = np.abs(np.fft.rfft(frames, fft_size, axis=1))
+    filters = mel_filter_bank(fft_size, sample_rate, num_chans, config["LOFREQ"], config["HIFREQ"])
+    fbank = np.log(np.maximum(np.dot(magnitude, filters), 1.0))
+
+    # dct and lifter
+    j = np.arange(1, num_ceps + 1)
+    dct = np.sqrt(2.0 / num_chans) * np.cos(np.pi * j[None, :] / num_chans * (np.arange(num_chans)[:, None] + 0.5))
+    ceps = np.dot(fbank, dct)
+    if lifter > 0:
+        ceps *= 1.0 + lifter / 2.0 * np.sin(np.pi * j / lifter)
+    if "Z" in kind:
+        ceps -= ceps.mean(axis=0)
+
+    statics = ceps
+    if "E" in kind:
+        if config["ENORMALISE"] and num_frames > 0:
+            max_energy = log_energy.max()
+            min_energy = max_energy - (config["SILFLOOR"] * np.log(10.0)) / 10.0
+            log_energy = 1.0 - (max_energy - np.maximum(log_energy, min_energy)) * config["ESCALE"]
+        statics = np.hstack((ceps, log_energy[:, None]))
+
+    features = [statics]
+    if "D" in kind and num_frames > 0:
+        features.append(deltas(statics, config["DELTAWINDOW"]))
+        if "A" in kind:
+            features.append(deltas(features[-1], config["ACCWINDOW"]))
+    return np.hstack(features)
+
+
+def get_parm_kind(config):
+    kind = config["TARGETKIND"].split("_")
+    parm_kind = htk_mfcc
+    for qualifier in kind[1:]:
+        parm_kind |= htk_qualifiers.get(qualifier, 0)
+    return parm_kind
+
+
+# writes the features as an HTK parameter file, VAX is the little endian byte order
+def write_htk(features, config, output_file):
+    order = "<" if config["BYTEORDER"] == "VAX" else ">"
+    fid = open(output_file, 'wb')
+    fid.write(struct.pack(order + "iihh", len(features), int(config["TARGETRATE"]), 4 * features.shape[1],
+                          get_parm_kind(config)))
+    fid.write(features.astype(order + "f4").tostring())
+    fid.close()
+
+
+# the mean and the standard deviation rows of mfcc.stats
+def read_stats(stats_file):
+    lines = open(stats_file).readlines()
+    return np.array(lines[1].split(), dtype=np.float64), np.array(lines[2].split(), dtype=np.float64)
+
+
+# the distance across the boundary between the frames t - 1 and t of the normalized features: for k = 1..4 the mean
+# squared euclidean distance of the pairs (t - i, t + i - 1), i = 1..k. -1 when the pairs are out of the signal
+def ceps_distances(features, mean, std):
+    normalized = (features - mean) / std
+    num_frames = len(features)
+    distances = -np.ones((num_frames, num_distances))
+    total = np.zeros(num_frames)
+    for k in range(1, num_distances + 1):
+        # the frames t for which t - k and t + k - 1 are in the signal
+        first, last = k, num_frames - k + 1
+        if first >= last:
+            break
+        t = np.arange(first, last)
+        total[t] += np.sum((normalized[t - k] - normalized[t + k - 1]) ** 2, axis=1)
+        distances[t, k - 1] = total[t] / k
+    return distances
@@ -0,0 +1,61 @@
+import numpy as np
+
+__author__ = 'adiyoss'
+
+# maps the frame scores of the 39 phonemes (config/phonemes_39) to the phoneme features of the front end:
+# isVowel, isNasal, isGlide, isSil (the class of the phoneme with the highest score) and the posterior of the
+# vowels, nasals and glides (softmax of the scores summed over the class)
+
+# consts
+vowels = [0, 1, 2, 3, 4, 10, 13, 14, 18, 19, 24, 25, 33, 34]
+nasals = [12, 22, 23]
+glides = [11, 17, 27, 36, 37]
+sil = 30
+num_phonemes = 39
+
+
+def class_mask(phonemes, num_classes=num_phonemes):
+    mask = np.zeros(num_classes)
+    mask[phonemes] = 1.0
+    return mask
+
+
+# the scores file of PhonemeFrameBasedDecode: a header line and then a line of scores per frame.
+# the lines are parsed together, much faster than line by line
+def read_scores(scores_filename):
+    fid = open(scores_filename)
+    fid.readline()
+    first_line = fid.readline()
+    text = first_line + fid.read()
+    fid.close()
+    num_columns = len(first_line.split())
+    if num_columns == 0:
+        return np.zeros((0, num_phonemes))
+    return np.fromstring(text, sep=" ").reshape(-1, num_columns)
+
+
+# input: scores - matrix of frames x phonemes
+# output: matrix of frames x 7: isVowel, isNasal, isGlide, isSil, sumVowel, sumNasal, sumGlide
+def phoneme_features(scores):
+    features = np.zeros((len(scores), 7))
+    if len(scores) == 0:
+        return features
+    num_classes = scores.shape[1]
+    arg_max = np.argmax(scores, axis=1)
+    features[:, 0] = np.in1d(arg_max, vowels)
+    features[:, 1] = np.in1d(arg_max, nasals)
+    features[:, 2] = np.in1d(arg_max, glides)
+    features[:, 3] = arg_max == sil
+
+    # the softmax with the max score subtracted so the exponent never overflows
+    posteriors = np.exp(scores - scores.max(axis=1)[:, None])
+    posteriors /= posteriors.sum(axis=1)[:, None]
+    masks = np.stack([class_mask(vowels, num_classes), class_mask(nasals, num_classes),
+                      class_mask(glides, num_classes)], axis=1)
+    features[:, 4:] = np.dot(posteriors, masks)
+    return features
+
+
+# the text of a row, the indicators as integers
+def format_row(row):
+    return " ".join("%d" % value for value in row[:4]) + " " + " ".join("%.12g" % value for value in row[4:])
@@ -52,15 +52,43 @@
 import argparse
 import tempfile
 import os
-from subprocess import call
-import wave
-import math
-
-
-def easy_call(command):
+import sys
+import numpy as np
+from lib import mfcc
+from lib import phoneme_scores
+
+# the profiler and the wav decoding are shared with the front end
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../.."))
+from front_end import profiler
+from front_end import audio
+
+# the configuration files and the binaries are resolved from this directory, so the classifier can run from any
+# directory and in the process of the front end
+classifier_dir = os.path.dirname(os.path.abspath(__file__))
+
+# binaries
+phoneme_classifier_bin = os.path.join(classifier_dir, "bin/PhonemeFrameBasedDecode")
+htk_config = os.path.join(classifier_dir, "config/htk.config")
+mfcc_stats_file = os.path.join(classifier_dir, "config/mfcc.stats")
+phoneme_list_filename = os.path.join(classifier_dir, "config/phonemes_39")
+
+# frame-base phoneme classifier parameters
+phoneme_classifier_pad = "5"
+phoneme_classifier_SIGMA = "4.3589"
+phoneme_classifier_C = "1"
+phoneme_classifier_B = "0.8"
+phoneme_classifier_epochs = "1"
+phoneme_classifier_model = os.path.join(
+    classifier_dir, "models/pa_phoeneme_frame_based.C_%s.B_%s.sigma_%s.pad_%s.epochs_%s.model" %
+    (phoneme_classifier_C, phoneme_classifier_B, phoneme_classifier_SIGMA, phoneme_classifier_pad,
+     phoneme_classifier_epochs))
+
+
+# stage is the name the command is recorded under when profiling
+def easy_call(command, stage="command"):
     try:
         print command
-        call(command, shell=True)
+        profiler.call(command, stage, cwd=classifier_dir)
     except Exception as exception:
         print "Error: could not execute the following"
         print ">>", command
@@ -69,62 +97,26 @@ def easy_call(command):
         exit(-1)
 
 
-if __name__ == "__main__":
-
-    # command line arguments
-    parser = argparse.ArgumentParser()
-    parser.add_argument("wav_filename", help="input WAV file name")
-    parser.add_argument("textgrid_filename", help="output TextGrid file name")
-    parser.add_argument("--scores_filename", default="", help="output scores matrix")
-    args = parser.parse_args()
-
-    # binaries
-    sox_bin = "sbin/sox"
-    hcopy_bin = "sbin/Hcopy"
-    phoneme_classifier_bin = "bin/PhonemeFrameBasedDecode"
-    htk_config = "config/htk.config"
-    mfcc_stats_file = "config/mfcc.stats"
-    phoneme_list_filename = "config/phonemes_39"
-    mfcc_tmp_file = "config/tmp.mfcc"
-    mfcc_extractor = "config/htk_ceps_dist"
-
-    # frame-base phoneme classifier parameters
-    phoneme_classifier_pad = "5"
-    phoneme_classifier_SIGMA = "4.3589"
-    phoneme_classifier_C = "1"
-    phoneme_classifier_B = "0.8"
-    phoneme_classifier_epochs = "1"
-    phoneme_classifier_model = "models/pa_phoeneme_frame_based.C_%s.B_%s.sigma_%s.pad_%s.epochs_%s.model" % \
-                               (phoneme_classifier_C, phoneme_classifier_B, phoneme_classifier_SIGMA,
-                                phoneme_classifier_pad, phoneme_classifier_epochs)
-
+# input: samples         - the signal as 16khz mono 16 bit integers (audio.load)
+#        output_filename - when set, the features are also written there, two lines per 10ms frame
+#        scores_filename - where to keep the scores matrix of the classifier, a temporary file when empty
+#        tmp_dir         - the directory of the intermediate files
+# output: matrix of 10ms frames x 11 features, the 7 phoneme features and the 4 cepstral distances
+def main(samples, output_filename="", scores_filename="", tmp_dir=None):
     # generate intermediate files from a temp filename
-    (tmp_fd, tmp_filename) = tempfile.mkstemp()
-    wav_filename = tmp_filename + ".16kHz.wav"
+    (tmp_fd, tmp_filename) = tempfile.mkstemp(dir=tmp_dir)
     mfc_filename = tmp_filename + ".mfc"
 
-    # read Wav file parameters
-    wave_file = wave.Wave_read(args.wav_filename)
-    wave_sampling_rate = wave_file.getframerate()
-    wave_file.close()
-
-    # converts WAV to 16kHz
-    if wave_sampling_rate != 16000:
-        cmd = "%s %s -r 16k %s remix 1" % (sox_bin, args.wav_filename, wav_filename)
-        easy_call(cmd)
-        rm_wav_file = True
-    else:
-        wav_filename = args.wav_filename
-        rm_wav_file = False
-
-    # extract MFCC features using HCopy utility
-    cmd_params = "%s -C %s %s %s" % (hcopy_bin, htk_config, wav_filename, mfc_filename)
-    easy_call(cmd_params)
+    # extract the MFCC features of htk.config in process (what HCopy computes), the decoder reads them from the
+    # .mfc file
+    with profiler.stage("mfcc"):
+        htk_params = mfcc.read_config(htk_config)
+        mfcc_features = mfcc.compute(samples, htk_params)
+        mfcc.write_htk(mfcc_features, htk_params, mfc_filename)
 
     # predict phonemes from MFCCs
-    if args.scores_filename != "":
-        scores_filename = args.scores_filename
-    else:
+    keep_scores = scores_filename != ""
+    if not keep_scores:
         scores_filename = tmp_filename + ".scores"
     mfcc_filelist = tmp_filename + ".mfc_list"
     fid = open(mfcc_filelist, 'w')
@@ -132,117 +124,73 @@ if __name__ == "__main__":
     fid.close()
     scores_filelist = tmp_filename + ".scores_list"
     fid = open(scores_filelist, 'w')
-    fid.write(scores_filename)
+    fid.write(os.path.abspath(scores_filename))
     fid.close()
     cmd_params = "%s -n %s -kernel_expansion rbf3 -sigma %s -mfcc_stats %s -averaging -scores %s %s " \
                  "null %s %s" % (phoneme_classifier_bin, phoneme_classifier_pad, phoneme_classifier_SIGMA,
                                  mfcc_stats_file, scores_filelist, mfcc_filelist, phoneme_list_filename,
                                  phoneme_classifier_model)
-    easy_call(cmd_params)
-
-    # read phoneme list
-    phoneme_list_file = open(phoneme_list_filename)
-    phoneme_map = [line.rstrip() for line in phoneme_list_file]
-    phoneme_list_file.close()
-
-    # load matrix of scores and build phoneme with start and end times
-    scores_file = open(scores_filename)
-    header_read = False
-    prev_max_phoneme = ''
-    prev_max_score = 0
-    prev_start_frame = 0
-    current_frame = 0
-    phonemes = list()
-    vowels = {0, 1, 2, 3, 4, 10, 13, 14, 18, 19, 24, 25, 33, 34}
-    nasals = {12, 22, 23}
-    glides = {11, 17, 27, 36, 37}
-    sil = 30
-
-    for line in scores_file:
-        line.rstrip()
-        # skip the first line
-        if not header_read:
-            header_read = True
-        else:
-            vector_row = list()
-            scores = map(float, line.split())
-
-            # zero-one function for the vowels
-            scores_arg_max = max(enumerate(scores), key=lambda x: x[1])[0]
-
-            isVowel = 0
-            isNasal = 0
-            isGlide = 0
-            isSil = 0
-
-            # find out if the phoneme with the highest score is vowel
-            if scores_arg_max in vowels:
-                isVowel = 1
-            # find out if the phoneme with the highest score is nasals
-            if scores_arg_max in nasals:
-                isNasal = 1
-
-            # find out if the phoneme with the highest score is glides
-            if scores_arg_max == glides:
-                isGlide = 1
-
-            # find out if the phoneme with the highest score is sil
-            if scores_arg_max == sil:
-                isSil = 1
-
-            vector_row.append(isVowel)
-            vector_row.append(isNasal)
-            vector_row.append(isGlide)
-            vector_row.append(isSil)
-
-            # exp sum over vowels/nasals/glides
-            sum_vowels = 0
-            sum_nasals = 0
-            sum_glides = 0
-
-            # exp sum over glides
-            sum_total = 0
-
-            for phoneme in range(0, len(scores)):
-                # add the vowel value
-                if phoneme in vowels:
-                    sum_vowels += math.exp(scores[phoneme])
-                # add the nasal value
-                if phoneme in nasals:
-                    sum_nasals += math.exp(scores[phoneme])
-                # add the glide value
-                if phoneme in glides:
-                    sum_glides += math.exp(scores[phoneme])
-                sum_total += math.exp(scores[phoneme])
-
-            vector_row.append(sum_vowels / sum_total)
-            vector_row.append(sum_nasals / sum_total)
-            vector_row.append(sum_glides / sum_total)
-            phonemes.append(vector_row)
-
-    # extract the mfcc feature mappings from the file
-    mfcc_feature_map_command = mfcc_extractor + " " + str(mfc_filename) + " " + mfcc_stats_file + " " + mfcc_tmp_file
-    easy_call(mfcc_feature_map_command)
-
-    # append the mfcc data to the phonemes data and write the output file
-    file_data = open(mfcc_tmp_file, 'r')
-    data_lines = file_data.readlines()
-    textFile = open(args.textgrid_filename, 'w')
-    count = 1
-    for item in phonemes:
-        for i in range(2):
-            for value in item:
-                textFile.write(str(value) + ' ')
-            textFile.write(data_lines[count])
-        count += 1
-
-    textFile.close()
-    file_data.close()
+    easy_call(cmd_params, "PhonemeFrameBasedDecode")
+
+    # the scores are mapped to the phoneme features, all the frames at once
+    with profiler.stage("score_features"):
+        phonemes = phoneme_scores.phoneme_features(phoneme_scores.read_scores(scores_filename))
+
+    # the cepstral distances of the mfcc.stats normalized features (what htk_ceps_dist computes)
+    with profiler.stage("ceps_dist"):
+        mfcc_mean, mfcc_std = mfcc.read_stats(mfcc_stats_file)
+        distances = mfcc.ceps_distances(mfcc_features, mfcc_mean, mfcc_std)
+
+    # append the mfcc data to the phonemes data
+    num_frames = min(len(phonemes), len(distances))
+    features = np.hstack((phonemes[:num_frames], distances[:num_frames]))
+    if output_filename != "":
+        textFile = open(output_filename, 'w')
+        for item, distance in zip(phonemes, distances):
+            row = phoneme_scores.format_row(item) + ' ' + " ".join("%g" % value for value in distance) + "\n"
+            for i in range(2):
+                textFile.write(row)
+        textFile.close()
 
     # remove all temporary files
-    os.remove(mfcc_tmp_file)
     os.remove(mfc_filename)
-    if args.scores_filename == "":
+    if not keep_scores:
         os.remove(scores_filename)
     os.remove(mfcc_filelist)
     os.remove(scores_filelist)
+    os.close(tmp_fd)
+    os.remove(tmp_filename)
+    return features
+
+
+# input: samples - the signal as 16khz mono 16 bit integers (audio.load)
+# output: matrix of 10ms frames x 4 features, the cepstral distances of main without running the classifier, for the
+# models that don't read the phoneme features
+def ceps_features(samples):
+    with profiler.stage("mfcc"):
+        htk_params = mfcc.read_config(htk_config)
+        mfcc_features = mfcc.compute(samples, htk_params)
+    with profiler.stage("ceps_dist"):
+        mfcc_mean, mfcc_std = mfcc.read_stats(mfcc_stats_file)
+        return mfcc.ceps_distances(mfcc_features, mfcc_mean, mfcc_std)
+
+
+if __name__ == "__main__":
+
+    # command line arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("wav_filename", help="input WAV file name")
+    parser.add_argument("textgrid_filename", help="output TextGrid file name")
+    parser.add_argument("--scores_filename", default="", help="output scores matrix")
+    parser.add_argument("--profile_filename", default="", help="output json with the time and memory of every stage")
+    args = parser.parse_args()
+    if args.profile_filename != "":
+        profiler.start()
+
+    # decode the wav file and convert it to 16kHz mono
+    with profiler.stage("decode"):
+        wav_samples = audio.load(args.wav_filename)
+    main(wav_samples, args.textgrid_filename, args.scores_filename)
+
+    if args.profile_filename != "":
+        profiler.write_json(profiler.stop().records, args.profile_filename)
@@ -6,20 +6,46 @@ import os
 import shutil
 import argparse
 import tempfile
-from subprocess import call
 import numpy as np
+import feature_cache
+import profiler
+import audio
+import acoustic_features
+import feature_format
 
 __author__ = 'yossiadi'
 
-
-def generate_tmp_filename(extension="txt"):
-    return tempfile._get_default_tempdir() + "/" + next(tempfile._get_candidate_names()) + "." + extension
-
-
-# run system commands
-def easy_call(command):
+# the front end binaries are resolved from this directory, so the extraction never depends on the current directory
+front_end_dir = os.path.dirname(os.path.abspath(__file__))
+phoneme_classifier_dir = os.path.join(front_end_dir, "bin/phoneme_classifier")
+# the hamming window of the smoothed features
+smooth_window_size = 60
+# the columns of the .data file that are smoothed: pitch, voicing, vowel, nasal, glide and sil
+smoothed_columns = [6, 7, 9, 10, 11, 12]
+# the range under which a smoothed column is constant, the convolution in the frequency domain adds noise of ~1e-15
+constant_range = 1e-9
+# the first nine acoustic features are computed by bin/VowelDurationFrontEnd ("binary", a mac binary) or by
+# acoustic_features.py ("numpy", any platform)
+acoustic_engines = ["binary", "numpy"]
+default_acoustic_engine = "binary" if sys.platform == "darwin" else "numpy"
+# the phoneme features of the classifier are the columns 9 to 15, the cepstral distances follow them
+num_phoneme_features = 7
+
+# the phoneme classifier runs in this process on the decoded signal
+sys.path.insert(0, phoneme_classifier_dir)
+import phoneme_classifier
+
+
+def generate_tmp_filename(extension="txt", tmp_dir=None):
+    if tmp_dir is None:
+        tmp_dir = tempfile._get_default_tempdir()
+    return tmp_dir + "/" + next(tempfile._get_candidate_names()) + "." + extension
+
+
+# run system commands, stage is the name the command is recorded under when profiling
+def easy_call(command, cwd=None, stage="command"):
     try:
-        call(command, shell=True)
+        profiler.call(command, stage, cwd=cwd)
     except Exception as exception:
         print "Error: could not execute the following"
         print ">>", command
@@ -30,8 +56,8 @@ def easy_call(command):
 
 def extract_acoustic_features(input_file, feature_file, label_file):
     if os.path.exists(input_file) and os.path.exists(feature_file) and os.path.exists(label_file):
-        command = "./bin/VowelDurationFrontEnd %s %s %s" % (input_file, feature_file, label_file)
-        easy_call(command)
+        command = "%s/bin/VowelDurationFrontEnd %s %s %s" % (front_end_dir, input_file, feature_file, label_file)
+        easy_call(command, stage="VowelDurationFrontEnd")
 
         # remove leftovers
         os.remove(input_file)
@@ -50,145 +76,76 @@ def get_wav_file_length(wav_file):
         return duration
 
 
-def copy_arrays(arr1, arr2):
-    """
-    :rtype :
-    """
-    if len(arr1) == len(arr2):
-        return arr2
-
-    if len(arr1) >= len(arr2):
-        for i in range(0, len(arr2)):
-            arr1[i] = arr2[i]
-        return arr1
+# input: acoustic - the matrix of the acoustic features, a row per 5ms frame
+#        phonemes - the matrix of the phoneme classifier features, a row per 10ms frame
+# output: the features matrix with the phoneme classifier features appended to the acoustic features, every 10ms
+# frame of the classifier follows the acoustic frames (2 * i - 1, 2 * i)
+def merge_frames(acoustic, phonemes):
+    # the acoustic frame i (0 based) is paired with the classifier frame (i + 1) / 2, as long as both exist
+    num_rows = max(min(len(acoustic) + 1, 2 * len(phonemes)) - 1, 0)
+    rows = np.arange(num_rows)
+    return np.hstack((acoustic[:num_rows], phonemes[(rows + 1) // 2].reshape(num_rows, phonemes.shape[1])))
 
-    if len(arr1) <= len(arr2):
-        for i in range(0, len(arr1)):
-            arr1[i] = arr2[i]
-        return arr1
 
-
-# input: phoneme_classifier_path  - classifier path
-#        wav_file                 - wave files path
-#        features_file            - features path
-
-# output: the new data with the phoneme classifier feature will
-# be at the data_features_path inside dir called plus_phonemes
-def add_phomene_classifier(phoneme_classifier_path, wav_file, features_file):
+# input: samples                  - the decoded signal, 16khz mono 16 bit integers
+#        acoustic                 - the matrix of the acoustic features, a row per 5ms frame
+#        tmp_dir                  - directory for the intermediate files
+# output: the features matrix of merge_frames
+def add_phomene_classifier(samples, acoustic, tmp_dir):
     # consts
-    tmp_file_name = "phonemes/phones.txt"
-    phone_dir = "phonemes/"
-    plus_phone_dir = "plus_phonemes/"
+    phone_dir = tmp_dir + "/phonemes/"
 
     # validation
-    if not os.path.exists(wav_file):
-        print >> sys.stderr, "wav file does not exits"
-        return
     if not os.path.exists(phone_dir):
         os.makedirs(phone_dir)
-    current_dir = os.getcwd()
-
-    command = 'python ' + current_dir + "/" + phoneme_classifier_path + " " + wav_file + " " + tmp_file_name
-    easy_call(command)
-
-    if not os.path.exists(plus_phone_dir):
-        os.makedirs(plus_phone_dir)
-
-    data_file = open(features_file)
-    file_name = features_file.split('/')
-
-    phoneme_file = open(tmp_file_name)
-    out_file = open(plus_phone_dir + file_name[len(file_name) - 1], 'wb')
-
-    data_file = data_file.readlines()
-    phoneme_file_lines = phoneme_file.readlines()
-    is_first = True
-
-    for index in range(0, min(len(data_file), len(phoneme_file_lines))):
-        # writes the first line as is
-        if is_first:
-            out_file.write(data_file[0])
-            is_first = False
-            continue
-
-        values = data_file[index].split('\n')
-        new_line = values[0].rsplit(' ', 1)[0]
-        new_line = new_line + ' ' + phoneme_file_lines[index]
-        out_file.write(new_line)
 
-    # data_file.close()
-    phoneme_file.close()
-    out_file.close()
+    # its stages are recorded as phoneme_classifier/<stage>
+    with profiler.group("phoneme_classifier"):
+        phonemes = phoneme_classifier.main(samples, tmp_dir=phone_dir)
     shutil.rmtree(phone_dir)
-
-
-# smooth and normalize the voicing, pitch, vowels, nasals and glides
-def smooth_features(data_file):
-    pitch = 6
-    voicing = 7
-    vowel = 9
-    nasal = 10
-    glide = 11
-    sil = 12
-
-    # smoothing all the relevant features
-    data = np.loadtxt(data_file, skiprows=1)
-    window_size = 60
-    mask = np.hamming(window_size)
-    smooth_pitch = np.convolve(data[:, pitch], mask, 'same')
-    smooth_voicing = np.convolve(data[:, voicing], mask, 'same')
-
-    smooth_vowels = np.convolve(data[:, vowel], mask, 'same')
-    smooth_nasal = np.convolve(data[:, nasal], mask, 'same')
-    smooth_glide = np.convolve(data[:, glide], mask, 'same')
-    smooth_sil = np.convolve(data[:, sil], mask, 'same')
-
-    high = 1.0
-    low = 0.0
-
-    min_val = np.min(smooth_pitch)
-    max_val = np.max(smooth_pitch)
-    rng = max_val - min_val
-    scaled_points = high - (((high - low) * (max_val - smooth_pitch)) / rng)
-    data[:, pitch] = copy_arrays(data[:, pitch], scaled_points)
-
-    min_val = np.min(smooth_voicing)
-    max_val = np.max(smooth_voicing)
-    rng = max_val - min_val
-    scaled_points = high - (((high - low) * (max_val - smooth_voicing)) / rng)
-    data[:, voicing] = copy_arrays(data[:, voicing], scaled_points)
-
-    # vowels
-    min_val = np.min(smooth_vowels)
-    max_val = np.max(smooth_vowels)
-    rng = max_val - min_val
-    scaled_points = high - (((high - low) * (max_val - smooth_vowels)) / rng)
-    data[:, vowel] = copy_arrays(data[:, vowel], scaled_points)
-
-    # nasals
-    min_val = np.min(smooth_nasal)
-    max_val = np.max(smooth_nasal)
-    rng = max_val - min_val
-    scaled_points = high - (((high - low) * (max_val - smooth_nasal)) / rng)
-    data[:, nasal] = copy_arrays(data[:, nasal], scaled_points)
-
-    # glides
-    min_val = np.min(smooth_glide)
-    max_val = np.max(smooth_glide)
-    rng = max_val - min_val
-    scaled_points = high - (((high - low) * (max_val - smooth_glide)) / rng)
-    data[:, glide] = copy_arrays(data[:, glide], scaled_points)
-
-    # sil
-    min_val = np.min(smooth_sil)
-    max_val = np.max(smooth_sil)
-    rng = max_val - min_val
-    scaled_points = high - (((high - low) * (max_val - smooth_sil)) / rng)
-    data[:, sil] = copy_arrays(data[:, sil], scaled_points)
-
-    # remove the old file and write the new one
-    os.remove(data_file)
-    np.savetxt(data_file, data)
+    return merge_frames(acoustic, phonemes)
+
+
+# the same matrix as add_phomene_classifier without running the classifier (PhonemeFrameBasedDecode and the phoneme
+# scores): the phoneme features are zero and only the cepstral distances are computed, for the no classifier models
+def add_cepstral_distances(samples, acoustic):
+    with profiler.group("ceps_features"):
+        distances = phoneme_classifier.ceps_features(samples)
+    phonemes = np.hstack((np.zeros((len(distances), num_phoneme_features)), distances))
+    return merge_frames(acoustic, phonemes)
+
+
+# smooth and normalize the voicing, pitch, vowels, nasals, glides and sil columns of the features matrix in place:
+# the columns are convolved with the hamming window together in the frequency domain and scaled to [0, 1].
+# a column that is constant after smoothing (no nasal frame for example) is set to zero instead of nan
+def smooth_features(data):
+    num_rows = len(data)
+    if num_rows == 0:
+        return data
+
+    # the full convolution of every column, the same part is kept as in np.convolve(column, mask, 'same')
+    mask = np.hamming(smooth_window_size)
+    full_size = num_rows + smooth_window_size - 1
+    fft_size = 1
+    while fft_size < full_size:
+        fft_size *= 2
+    spectrum = np.fft.rfft(data[:, smoothed_columns], fft_size, axis=0) * np.fft.rfft(mask, fft_size)[:, None]
+    smooth = np.fft.irfft(spectrum, fft_size, axis=0)
+    start = (min(num_rows, smooth_window_size) - 1) // 2
+    smooth = smooth[start:start + max(num_rows, smooth_window_size)]
+
+    min_val = smooth.min(axis=0)
+    rng = smooth.max(axis=0) - min_val
+    is_constant = rng <= constant_range
+    scaled_points = (smooth - min_val) / np.where(is_constant, 1.0, rng)
+    scaled_points[:, is_constant] = 0.0
+    data[:, smoothed_columns] = scaled_points[:num_rows]
+    return data
+
+
+# writes the features matrix, as text (a line per frame) or as a float32 binary file, see feature_format.py
+def write_features(data, data_file, data_format="text"):
+    feature_format.write(data, data_file, data_format)
 
 
 def add_formants(data_path, wav_path, praat_command):
@@ -280,69 +237,103 @@ def add_formants(data_path, wav_path, praat_command):
     shutil.rmtree(tmp_dir)
 
 
-def main(wav_file, output_data):
+# tmp_dir: the directory for the intermediate files, when it is None a new one is created and removed at the end
+# use_cache: read the features from the feature cache when this wav file was already extracted
+# acoustic_engine: one of acoustic_engines, computes the first nine features
+# data_format: one of feature_format.formats, the format of output_data
+# classifier: run the phoneme classifier, without it the phoneme features are zero (the no classifier models)
+def main(wav_file, output_data, tmp_dir=None, use_cache=True, acoustic_engine=default_acoustic_engine,
+         data_format="text", classifier=True):
+    # validation
+    if not os.path.exists(wav_file):
+        print >> sys.stderr, "wav file does not exits"
+        return
+
+    # skip the whole front end when the features of this wav file are cached
+    cache_key = None
+    if use_cache and feature_cache.is_enabled():
+        with profiler.stage("feature_cache"):
+            # the binary and the numpy engines write different acoustic features, they never share an entry
+            params = (smooth_window_size, acoustic_engine, data_format)
+            if not classifier:
+                params += ("no_classifier",)
+            cache_key = feature_cache.get_key(wav_file, params)
+            cache_hit = feature_cache.load(cache_key, output_data)
+        if cache_hit:
+            return
+
     # defines
-    # tmp_dir = "tmp/"
-    tmp_input = generate_tmp_filename("input")
-    tmp_label = generate_tmp_filename("labels")
-    tmp_features = generate_tmp_filename("features")
-    tmp_file = generate_tmp_filename("wav")
+    remove_tmp_dir = tmp_dir is None
+    if remove_tmp_dir:
+        tmp_dir = tempfile.mkdtemp(prefix="front_end_")
+    tmp_input = generate_tmp_filename("input", tmp_dir)
+    tmp_label = generate_tmp_filename("labels", tmp_dir)
+    tmp_features = generate_tmp_filename("features", tmp_dir)
+    tmp_file = None
     zero = 0.01
 
     # praat_app = "/Applications/Praat.app/Contents/MacOS/Praat"
     output_data = os.path.abspath(output_data)
 
-    # validation
-    if not os.path.exists(wav_file):
-        print >> sys.stderr, "wav file does not exits"
-        return
-
-    cmd = "sbin/sox %s -r 16000 -b 16 %s" % (wav_file, tmp_file)
-    easy_call(cmd)
+    # decode the wav file once, every stage reads the 16khz mono signal
+    with profiler.stage("decode"):
+        samples = audio.load(wav_file)
 
     # =================== ACOUSTIC FEATURES =================== #
-    # creating the files
-    input_file = open(tmp_features, 'wb')  # open the input file for the feature extraction
-    features_file = open(tmp_input, 'wb')  # open file for the feature list path
-    labels_file = open(tmp_label, 'wb')  # open file for the labels
-    length = get_wav_file_length(tmp_file)
-
-    # write the data
-    input_file.write(
-        '"' + tmp_file + '" ' + str('%.8f' % 0) + ' ' + str(float(length) - zero) + ' ' + str('%.8f' % 0) + ' ' + str(
-            '%.8f' % 0))
-    features_file.write(output_data)
-
-    input_file.close()
-    features_file.close()
-    labels_file.close()
-
-    # extract the first nine acoustic features
-    extract_acoustic_features(input_file.name, features_file.name, labels_file.name)
+    # extract the first nine acoustic features, the features stay in memory until they are written once
+    if acoustic_engine == "numpy":
+        with profiler.stage("acoustic_features"):
+            acoustic = acoustic_features.compute_features(samples / audio.max_value)
+    else:
+        # the binary front end reads a 16khz file, it is written only when the wav file is not one already
+        binary_wav = os.path.abspath(wav_file)
+        if not audio.is_pcm16_mono(wav_file):
+            tmp_file = generate_tmp_filename("wav", tmp_dir)
+            audio.write_wav(samples, tmp_file)
+            binary_wav = tmp_file
+
+        # creating the files
+        input_file = open(tmp_features, 'wb')  # open the input file for the feature extraction
+        features_file = open(tmp_input, 'wb')  # open file for the feature list path
+        labels_file = open(tmp_label, 'wb')  # open file for the labels
+        length = len(samples) / float(audio.sample_rate)
+
+        # write the data
+        input_file.write(
+            '"' + binary_wav + '" ' + str('%.8f' % 0) + ' ' + str(float(length) - zero) + ' ' + str('%.8f' % 0) +
+            ' ' + str('%.8f' % 0))
+        features_file.write(output_data)
+
+        input_file.close()
+        features_file.close()
+        labels_file.close()
+
+        extract_acoustic_features(input_file.name, features_file.name, labels_file.name)
+        acoustic = acoustic_features.read_features(output_data)
     # ========================================================= #
 
     # ================== PHONEME CLASSIFIER =================== #
-    # extract the phonemes and merge the files
-    abs_path = os.path.abspath(tmp_file)
-    os.chdir("bin/phoneme_classifier")
-    add_phomene_classifier('phoneme_classifier.py', abs_path, output_data)
-    os.chdir("../..")
-
-    # remove leftovers
-    os.remove(output_data)
-    file_name = output_data.split('/')
-    shutil.copy("bin/phoneme_classifier/plus_phonemes/" + file_name[len(file_name) - 1], output_data)
-    shutil.rmtree("bin/phoneme_classifier/plus_phonemes/")
+    # extract the phonemes and merge them with the acoustic features
+    if classifier:
+        data = add_phomene_classifier(samples, acoustic, tmp_dir)
+    else:
+        data = add_cepstral_distances(samples, acoustic)
     # ======================================================== #
 
     # =================== SMOOTH FEATURES ==================== #
-    smooth_features(output_data)
+    with profiler.stage("smooth_features"):
+        smooth_features(data)
+    with profiler.stage("write_features"):
+        write_features(data, output_data, data_format)
     # ======================================================== #
 
     # # =================== FORMANT F1 & F2 ==================== #
     # add_formants(output_data, wav_file, praat_app)
     # # ======================================================== #
 
+    if cache_key is not None:
+        feature_cache.store(cache_key, output_data)
+
     # remove left overs
     if os.path.exists(tmp_input):
         os.remove(tmp_input)
@@ -350,8 +341,10 @@ def main(wav_file, output_data):
         os.remove(tmp_label)
     if os.path.exists(tmp_features):
         os.remove(tmp_features)
-    if os.path.exists(tmp_file):
+    if tmp_file is not None and os.path.exists(tmp_file):
         os.remove(tmp_file)
+    if remove_tmp_dir:
+        shutil.rmtree(tmp_dir)
 
 
 if __name__ == "__main__":
@@ -362,7 +355,16 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("wav_filename", help="The wav file")
     parser.add_argument("output_data", help="The output data file (features)")
+    parser.add_argument("--no_cache", action="store_true", help="Always run the front end, even when the features "
+                                                                "of this wav file are cached")
+    parser.add_argument("--acoustic_engine", default=default_acoustic_engine, choices=acoustic_engines,
+                        help="Compute the acoustic features with the mac binary or with numpy")
+    parser.add_argument("--data_format", default="text", choices=feature_format.formats,
+                        help="Write the features as text or as a float32 binary file")
+    parser.add_argument("--no_classifier", action="store_true",
+                        help="Skip the phoneme classifier, the features are for the no classifier models")
     args = parser.parse_args()
 
     # main function
-    main(args.wav_filename, args.output_data)
+    main(args.wav_filename, args.output_data, use_cache=not args.no_cache, acoustic_engine=args.acoustic_engine,
+         data_format=args.data_format, classifier=not args.no_classifier)
@@ -0,0 +1,143 @@
+# coding=utf-8
+# !/usr/bin/env python
+
+import os
+import shutil
+import hashlib
+import tempfile
+
+__author__ = 'yossiadi'
+
+# an on disk cache of .data feature files, the key is a hash of the wav contents and of the front end configuration
+# so changing the htk config, the classifier or the smoothing invalidates all the entries at once.
+# the cache is bounded by size and the least recently used entries are removed first (a hit touches the entry).
+# VOWEL_DURATION_CACHE_DIR moves the cache, VOWEL_DURATION_CACHE_MB sets its size (0 disables it)
+cache_dir = os.environ.get("VOWEL_DURATION_CACHE_DIR",
+                           os.path.join(os.path.expanduser("~"), ".cache", "vowel_duration", "features"))
+cache_size_mb = float(os.environ.get("VOWEL_DURATION_CACHE_MB", 2048))
+
+front_end_dir = os.path.dirname(os.path.abspath(__file__))
+phoneme_classifier_dir = os.path.join(front_end_dir, "bin/phoneme_classifier")
+
+# the files whose contents define the features, the classifier parameters are set in phoneme_classifier.py.
+# every module that shapes the output file is listed, a change to any of them must never serve stale features
+config_files = [os.path.join(phoneme_classifier_dir, "phoneme_classifier.py"),
+                os.path.join(front_end_dir, "audio.py"),
+                os.path.join(front_end_dir, "extract_features.py"),
+                os.path.join(front_end_dir, "feature_format.py"),
+                os.path.join(front_end_dir, "acoustic_features.py"),
+                os.path.join(phoneme_classifier_dir, "lib/mfcc.py"),
+                os.path.join(phoneme_classifier_dir, "lib/phoneme_scores.py"),
+                os.path.join(phoneme_classifier_dir, "config/htk.config"),
+                os.path.join(phoneme_classifier_dir, "config/mfcc.stats"),
+                os.path.join(phoneme_classifier_dir, "config/phonemes_39")]
+# the binaries are identified by their size and modification time only
+config_binaries = [os.path.join(front_end_dir, "bin/VowelDurationFrontEnd"),
+                   os.path.join(phoneme_classifier_dir, "bin/PhonemeFrameBasedDecode")]
+entry_extension = ".data"
+
+# the hash of the configuration files, computed once per process
+config_digest = None
+
+
+def is_enabled():
+    return cache_size_mb > 0
+
+
+def hash_file(sha, path, block_size=1 << 20):
+    fid = open(path, 'rb')
+    block = fid.read(block_size)
+    while block:
+        sha.update(block)
+        block = fid.read(block_size)
+    fid.close()
+
+
+def get_config_digest():
+    global config_digest
+    if config_digest is None:
+        sha = hashlib.sha1()
+        for path in config_files:
+            if os.path.exists(path):
+                hash_file(sha, path)
+        for path in config_binaries:
+            if os.path.exists(path):
+                stat = os.stat(path)
+                sha.update("%s %d %d" % (os.path.basename(path), stat.st_size, int(stat.st_mtime)))
+        config_digest = sha.hexdigest()
+    return config_digest
+
+
+# input: wav_file - the wav file the features are extracted from
+#        params   - the parameters of the extraction that are not in the configuration files
+# output: the key of the features of this wav file
+def get_key(wav_file, params=""):
+    sha = hashlib.sha1()
+    sha.update(get_config_digest())
+    sha.update(str(params))
+    hash_file(sha, wav_file)
+    return sha.hexdigest()
+
+
+def get_entry_path(key):
+    return os.path.join(cache_dir, key + entry_extension)
+
+
+# copies the cached features into output_data, returns False on a miss
+def load(key, output_data):
+    entry = get_entry_path(key)
+    try:
+        shutil.copyfile(entry, output_data)
+        # mark the entry as recently used
+        os.utime(entry, None)
+    except (IOError, OSError):
+        # a miss, or the entry was evicted by another process while copying
+        return False
+    return True
+
+
+# adds the features file to the cache and evicts the least recently used entries if the cache is too big
+def store(key, data_file):
+    if not os.path.exists(data_file):
+        return
+    try:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        # write to a temporary file first so other processes never read a partial entry
+        fd, tmp_entry = tempfile.mkstemp(prefix=".tmp_", dir=cache_dir)
+        os.close(fd)
+        shutil.copyfile(data_file, tmp_entry)
+        os.rename(tmp_entry, get_entry_path(key))
+        evict()
+    except (IOError, OSError) as e:
+        print "Warning: could not cache the features of %s: %s" % (data_file, e)
+
+
+def evict():
+    entries = list()
+    total_size = 0
+    for item in os.listdir(cache_dir):
+        if not item.endswith(entry_extension):
+            continue
+        try:
+            stat = os.stat(os.path.join(cache_dir, item))
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, item))
+        total_size += stat.st_size
+
+    max_size = cache_size_mb * 1024 * 1024
+    entries.sort()
+    for mtime, size, item in entries:
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, item))
+        except OSError:
+            pass
+        total_size -= size
+
+
+def clear():
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
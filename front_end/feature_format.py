@@ -0,0 +1,174 @@
+# coding=utf-8
+# !/usr/bin/env python
+
+import os
+import sys
+import struct
+import argparse
+import numpy as np
+
+__author__ = 'yossiadi'
+
+# the .data features files are either text, a line of space separated values per frame, or a float32 binary
+# container that is read without parsing (np.memmap here, back_end/src/VowelFeaturesReader.java in the back end).
+# the binary layout, all little endian:
+#   0  magic "VDFT"
+#   4  uint32 version
+#   8  uint32 number of frames
+#   12 uint32 number of columns
+#   16 float32 frame rate, frames per second
+#   20 uint32 data offset, the size of the header
+#   24 uint32 size of the column names
+#   28 uint32 reserved
+#   32 the column names separated by new lines, zero padded up to the data offset
+#   the frames x columns float32 values, row after row
+# the readers find the format by the magic, so a manifest may mix text and binary files
+
+# consts
+magic = "VDFT"
+version = 1
+fixed_header_size = 32
+header_format = "<4sIIIfIII"
+# the data is aligned so it can be mapped as float32 values
+data_alignment = 16
+# the acoustic features are computed every 5ms
+frame_rate = 200.0
+columns = ["short_term_energy", "total_energy", "low_energy", "high_energy", "wiener_entropy", "auto_correlation",
+           "pitch", "voicing", "zero_crossing", "is_vowel", "is_nasal", "is_glide", "is_sil", "sum_vowels",
+           "sum_nasals", "sum_glides", "ceps_dist_1", "ceps_dist_2", "ceps_dist_3", "ceps_dist_4", "f1", "f2"]
+# enough digits that a float32 value is the same after a text round trip
+text_format = "%.10g"
+formats = ["text", "binary"]
+
+
+def get_columns(num_columns):
+    return columns[:num_columns] + ["column_%d" % i for i in range(len(columns), num_columns)]
+
+
+def is_binary(data_file):
+    fid = open(data_file, 'rb')
+    head = fid.read(len(magic))
+    fid.close()
+    return head == magic
+
+
+# returns the header of a binary features file as a dictionary
+def read_header(data_file):
+    fid = open(data_file, 'rb')
+    fixed = fid.read(fixed_header_size)
+    if len(fixed) < fixed_header_size or fixed[:len(magic)] != magic:
+        fid.close()
+        raise ValueError("not a binary features file: %s" % data_file)
+    _, file_version, num_frames, num_columns, rate, data_offset, names_size, _ = struct.unpack(header_format, fixed)
+    names = fid.read(names_size)
+    fid.close()
+    if file_version > version:
+        raise ValueError("unsupported features file version %d: %s" % (file_version, data_file))
+    return {"version": file_version, "num_frames": num_frames, "num_columns": num_columns, "frame_rate": rate,
+            "data_offset": data_offset, "columns": names.split("\n") if names else []}
+
+
+# input: data       - matrix of frames x features
+#        data_file  - the output file
+#        names      - the names of the columns, by default the names of the .data columns
+def write_binary(data, data_file, names=None, rate=frame_rate):
+    data = np.asarray(data, dtype='<f4').reshape(len(data), -1)
+    if names is None:
+        names = get_columns(data.shape[1])
+    names = "\n".join(names)
+    data_offset = fixed_header_size + len(names)
+    data_offset += -data_offset % data_alignment
+    fid = open(data_file, 'wb')
+    fid.write(struct.pack(header_format, magic, version, data.shape[0], data.shape[1], rate, data_offset, len(names),
+                          0))
+    fid.write(names)
+    fid.write("\0" * (data_offset - fixed_header_size - len(names)))
+    fid.write(data.tostring())
+    fid.close()
+
+
+# the frames x features matrix of a binary file, memory mapped unless mmap is False
+def read_binary(data_file, mmap=True):
+    header = read_header(data_file)
+    shape = (header["num_frames"], header["num_columns"])
+    if shape[0] == 0:
+        return np.zeros(shape, dtype='<f4')
+    if mmap:
+        return np.memmap(data_file, dtype='<f4', mode='r', offset=header["data_offset"], shape=shape)
+    fid = open(data_file, 'rb')
+    fid.seek(header["data_offset"])
+    data = np.fromstring(fid.read(shape[0] * shape[1] * 4), dtype='<f4').reshape(shape)
+    fid.close()
+    return data
+
+
+# the values of a text file, the number of columns is the number of values in its first line
+def read_text(data_file):
+    fid = open(data_file)
+    first_line = fid.readline()
+    num_columns = len(first_line.split())
+    values = np.fromstring(first_line + " " + fid.read(), sep=" ")
+    fid.close()
+    if num_columns == 0:
+        return np.zeros((0, 0))
+    return values.reshape(-1, num_columns)
+
+
+def write_text(data, data_file):
+    np.savetxt(data_file, data, fmt=text_format)
+
+
+# reads a features file of either format
+def read(data_file, mmap=True):
+    if is_binary(data_file):
+        return read_binary(data_file, mmap)
+    return read_text(data_file)
+
+
+def write(data, data_file, data_format="text"):
+    if data_format == "binary":
+        write_binary(data, data_file)
+    else:
+        write_text(data, data_file)
+
+
+# converts the file to the given format, output_file may be the input file itself
+def convert(data_file, output_file, data_format):
+    data = np.array(read(data_file, mmap=False))
+    write(data, output_file, data_format)
+
+
+def main(inputs, data_format, output_dir=None, extension=".data"):
+    # the files of the directories are converted too
+    data_files = list()
+    for item in inputs:
+        if os.path.isdir(item):
+            data_files += sorted(os.path.join(item, f) for f in os.listdir(item) if f.endswith(extension))
+        else:
+            data_files.append(item)
+
+    if output_dir is not None and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    for data_file in data_files:
+        output_file = data_file if output_dir is None else os.path.join(output_dir, os.path.basename(data_file))
+        convert(data_file, output_file, data_format)
+    print "converted %d files to %s" % (len(data_files), data_format)
+
+
+if __name__ == "__main__":
+    # the arguments are .data files or directories of .data files
+    # -------------MENU-------------- #
+    # command line arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="+", help="The features files or directories to convert")
+    parser.add_argument("--to", default="binary", choices=formats, help="The format to convert to")
+    parser.add_argument("--output_dir", default=None,
+                        help="The directory of the converted files, by default they are converted in place")
+    args = parser.parse_args()
+
+    # main function
+    try:
+        main(args.inputs, args.to, args.output_dir)
+    except ValueError as e:
+        print >> sys.stderr, e
+        sys.exit(1)
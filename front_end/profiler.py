@@ -0,0 +1,167 @@
+# coding=utf-8
+# !/usr/bin/env python
+
+import os
+import sys
+import csv
+import json
+import time
+import resource
+from subprocess import Popen
+
+__author__ = 'yossiadi'
+
+# records the wall time, the cpu time and the peak memory of every stage of a prediction.
+# external programs are measured with wait4, so their cpu time and peak rss are their own (including the programs
+# they start), stages that run inside python are measured with getrusage on the current process.
+# nothing is recorded unless a profile was started
+fields = ["file", "stage", "wall_s", "user_s", "sys_s", "max_rss_kb"]
+
+# the profile the stages are recorded into, None when profiling is off
+current = None
+
+
+class Profile(object):
+    def __init__(self, file_name=""):
+        self.file_name = file_name
+        self.records = list()
+        # the names of the groups the current stage is part of, see group
+        self.prefix = ""
+
+    def add(self, stage, wall_s, user_s, sys_s, max_rss_kb):
+        self.records.append({"file": self.file_name, "stage": self.prefix + stage, "wall_s": wall_s,
+                             "user_s": user_s, "sys_s": sys_s, "max_rss_kb": max_rss_kb})
+
+    # adds the records of another process (e.g. the phoneme classifier), their stage names get the prefix
+    def extend(self, records, prefix=""):
+        for record in records:
+            self.add(prefix + record["stage"], record["wall_s"], record["user_s"], record["sys_s"],
+                     record["max_rss_kb"])
+
+
+def start(file_name=""):
+    global current
+    current = Profile(file_name)
+    return current
+
+
+def stop():
+    global current
+    profile = current
+    current = None
+    return profile
+
+
+def is_active():
+    return current is not None
+
+
+# ru_maxrss is in kilobytes on linux and in bytes on mac
+def rss_kb(max_rss):
+    if sys.platform == "darwin":
+        return max_rss / 1024
+    return max_rss
+
+
+# runs a shell command and records it as a stage, returns its exit code
+def call(command, stage, cwd=None):
+    start_time = time.time()
+    process = Popen(command, shell=True, cwd=cwd)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    if current is not None:
+        current.add(stage, time.time() - start_time, usage.ru_utime, usage.ru_stime, rss_kb(usage.ru_maxrss))
+    return process.returncode
+
+
+# records the code between start and stop, or inside a with block, as a stage
+class stage(object):
+    def __init__(self, name):
+        self.name = name
+
+    def start(self):
+        self.start_time = time.time()
+        self.start_usage = resource.getrusage(resource.RUSAGE_SELF)
+
+    def stop(self):
+        if current is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            current.add(self.name, time.time() - self.start_time, usage.ru_utime - self.start_usage.ru_utime,
+                        usage.ru_stime - self.start_usage.ru_stime, rss_kb(usage.ru_maxrss))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+# a stage made of sub stages, the stages inside it are recorded as <name>/<stage>
+class group(stage):
+    def start(self):
+        stage.start(self)
+        if current is not None:
+            self.prefix = current.prefix
+            current.prefix += self.name + "/"
+
+    def stop(self):
+        if current is not None and hasattr(self, "prefix"):
+            current.prefix = self.prefix
+        stage.stop(self)
+
+
+def write_json(records, path):
+    fid = open(path, 'w')
+    json.dump(records, fid, indent=1)
+    fid.close()
+
+
+def read_json(path):
+    fid = open(path)
+    records = json.load(fid)
+    fid.close()
+    return records
+
+
+def write_csv(records, path):
+    fid = open(path, 'wb')
+    writer = csv.DictWriter(fid, fields)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+    fid.close()
+
+
+# a table with the totals of every stage, ordered by the total wall time
+def summary(records):
+    stages = dict()
+    order = list()
+    for record in records:
+        if record["stage"] not in stages:
+            stages[record["stage"]] = {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_rss_kb": 0}
+            order.append(record["stage"])
+        total = stages[record["stage"]]
+        total["count"] += 1
+        total["wall_s"] += record["wall_s"]
+        total["cpu_s"] += record["user_s"] + record["sys_s"]
+        total["max_rss_kb"] = max(total["max_rss_kb"], record["max_rss_kb"])
+
+    # the sub stages are part of their parent stage, so only the top level stages sum up to the total
+    total_wall = sum(stages[name]["wall_s"] for name in order if "/" not in name)
+    lines = ["%-36s %6s %10s %10s %10s %7s %12s" % ("stage", "count", "wall_s", "mean_s", "cpu_s", "wall_%",
+                                                   "max_rss_kb")]
+    for name in sorted(order, key=lambda n: -stages[n]["wall_s"]):
+        total = stages[name]
+        lines.append("%-36s %6d %10.3f %10.3f %10.3f %7.1f %12d" % (
+            name, total["count"], total["wall_s"], total["wall_s"] / total["count"], total["cpu_s"],
+            100.0 * total["wall_s"] / total_wall if total_wall > 0 else 0.0, total["max_rss_kb"]))
+    return "\n".join(lines)
+
+
+# writes <prefix>.json and <prefix>.csv and prints the summary table
+def report(records, prefix):
+    write_json(records, prefix + ".json")
+    write_csv(records, prefix + ".csv")
+    print summary(records)
@@ -2,18 +2,22 @@ import os
 import sys
 import shutil
 import argparse
-from subprocess import call
+import tempfile
 import front_end.extract_features as fe
+import front_end.profiler as profiler
 import utils.run_back_end as model
 import utils.label2textgrid as l2t
 
 __author__ = 'yossiadi'
 
+# paths are resolved from the repository directory, so predictions never depend on the current directory
+root_dir = os.path.dirname(os.path.abspath(__file__))
 
-# run system commands
-def easy_call(command):
+
+# run system commands, stage is the name the command is recorded under when profiling
+def easy_call(command, stage="command"):
     try:
-        call(command, shell=True)
+        profiler.call(command, stage)
     except Exception as exception:
         print "Error: could not execute the following"
         print ">>", command
@@ -22,63 +26,64 @@ def easy_call(command):
         exit(-1)
 
 
-def main(wav_file_name, output_text_grid_file):
-    try:
-        # convert the wav file to 16khz sample rate
-        print "Converting the wav file to 16khz sample rate"
-        new_file_wav_file = wav_file_name.replace(".wav", "_16.wav")
-        cmd = "utils/sbin/sox %s -r 16000 %s" % (wav_file_name, new_file_wav_file)
-        easy_call(cmd)
-        back_up = wav_file_name
-        wav_file_name = new_file_wav_file
-
-        # consts
-        tmp_dir = "tmp_data/"
-        tmp_data_file = "tmp.data"
-        tmp_labels_file = "tmp.labels"
-
-        # clean temporary files
-        if os.path.exists(tmp_dir):
-            shutil.rmtree(tmp_dir)
+# extracts the features of the wav file into tmp_dir, the front end decodes and resamples it to 16khz in process
+# classifier: run the phoneme classifier, without it the features are for the no classifier model
+# returns the wav file and the features file, None on error
+def extract(wav_file_name, tmp_dir, classifier=True):
+    # consts
+    tmp_data_file = "tmp.data"
 
-        # validation
-        if not os.path.exists(wav_file_name):
-            print >>sys.stderr, "wav file does not exits"
-            return
-        if not os.path.exists(tmp_dir):
-            os.mkdir(tmp_dir)
+    # validation
+    if not os.path.exists(wav_file_name):
+        print >>sys.stderr, "wav file does not exits"
+        return None
+
+    data_filename = os.path.join(tmp_dir, tmp_data_file)
+    abs_wav_filename = os.path.abspath(wav_file_name)
+
+    # extract the features - the front end part
+    fe.main(abs_wav_filename, data_filename, tmp_dir, classifier=classifier)
+    return abs_wav_filename, data_filename
 
-        data_filename = os.path.abspath(tmp_dir+tmp_data_file)
-        labels_filename = os.path.abspath(tmp_dir+tmp_labels_file)
-        abs_wav_filename = os.path.abspath(wav_file_name)
-        abs_text_grid_path = os.path.abspath(output_text_grid_file)
 
-        # extract the features - the front end part
-        os.chdir("front_end/")
-        fe.main(abs_wav_filename, data_filename)
-        os.chdir("../")
+# scratch_dir: the directory in which the temporary files of this prediction are created, every prediction
+# gets its own sub directory in it so a few predictions can run side by side
+# native: decode with the numpy port of the back end (utils/vowel_inference.py) instead of the JVM
+# classifier: when False the phoneme classifier is skipped and the no classifier model predicts
+def main(wav_file_name, output_text_grid_file, scratch_dir=None, native=False, classifier=True):
+    # consts
+    tmp_dir = tempfile.mkdtemp(prefix="tmp_data_", dir=scratch_dir)
+    tmp_labels_file = "tmp.labels"
+
+    try:
+        extracted = extract(wav_file_name, tmp_dir, classifier)
+        if extracted is None:
+            return False
+        abs_wav_filename, data_filename = extracted
+        labels_filename = os.path.join(tmp_dir, tmp_labels_file)
+        abs_text_grid_path = os.path.abspath(output_text_grid_file)
 
-        os.chdir("utils/")
         # predict the vowel onset and offset
-        model.main(data_filename, labels_filename)
+        if not classifier:
+            if native:
+                model.main_native(data_filename, labels_filename, model.no_classifier_model, "no_classifier")
+            elif not model.main_no_classifier(data_filename, labels_filename, tmp_dir):
+                return False
+        elif native:
+            model.main_native(data_filename, labels_filename)
+        else:
+            model.main(data_filename, labels_filename, tmp_dir)
         # convert the predictions into text grid file
-        l2t.main(labels_filename, abs_wav_filename, abs_text_grid_path)
-        os.chdir("../")
-        
+        with profiler.stage("textgrid"):
+            l2t.main(labels_filename, abs_wav_filename, abs_text_grid_path)
+
     except Exception as e:
         print(e.message)
-        # remove leftovers
-        if os.path.exists(tmp_dir):
-            shutil.rmtree(tmp_dir)
-        if os.path.exists(wav_file_name):
-            os.remove(wav_file_name)
         return False
     finally:
         # remove leftovers
         if os.path.exists(tmp_dir):
             shutil.rmtree(tmp_dir)
-        if os.path.exists(wav_file_name):
-            os.remove(wav_file_name)
     return True
 
 if __name__ == "__main__":
@@ -89,7 +94,16 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("wav_file_name", help="The wav file")
     parser.add_argument("output_text_grid_file", help="The output text grid file")
+    parser.add_argument("--profile", default="", help="Record the time and memory of every stage into "
+                                                      "<profile>.json and <profile>.csv")
+    parser.add_argument("--native", action="store_true", help="Decode in python instead of running the java back end")
+    parser.add_argument("--no_classifier", action="store_true",
+                        help="Skip the phoneme classifier and predict with the no classifier model")
     args = parser.parse_args()
 
     # main function
-    main(args.wav_file_name, args.output_text_grid_file)
+    if args.profile:
+        profiler.start(args.wav_file_name)
+    main(args.wav_file_name, args.output_text_grid_file, native=args.native, classifier=not args.no_classifier)
+    if args.profile:
+        profiler.report(profiler.stop().records, args.profile)
@@ -1,23 +1,135 @@
 import argparse
 import os
+import shutil
+import tempfile
+from multiprocessing import Pool
 
-from predict import main
+from predict import main, extract
+import front_end.profiler as profiler
+import utils.run_back_end as model
+import utils.label2textgrid as l2t
 
+# the scratch directory of the current worker process, set by init_worker
+worker_scratch_dir = None
+# when set every file is profiled, the workers return the records with the results
+worker_profile = False
+# when cleared the phoneme classifier is skipped and the no classifier model predicts
+worker_classifier = True
 
-def run_dir(in_path, out_path):
-    f = open('error.txt', 'w')
-    cwd = os.getcwd()
+
+def init_worker(scratch_root, profile=False, classifier=True):
+    global worker_scratch_dir, worker_profile, worker_classifier
+    worker_scratch_dir = tempfile.mkdtemp(prefix="worker_", dir=scratch_root)
+    worker_profile = profile
+    worker_classifier = classifier
+
+
+def start_profile(file_name):
+    if worker_profile:
+        profiler.start(file_name)
+
+
+def stop_profile():
+    profile = profiler.stop()
+    return profile.records if profile is not None else []
+
+
+def predict_file(paths):
+    wav_path, out_file_path = paths
+    start_profile(wav_path)
+    result = main(wav_path, out_file_path, worker_scratch_dir, classifier=worker_classifier)
+    return wav_path, result, stop_profile()
+
+
+# runs only the front end, the features stay in the worker scratch directory until the chunk is scored
+def extract_file(paths):
+    wav_path, out_file_path = paths
+    tmp_dir = tempfile.mkdtemp(prefix="tmp_data_", dir=worker_scratch_dir)
+    start_profile(wav_path)
+    try:
+        extracted = extract(wav_path, tmp_dir, worker_classifier)
+    except Exception as e:
+        print(e.message)
+        extracted = None
+    return wav_path, out_file_path, tmp_dir, extracted, stop_profile()
+
+
+# extracts the features of a chunk of files and scores all of them in a single JVM
+# returns the wav files that failed and the profile records of the chunk
+def predict_chunk(tasks, pool):
+    if pool is not None:
+        extracted = pool.map(extract_file, tasks)
+    else:
+        extracted = [extract_file(t) for t in tasks]
+    records = [record for item in extracted for record in item[4]]
+
+    errors = [item[0] for item in extracted if item[3] is None]
+    extracted = [item[:4] for item in extracted if item[3] is not None]
+    data_files = [e[1] for _, _, _, e in extracted]
+    labels_files = [os.path.join(tmp_dir, "tmp.labels") for _, _, tmp_dir, _ in extracted]
+    # the back end scores the whole chunk at once, so it is recorded once for the chunk
+    start_profile("chunk of %d files" % len(data_files))
+    if worker_classifier:
+        failed = set(model.main_batch(data_files, labels_files, worker_scratch_dir))
+    else:
+        failed = set(model.main_batch(data_files, labels_files, worker_scratch_dir, model.no_classifier_model,
+                                      "no_classifier"))
+
+    for wav_path, out_file_path, tmp_dir, e in extracted:
+        if os.path.abspath(e[1]) in failed:
+            errors.append(wav_path)
+        else:
+            with profiler.stage("textgrid"):
+                l2t.main(os.path.join(tmp_dir, "tmp.labels"), e[0], os.path.abspath(out_file_path))
+        shutil.rmtree(tmp_dir)
+    return errors, records + stop_profile()
+
+
+# jobs: the number of worker processes, each one works in its own scratch directory
+# batch: when positive, the files are scored in chunks of this size, a single JVM per chunk
+# profile: when set, the time and memory of every stage are written to <profile>.json and <profile>.csv
+# classifier: when False the phoneme classifier is skipped and the no classifier model predicts
+def run_dir(in_path, out_path, jobs=1, batch=0, profile="", classifier=True):
+    tasks = list()
     for item in os.listdir(in_path):
-        os.chdir(cwd)
-        e = True
         if item.endswith('.wav'):
-            out_file_path = out_path + item.replace('.wav', '.TextGrid')
+            out_file_path = os.path.join(out_path, item.replace('.wav', '.TextGrid'))
             if not os.path.exists(out_file_path):
-                e = main(in_path + item, out_file_path)
-        if not e:
-            f.write(item+'\n')
-            print('ERROR with file: ' + item)
-    f.close()
+                tasks.append((os.path.join(in_path, item), out_file_path))
+
+    f = open('error.txt', 'w')
+    scratch_root = tempfile.mkdtemp(prefix="predict_dir_")
+    pool = None
+    records = list()
+    try:
+        init_worker(scratch_root, bool(profile), classifier)
+        if jobs > 1:
+            pool = Pool(jobs, initializer=init_worker, initargs=(scratch_root, bool(profile), classifier))
+        if batch > 0:
+            errors = list()
+            for i in range(0, len(tasks), batch):
+                chunk_errors, chunk_records = predict_chunk(tasks[i:i + batch], pool)
+                errors += chunk_errors
+                records += chunk_records
+            results = ((wav_path, False, []) for wav_path in errors)
+        elif pool is not None:
+            results = pool.imap_unordered(predict_file, tasks)
+        else:
+            results = (predict_file(t) for t in tasks)
+        for wav_path, e, file_records in results:
+            records += file_records
+            if not e:
+                item = os.path.basename(wav_path)
+                f.write(item+'\n')
+                print('ERROR with file: ' + item)
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if profile:
+            profiler.report(records, profile)
+    finally:
+        f.close()
+        shutil.rmtree(scratch_root)
 
 if __name__ == "__main__":
     # the first argument is the wav file path
@@ -27,7 +139,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("in_dir", help="The input directory")
     parser.add_argument("out_dir", help="The output directory")
+    parser.add_argument("--jobs", type=int, default=1, help="The number of files to process in parallel")
+    parser.add_argument("--batch", type=int, default=0, help="Score the files in chunks of this size, a single "
+                                                             "JVM per chunk instead of one per file")
+    parser.add_argument("--profile", default="", help="Record the time and memory of every stage of every file "
+                                                      "into <profile>.json and <profile>.csv")
+    parser.add_argument("--no_classifier", action="store_true",
+                        help="Skip the phoneme classifier and predict with the no classifier model")
     args = parser.parse_args()
 
     # main function
-    run_dir(args.in_dir, args.out_dir)
+    run_dir(args.in_dir, args.out_dir, args.jobs, args.batch, args.profile, not args.no_classifier)
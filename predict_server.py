@@ -0,0 +1,167 @@
+import os
+import json
+import wave
+import shutil
+import argparse
+import tempfile
+import threading
+from subprocess import Popen, PIPE
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from urlparse import urlparse, parse_qs
+
+from predict import extract
+import utils.run_back_end as model
+import utils.build_back_end as build_back_end
+import utils.label2textgrid as l2t
+
+# every feature frame is 5 ms
+frame_ms = 5
+
+
+# a single JVM with the model loaded, the data files are written to it one at a time
+class BackEnd(object):
+    def __init__(self, model_file, feature_set="classifier", tmp_dir=None):
+        if not build_back_end.ensure("predict_server"):
+            raise RuntimeError("the back end jar has no predict_server, run utils/build_back_end.py")
+        self.work_dir = model.create_work_dir(tmp_dir)
+        self.labels_path = os.path.join(self.work_dir, "tmp.txt")
+        model.write_dummy_labels(self.labels_path)
+        runnable_jar = os.path.join(model.back_end_dir, "run_vowel_predict_server.sh")
+        self.process = Popen(["sh", runnable_jar, os.path.join(model.back_end_dir, model_file), feature_set],
+                             cwd=self.work_dir, stdin=PIPE, stdout=PIPE)
+        self.lock = threading.Lock()
+
+    # returns the onset frame, the offset frame and the score, None on error
+    def predict(self, data_filename):
+        with self.lock:
+            self.process.stdin.write(os.path.abspath(data_filename) + " " + self.labels_path + "\n")
+            self.process.stdin.flush()
+            # skip the log lines of the back end
+            line = self.process.stdout.readline()
+            while line and not line.startswith("RESULT ") and not line.startswith("ERROR "):
+                line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("the back end process exited")
+        values = line.split()
+        if values[0] == "ERROR":
+            return None
+        return l2t.parse_prediction(values[2])
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+        shutil.rmtree(self.work_dir)
+
+
+class PredictServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, back_end, scratch_dir):
+        HTTPServer.__init__(self, address, PredictHandler)
+        self.back_end = back_end
+        self.scratch_dir = scratch_dir
+
+
+# POST /predict with one of the following bodies:
+#   application/json  - {"wav": "<path of a wav file>"}
+#   a wav file        - the bytes of the file
+#   raw pcm           - signed little endian samples, ?rate=16000&channels=1&width=2 describe them
+# ?format=textgrid returns the TextGrid instead of the onset and offset in milliseconds
+class PredictHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self.send_result(200, "application/json", json.dumps({"status": "ok"}))
+        else:
+            self.send_result(404, "application/json", json.dumps({"error": "not found"}))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/predict":
+            self.send_result(404, "application/json", json.dumps({"error": "not found"}))
+            return
+        query = parse_qs(url.query)
+        tmp_dir = tempfile.mkdtemp(prefix="tmp_data_", dir=self.server.scratch_dir)
+        try:
+            body = self.rfile.read(int(self.headers.getheader("Content-Length", 0)))
+            wav_file_name = self.read_wav(body, query, tmp_dir)
+            extracted = extract(wav_file_name, tmp_dir)
+            result = None if extracted is None else self.server.back_end.predict(extracted[1])
+            if result is None:
+                self.send_result(500, "application/json", json.dumps({"error": "could not predict the vowel"}))
+                return
+            onset, offset, score = result
+            if query.get("format", ["json"])[0] == "textgrid":
+                labels_filename = os.path.join(tmp_dir, "tmp.labels")
+                text_grid_filename = os.path.join(tmp_dir, "tmp.TextGrid")
+                fid = open(labels_filename, 'w')
+                fid.write("%s %d-%d:%f\n" % (wav_file_name, onset, offset, score))
+                fid.close()
+                l2t.main(labels_filename, extracted[0], text_grid_filename)
+                self.send_result(200, "text/plain", open(text_grid_filename).read())
+            else:
+                self.send_result(200, "application/json", json.dumps({
+                    "onset_ms": onset * frame_ms, "offset_ms": offset * frame_ms,
+                    "duration_ms": (offset - onset) * frame_ms, "score": score}))
+        except Exception as e:
+            self.send_result(400, "application/json", json.dumps({"error": str(e)}))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    # returns the path of the wav file described by the request
+    def read_wav(self, body, query, tmp_dir):
+        content_type = self.headers.getheader("Content-Type", "")
+        if content_type.startswith("application/json"):
+            wav_file_name = json.loads(body)["wav"]
+            if not os.path.exists(wav_file_name):
+                raise ValueError("wav file does not exits")
+            return wav_file_name
+
+        wav_file_name = os.path.join(tmp_dir, "input.wav")
+        if body[:4] == "RIFF":
+            fid = open(wav_file_name, 'wb')
+            fid.write(body)
+            fid.close()
+        else:
+            wav_file = wave.open(wav_file_name, 'wb')
+            wav_file.setnchannels(int(query.get("channels", [1])[0]))
+            wav_file.setsampwidth(int(query.get("width", [2])[0]))
+            wav_file.setframerate(int(query.get("rate", [16000])[0]))
+            wav_file.writeframes(body)
+            wav_file.close()
+        return wav_file_name
+
+    def send_result(self, code, content_type, content):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def main(port, model_file, feature_set, host="127.0.0.1"):
+    scratch_dir = tempfile.mkdtemp(prefix="predict_server_")
+    back_end = BackEnd(model_file, feature_set, scratch_dir)
+    server = PredictServer((host, port), back_end, scratch_dir)
+    print "Serving predictions on http://%s:%d/predict" % (host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        back_end.close()
+        shutil.rmtree(scratch_dir)
+
+if __name__ == "__main__":
+    # -------------MENU-------------- #
+    # command line arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8080, help="The port to listen on (localhost only)")
+    parser.add_argument("--model", default=model.default_model, help="The model file, relative to utils/back_end")
+    parser.add_argument("--feature_set", default="classifier", choices=["classifier", "no_classifier"],
+                        help="The feature functions the model was trained with")
+    args = parser.parse_args()
+
+    # main function
+    main(args.port, args.model, args.feature_set)
@@ -1,2 +1,4 @@
 #!/bin/bash
-java -jar -Xms1024M -Xmx1024M back_end.jar
+# the jar reads res/files.txt and models/ relative to the current directory,
+# the jar itself is resolved next to this script
+java -jar -Xms1024M -Xmx1024M "$(dirname "$0")/back_end.jar"
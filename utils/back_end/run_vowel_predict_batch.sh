@@ -0,0 +1,4 @@
+#!/bin/bash
+# scores all the files of a manifest in a single JVM
+# usage: run_vowel_predict_batch.sh <manifest> <model> <output file> [classifier|no_classifier] [threads] [top k] [margin] [stride]
+java -Xms1024M -Xmx1024M -cp "$(dirname "$0")/back_end.jar" predict_batch "$@"
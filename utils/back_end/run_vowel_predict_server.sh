@@ -0,0 +1,4 @@
+#!/bin/bash
+# keeps the model loaded and scores the data files written to its standard input
+# usage: run_vowel_predict_server.sh <model> [classifier|no_classifier]
+exec java -Xms1024M -Xmx1024M -cp "$(dirname "$0")/back_end.jar" predict_server "$@"
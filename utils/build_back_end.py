@@ -0,0 +1,157 @@
+# coding=utf-8
+# !/usr/bin/env python
+
+import os
+import sys
+import shutil
+import zipfile
+import hashlib
+import argparse
+import tempfile
+import subprocess
+
+__author__ = 'yossiadi'
+
+# builds utils/back_end/back_end.jar from the sources of back_end/src: the classes are compiled with javac against the
+# libraries of back_end/lib and packed with them into a single jar, as the released jar is.
+# the jar records the hash of the sources it was built from, the python wrappers of the back end call ensure() before
+# they start a JVM, so a jar that is older than the sources is rebuilt first when a JDK is installed.
+
+# consts
+package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+src_dir = os.path.join(package_dir, "back_end/src")
+lib_dir = os.path.join(package_dir, "back_end/lib")
+jar_file = os.path.join(package_dir, "utils/back_end/back_end.jar")
+manifest_entry = "META-INF/MANIFEST.MF"
+sources_entry = "META-INF/back_end.sources.sha1"
+# the released jar runs on java 8
+javac_options = ["-encoding", "UTF-8", "-nowarn", "-source", "1.8", "-target", "1.8"]
+
+# whether the jar is built from the current sources, checked once per process
+is_current = None
+
+
+def source_files():
+    return sorted(os.path.join(src_dir, item) for item in os.listdir(src_dir) if item.endswith(".java"))
+
+
+def library_jars():
+    return sorted(os.path.join(lib_dir, item) for item in os.listdir(lib_dir) if item.endswith(".jar"))
+
+
+# the hash of the sources, the manifest and the libraries the jar is built from
+def sources_digest():
+    sha = hashlib.sha1()
+    for path in source_files() + [os.path.join(src_dir, manifest_entry)] + library_jars():
+        sha.update(os.path.relpath(path, package_dir))
+        fid = open(path, 'rb')
+        sha.update(fid.read())
+        fid.close()
+    return sha.hexdigest()
+
+
+# the hash of the sources the jar was built from, None for the released jar
+def jar_digest(jar=jar_file):
+    if not os.path.exists(jar):
+        return None
+    archive = zipfile.ZipFile(jar)
+    try:
+        if sources_entry not in archive.namelist():
+            return None
+        return archive.read(sources_entry).strip()
+    finally:
+        archive.close()
+
+
+def has_class(main_class, jar=jar_file):
+    if not os.path.exists(jar):
+        return False
+    archive = zipfile.ZipFile(jar)
+    try:
+        return main_class + ".class" in archive.namelist()
+    finally:
+        archive.close()
+
+
+# the entries of the libraries that are not copied into the jar: their manifests and signatures
+def is_library_metadata(name):
+    return name == manifest_entry or (name.startswith("META-INF/") and
+                                      name.upper().endswith((".SF", ".RSA", ".DSA")))
+
+
+# compiles the sources and writes the jar, returns False when javac is missing or fails
+def build(output_jar=jar_file):
+    build_dir = tempfile.mkdtemp(prefix="back_end_build_")
+    try:
+        classes_dir = os.path.join(build_dir, "classes")
+        os.mkdir(classes_dir)
+        command = ["javac"] + javac_options + ["-cp", os.pathsep.join(library_jars()), "-d", classes_dir]
+        try:
+            status = subprocess.call(command + source_files())
+        except OSError as e:
+            print >> sys.stderr, "Error: could not run javac, a JDK is needed to build the back end: %s" % e
+            return False
+        if status != 0:
+            print >> sys.stderr, "Error: javac failed, %s was not built" % output_jar
+            return False
+
+        # the manifest and the classes of the sources first, then the libraries, the first copy of an entry is kept
+        fd, tmp_jar = tempfile.mkstemp(prefix=".tmp_", suffix=".jar", dir=os.path.dirname(output_jar))
+        os.close(fd)
+        archive = zipfile.ZipFile(tmp_jar, 'w', zipfile.ZIP_DEFLATED)
+        names = set()
+        archive.write(os.path.join(src_dir, manifest_entry), manifest_entry)
+        names.add(manifest_entry)
+        for root, _, files in os.walk(classes_dir):
+            for item in sorted(files):
+                name = os.path.relpath(os.path.join(root, item), classes_dir).replace(os.sep, "/")
+                archive.write(os.path.join(root, item), name)
+                names.add(name)
+        for library in library_jars():
+            library_archive = zipfile.ZipFile(library)
+            for info in library_archive.infolist():
+                if info.filename in names or info.filename.endswith("/") or is_library_metadata(info.filename):
+                    continue
+                archive.writestr(info, library_archive.read(info.filename))
+                names.add(info.filename)
+            library_archive.close()
+        archive.writestr(sources_entry, sources_digest() + "\n")
+        archive.close()
+        # other processes never run a partial jar
+        os.rename(tmp_jar, output_jar)
+    finally:
+        shutil.rmtree(build_dir)
+    print "built %s" % output_jar
+    return True
+
+
+# rebuilds the jar when it is older than the sources, returns whether main_class can run from it.
+# without a JDK an old jar is kept, main_class runs from it only when the jar has it (the released jar has test, train
+# and convert_models)
+def ensure(main_class="test"):
+    global is_current
+    if is_current is None:
+        is_current = jar_digest() == sources_digest() or build()
+        if not is_current:
+            print >> sys.stderr, "Warning: %s is older than back_end/src, run utils/build_back_end.py with a JDK " \
+                                 "installed" % jar_file
+    return is_current or has_class(main_class)
+
+
+def main(force=False):
+    if not force and jar_digest() == sources_digest():
+        print "%s is up to date" % jar_file
+        return True
+    return build()
+
+
+if __name__ == "__main__":
+    # -------------MENU-------------- #
+    # command line arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--force", action="store_true", help="Build the jar even when it is up to date")
+    args = parser.parse_args()
+
+    # main function
+    if not main(args.force):
+        sys.exit(1)
@@ -29,6 +29,23 @@ def get_wav_file_length(wav_file):
     return duration
 
 
+# the onset frame, the offset frame and the score of a prediction: <onset>-<offset>:<score>, as the back end writes
+# it after the path of the data file. the score is None when the prediction has none
+def parse_prediction(prediction):
+    label, _, score = prediction.partition(':')
+    onset, offset = label.split('-')
+    return float(onset), float(offset), float(score) if score else None
+
+
+# read the onset and offset frames of the vowel from a label file
+def read_onset_offset(label_path):
+    fid = open(label_path)
+    lines = fid.readlines()
+    fid.close()
+    onset, offset, _ = parse_prediction(lines[0].split()[1])
+    return onset, offset
+
+
 def main(label_path, wav_file, output_text_grid):
     # defines
     num_of_frames = 5
@@ -43,17 +60,12 @@ def main(label_path, wav_file, output_text_grid):
         return
 
     # read the label file and parse it
-    fid = open(label_path)
-    lines = fid.readlines()
-    values = lines[0].split()[1].split('-')
-    fid.close()
+    onset, offset = read_onset_offset(label_path)
 
     # extract length
     length = get_wav_file_length(wav_file)
 
     # create the TextGrid file and save it
-    onset = values[0]
-    offset = values[1].split(':')[0]
     text_grid = TextGrid()
 
     vowels_tier = IntervalTier(name='VOWEL', xmin=0.0, xmax=float(length))
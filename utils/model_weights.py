@@ -0,0 +1,226 @@
+# coding=utf-8
+# !/usr/bin/env python
+
+import os
+import sys
+import struct
+import argparse
+import numpy as np
+
+__author__ = 'yossiadi'
+
+# reads the weights of the back end models into a numpy array indexed by feature, and exports them to the dense
+# weights files of back_end/src/DenseWeights.java, which the back end and utils/vowel_inference.py both read.
+# the models StructEDModel.saveModel writes are a java serialized com.structed.data.entities.Vector, a HashMap from
+# the index of a feature (Integer) to its weight (Double), that stream is parsed here without a jvm.
+# the dense layout, all little endian:
+#   0  magic "VDWT"
+#   4  int32 version
+#   8  int32 number of weights
+#   12 the weights as float64
+
+# consts
+magic = "VDWT"
+version = 1
+header_format = "<4sii"
+dense_extension = ".dense"
+
+# the java serialization stream, see java.io.ObjectStreamConstants
+stream_magic = 0xaced
+tc_null = 0x70
+tc_reference = 0x71
+tc_classdesc = 0x72
+tc_object = 0x73
+tc_string = 0x74
+tc_blockdata = 0x77
+tc_endblockdata = 0x78
+base_handle = 0x7e0000
+sc_write_method = 0x01
+primitive_formats = {'B': '>b', 'C': '>H', 'D': '>d', 'F': '>f', 'I': '>i', 'J': '>q', 'S': '>h', 'Z': '>?'}
+
+
+# a minimal reader of the java serialization stream: the objects of a serialized Vector only, strings, class
+# descriptions, objects of serializable classes and the custom data of HashMap
+class JavaStream(object):
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.handles = list()
+
+    def read(self, fmt):
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return values[0] if len(values) == 1 else values
+
+    def read_utf(self):
+        length = self.read('>H')
+        value = self.data[self.pos:self.pos + length]
+        self.pos += length
+        return value
+
+    def new_handle(self, value):
+        self.handles.append(value)
+        return len(self.handles) - 1
+
+    def read_content(self):
+        tag = self.read('B')
+        if tag == tc_null:
+            return None
+        if tag == tc_reference:
+            return self.handles[self.read('>i') - base_handle]
+        if tag == tc_string:
+            value = self.read_utf()
+            self.new_handle(value)
+            return value
+        if tag == tc_classdesc:
+            return self.read_class_desc()
+        if tag == tc_object:
+            return self.read_object()
+        raise ValueError("unsupported java serialization tag 0x%02x at %d" % (tag, self.pos - 1))
+
+    def read_class_desc(self):
+        desc = {"name": self.read_utf()}
+        self.read('>q')  # serial version uid
+        handle = self.new_handle(desc)
+        desc["flags"] = self.read('B')
+        fields = list()
+        for _ in range(self.read('>H')):
+            type_code = chr(self.read('B'))
+            name = self.read_utf()
+            if type_code in ('L', '['):
+                self.read_content()  # the class name of the field
+            fields.append((type_code, name))
+        desc["fields"] = fields
+        # the class annotations
+        while self.read_content_or_end() is not None:
+            pass
+        desc["super"] = self.read_content()
+        self.handles[handle] = desc
+        return desc
+
+    # the next object of a block, None at the end of the block and the bytes of block data as a string
+    def read_content_or_end(self):
+        tag = struct.unpack_from('B', self.data, self.pos)[0]
+        if tag == tc_endblockdata:
+            self.pos += 1
+            return None
+        if tag == tc_blockdata:
+            self.pos += 1
+            length = self.read('B')
+            value = self.data[self.pos:self.pos + length]
+            self.pos += length
+            return value
+        return self.read_content()
+
+    def read_object(self):
+        desc = self.read_content()
+        obj = {"class": desc["name"]}
+        self.new_handle(obj)
+        hierarchy = list()
+        while desc is not None:
+            hierarchy.insert(0, desc)
+            desc = desc["super"]
+        # the fields of every class from the super class down, then the custom data of classes with writeObject
+        for desc in hierarchy:
+            for type_code, name in desc["fields"]:
+                if type_code in primitive_formats:
+                    obj[name] = self.read(primitive_formats[type_code])
+                else:
+                    obj[name] = self.read_content()
+            if desc["flags"] & sc_write_method:
+                block = list()
+                item = self.read_content_or_end()
+                while item is not None:
+                    block.append(item)
+                    item = self.read_content_or_end()
+                obj[desc["name"]] = block
+        return obj
+
+
+# the HashMap writeObject data: the number of buckets and the size, then the keys and the values
+def hash_map_items(obj):
+    block = obj["java.util.HashMap"]
+    _, size = struct.unpack('>ii', block[0])
+    items = block[1:]
+    return [(items[2 * i]["value"], items[2 * i + 1]["value"]) for i in range(size)]
+
+
+# the weights of a model saved by StructEDModel.saveModel
+def read_serialized(model_file):
+    fid = open(model_file, 'rb')
+    stream = JavaStream(fid.read())
+    fid.close()
+    if stream.read('>H') != stream_magic:
+        raise ValueError("not a serialized model: %s" % model_file)
+    stream.read('>H')  # the stream version
+    items = hash_map_items(stream.read_content())
+    weights = np.zeros(max([index for index, _ in items] + [-1]) + 1)
+    for index, value in items:
+        if index >= 0:
+            weights[index] = value
+    return weights
+
+
+def is_dense(model_file):
+    fid = open(model_file, 'rb')
+    head = fid.read(len(magic))
+    fid.close()
+    return head == magic
+
+
+def read_dense(model_file):
+    fid = open(model_file, 'rb')
+    head = fid.read(struct.calcsize(header_format))
+    file_magic, file_version, count = struct.unpack(header_format, head)
+    if file_magic != magic:
+        fid.close()
+        raise ValueError("not a dense weights file: %s" % model_file)
+    if file_version > version:
+        fid.close()
+        raise ValueError("unsupported weights file version %d: %s" % (file_version, model_file))
+    weights = np.fromstring(fid.read(8 * count), dtype='<f8')
+    fid.close()
+    return weights.astype(np.float64)
+
+
+def write_dense(weights, model_file):
+    weights = np.asarray(weights, dtype='<f8')
+    fid = open(model_file, 'wb')
+    fid.write(struct.pack(header_format, magic, version, len(weights)))
+    fid.write(weights.tostring())
+    fid.close()
+
+
+# reads the weights of a model of either format
+def load(model_file):
+    if is_dense(model_file):
+        return read_dense(model_file)
+    return read_serialized(model_file)
+
+
+def main(model_files, output_dir=None):
+    if output_dir is not None and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    for model_file in model_files:
+        name = os.path.splitext(os.path.basename(model_file))[0] + dense_extension
+        output_file = os.path.join(output_dir if output_dir is not None else os.path.dirname(model_file), name)
+        write_dense(load(model_file), output_file)
+        print "%s -> %s" % (model_file, output_file)
+
+
+if __name__ == "__main__":
+    # the arguments are .weights files of the back end
+    # -------------MENU-------------- #
+    # command line arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model_files", nargs="+", help="The models to export")
+    parser.add_argument("--output_dir", default=None,
+                        help="The directory of the dense weights files, by default next to every model")
+    args = parser.parse_args()
+
+    # main function
+    try:
+        main(args.model_files, args.output_dir)
+    except (ValueError, struct.error) as e:
+        print >> sys.stderr, e
+        sys.exit(1)
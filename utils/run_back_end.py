@@ -4,13 +4,25 @@ import os
 import sys
 import shutil
 import argparse
-from subprocess import call
+import tempfile
 
+# the profiler is shared with the front end
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from front_end import profiler
+import vowel_inference
+import build_back_end
 
-# run system commands
-def easy_call(command):
+# the back end is resolved from this directory, so the prediction never depends on the current directory
+back_end_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "back_end")
+default_model = "models/cynthia_classifier_dl_5_epochs.weights"
+# the model of the features without the phoneme classifier (extract_features.main with classifier=False)
+no_classifier_model = "models/cynthia_no_classifier_dl_5_epochs.weights"
+
+
+# run system commands, stage is the name the command is recorded under when profiling
+def easy_call(command, cwd=None, stage="command"):
     try:
-        call(command, shell=True)
+        profiler.call(command, stage, cwd=cwd)
     except Exception as exception:
         print "Error: could not execute the following"
         print ">>", command
@@ -19,32 +31,44 @@ def easy_call(command):
         exit(-1)
 
 
+# creates a working directory for the jar: it reads res/files.txt and models/ relative to its current
+# directory, so every run gets its own res/ and a link to the models
+def create_work_dir(tmp_dir=None):
+    work_dir = tempfile.mkdtemp(prefix="back_end_", dir=tmp_dir)
+    os.mkdir(os.path.join(work_dir, "res"))
+    os.symlink(os.path.join(back_end_dir, "models"), os.path.join(work_dir, "models"))
+    return work_dir
+
+
+# the back end reads a labels file for every example, when predicting it is a dummy one
+def write_dummy_labels(labels_path):
+    tmp_fid = open(labels_path, 'w')
+    tmp_fid.write("1 2\n")
+    tmp_fid.write("0 0\n")
+    tmp_fid.close()
+
+
 # main function
-def main(data_filename, output_labels_file):
+# tmp_dir: the directory in which the working directory of the back end is created
+def main(data_filename, output_labels_file, tmp_dir=None):
     # consts
-    file_out = "back_end/res/files.txt"
-    back_end_dir = "back_end/"
-    runnable_jar = "run_vowel_predict.sh"
-    log_file = "back_end/res/res.txt"
-    res_dir = "back_end/res/"
-    tmp_dir = "tmp/"
+    runnable_jar = os.path.join(back_end_dir, "run_vowel_predict.sh")
     tmp_file = "tmp.txt"
 
     # validation
     if not os.path.exists(data_filename):
         print >>sys.stderr, "data(features) file does not exits"
         return
-    if not os.path.exists(tmp_dir):
-        os.mkdir(tmp_dir)
-    if not os.path.exists(res_dir):
-        os.mkdir(res_dir)
+    if not build_back_end.ensure("test"):
+        print >>sys.stderr, "the back end jar can't score the data file: " + data_filename
+        return
+    work_dir = create_work_dir(tmp_dir)
+    file_out = os.path.join(work_dir, "res/files.txt")
+    log_file = os.path.join(work_dir, "res/res.txt")
 
     # create the label file
-    labels_path = tmp_dir+tmp_file
-    tmp_fid = open(labels_path, 'w')
-    tmp_fid.write("1 2\n")
-    tmp_fid.write("0 0\n")
-    tmp_fid.close()
+    labels_path = os.path.join(work_dir, tmp_file)
+    write_dummy_labels(labels_path)
 
     # create the data file
     abs_path_data = os.path.abspath(data_filename)
@@ -54,17 +78,89 @@ def main(data_filename, output_labels_file):
     fid.close()
 
     # extract the onset and offset of the vowel
-    os.chdir(back_end_dir)
     cmd = "sh %s" % runnable_jar
-    easy_call(cmd)
-    os.chdir("../")
+    easy_call(cmd, cwd=work_dir, stage="back_end")
 
     # copy the result to the desired place and remove leftovers
     shutil.copy(log_file, output_labels_file)
-    os.remove(log_file)
-    os.remove(file_out)
-    shutil.rmtree(tmp_dir)
-    shutil.rmtree(res_dir)
+    shutil.rmtree(work_dir)
+
+
+# scores the data file in this process with the numpy port of the back end (vowel_inference), no JVM is started
+# the output is in the same format main writes
+# returns the list of data files that could not be scored, as main_batch does
+def main_native(data_filename, output_labels_file, model_file=default_model, features="classifier"):
+    # validation
+    if not os.path.exists(data_filename):
+        print >>sys.stderr, "data(features) file does not exits"
+        return [data_filename]
+    with profiler.stage("back_end_native"):
+        errors = vowel_inference.main([os.path.abspath(data_filename)], os.path.join(back_end_dir, model_file),
+                                      output_labels_file, features)
+    if errors:
+        print >>sys.stderr, "the data file is too short for a vowel: " + data_filename
+    return errors
+
+
+# scores many data files in a single JVM, the model is loaded once
+# output_labels_files[i] gets the result of data_filenames[i] in the same format main writes
+# features: the feature functions of the model, classifier or no_classifier
+# returns the list of data files that could not be scored
+def main_batch(data_filenames, output_labels_files, tmp_dir=None, model_file=default_model, features="classifier"):
+    # consts
+    runnable_jar = os.path.join(back_end_dir, "run_vowel_predict_batch.sh")
+
+    # validation
+    if not build_back_end.ensure("predict_batch"):
+        print >>sys.stderr, "the back end jar has no predict_batch, the data files are not scored"
+        return [os.path.abspath(data_filename) for data_filename in data_filenames]
+    work_dir = create_work_dir(tmp_dir)
+    manifest = os.path.join(work_dir, "res/files.txt")
+    log_file = os.path.join(work_dir, "res/res.txt")
+    labels_path = os.path.join(work_dir, "tmp.txt")
+    write_dummy_labels(labels_path)
+
+    # create the manifest, one data file per line
+    abs_paths = [os.path.abspath(data_filename) for data_filename in data_filenames]
+    fid = open(manifest, 'w')
+    for abs_path_data in abs_paths:
+        if os.path.exists(abs_path_data):
+            fid.write(abs_path_data+" "+labels_path+"\n")
+    fid.close()
+
+    # extract the onset and offset of all the vowels
+    cmd = "sh %s %s %s %s %s" % (runnable_jar, manifest, os.path.join(back_end_dir, model_file), log_file, features)
+    easy_call(cmd, cwd=work_dir, stage="back_end_batch")
+
+    # every result line starts with the data file path
+    results = dict()
+    if os.path.exists(log_file):
+        for line in open(log_file):
+            values = line.split()
+            if len(values) > 1:
+                results[values[0]] = line
+
+    # write the results and remove leftovers
+    errors = list()
+    for abs_path_data, output_labels_file in zip(abs_paths, output_labels_files):
+        if abs_path_data in results:
+            fid = open(output_labels_file, 'w')
+            fid.write(results[abs_path_data])
+            fid.close()
+        else:
+            errors.append(abs_path_data)
+    shutil.rmtree(work_dir)
+    return errors
+
+
+# scores a data file extracted without the phoneme classifier with the no classifier model, only predict_batch runs
+# that model on the JVM, so without it (a jar that wasn't rebuilt) the data file is scored by main_native
+# returns whether the data file was scored
+def main_no_classifier(data_filename, output_labels_file, tmp_dir=None):
+    if build_back_end.ensure("predict_batch"):
+        return not main_batch([data_filename], [output_labels_file], tmp_dir, no_classifier_model, "no_classifier")
+    print >>sys.stderr, "the back end jar has no predict_batch, the data file is scored in python"
+    return not main_native(data_filename, output_labels_file, no_classifier_model, "no_classifier")
 
 if __name__ == "__main__":
     # the first argument is the data file path
@@ -72,9 +168,31 @@ if __name__ == "__main__":
     # -------------MENU-------------- #
     # command line arguments
     parser = argparse.ArgumentParser()
-    parser.add_argument("data_filename", help="The data(features) file")
-    parser.add_argument("output_labels_file", help="The output labels file")
+    parser.add_argument("data_filename", help="The data(features) file, with --batch a file that lists a data "
+                                              "file per line")
+    parser.add_argument("output_labels_file", help="The output labels file, with --batch the output directory")
+    parser.add_argument("--batch", action="store_true", help="Score all the listed data files in a single JVM")
+    parser.add_argument("--native", action="store_true", help="Score the data file in python, without a JVM")
+    parser.add_argument("--no_classifier", action="store_true",
+                        help="Score features extracted without the phoneme classifier, with the no classifier model")
     args = parser.parse_args()
+    if args.no_classifier:
+        model_file, features = no_classifier_model, "no_classifier"
+    else:
+        model_file, features = default_model, "classifier"
 
     # main function
-    main(args.data_filename, args.output_labels_file)
+    if args.batch:
+        data_files = [line.split()[0] for line in open(args.data_filename) if line.strip()]
+        labels_files = [os.path.join(args.output_labels_file, os.path.basename(f).replace(".data", ".labels"))
+                        for f in data_files]
+        for f in main_batch(data_files, labels_files, model_file=model_file, features=features):
+            print >>sys.stderr, "could not score: " + f
+    elif args.native:
+        main_native(args.data_filename, args.output_labels_file, model_file, features)
+    elif args.no_classifier:
+        # the single file script is bound to the classifier model
+        if not main_no_classifier(args.data_filename, args.output_labels_file):
+            print >>sys.stderr, "could not score: " + args.data_filename
+    else:
+        main(args.data_filename, args.output_labels_file)
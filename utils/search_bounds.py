@@ -0,0 +1,153 @@
+# coding=utf-8
+# !/usr/bin/env python
+
+import os
+import sys
+import math
+import argparse
+import numpy as np
+
+# the features files are read by the front end module
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from front_end import feature_format
+
+__author__ = 'yossiadi'
+
+# the labels the back end searches and the priors over the vowel length of a model (back_end/src/SearchBounds.java).
+# by default these are the constants of the jar, which fit the corpus of the tutorial: the vowels of other corpora are
+# shorter or longer, so the bounds are derived from the labels of the corpus and saved next to the model as
+# <model>.bounds, the back end and vowel_inference.py read them with the model.
+# the file has a line per value: <key> <value>, the values that are missing are the constants of the jar.
+# the labels are searched as in InferenceVowelDuration, (i + 1, j + 1) for min_gap_start <= i < num_frames -
+# min_gap_end and i + min_vowel <= j < i + max_vowel, j <= num_frames - min_gap_end
+
+# consts, the values of com.structed.constants.Consts
+extension = ".bounds"
+defaults = [("min_gap_start", 10), ("min_gap_end", 10), ("min_vowel", 9), ("max_vowel", 92),
+            ("mean_vowel_length", 41.787), ("std_vowel_length", 12.918), ("max_vowel_length", 38.0)]
+search_keys = ["min_gap_start", "min_gap_end", "min_vowel", "max_vowel"]
+# the boundary features read the frames after the offset, an offset closer than this to the end of the example is out
+# of its frames
+min_gap_end_floor = 2
+# the search is wider than the labels of the corpus by this many standard deviations of the vowel length
+default_margin = 1.0
+
+
+def default_bounds():
+    return dict(defaults)
+
+
+# the bounds of a bounds file, the values that are missing are the defaults
+def read(bounds_file):
+    bounds = default_bounds()
+    for line in open(bounds_file):
+        values = line.split()
+        if len(values) < 2 or values[0].startswith("#") or values[0] not in bounds:
+            continue
+        bounds[values[0]] = type(bounds[values[0]])(values[1])
+    if bounds["min_gap_end"] < min_gap_end_floor:
+        print >> sys.stderr, "Warning: min_gap_end of %s is %d, %d is used" % (bounds_file, bounds["min_gap_end"],
+                                                                              min_gap_end_floor)
+        bounds["min_gap_end"] = min_gap_end_floor
+    return bounds
+
+
+def write(bounds, bounds_file):
+    fid = open(bounds_file, 'w')
+    for key, value in defaults:
+        fid.write("%s %r\n" % (key, type(value)(bounds[key])))
+    fid.close()
+
+
+# the bounds saved with the model, the defaults when it has no bounds file
+def load(model_file):
+    bounds_file = model_file + extension
+    if os.path.exists(bounds_file):
+        return read(bounds_file)
+    return default_bounds()
+
+
+# the onset and the offset of a labels file, in frames
+def read_label(labels_file):
+    lines = [line.split() for line in open(labels_file) if line.strip()]
+    return int(lines[1][0]), int(lines[1][1])
+
+
+# starts, ends: the labels of the corpus, num_frames: the number of frames of every example
+# the vowel lengths that are searched are the lengths of the corpus widened by margin standard deviations, the gaps
+# at the edges are never wider than the defaults, they depend on how the files were cut more than on the corpus, the
+# gap at the end is at least min_gap_end_floor.
+# the priors are the mean and the standard deviation of the vowel length, the gamma prior is normalized at its mode
+def derive(starts, ends, num_frames, margin=default_margin):
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    lengths = ends - starts
+    mean = float(np.mean(lengths))
+    std = float(np.std(lengths))
+    if std == 0:
+        std = dict(defaults)["std_vowel_length"]
+    slack = int(math.ceil(margin * std))
+
+    bounds = default_bounds()
+    bounds["min_gap_start"] = max(min(int(np.min(starts)) - 1 - slack, bounds["min_gap_start"]), 0)
+    bounds["min_gap_end"] = max(min(int(np.min(np.asarray(num_frames) + 1 - ends)) - slack, bounds["min_gap_end"]),
+                                min_gap_end_floor)
+    bounds["min_vowel"] = max(int(np.min(lengths)) - slack, 1)
+    bounds["max_vowel"] = int(np.max(lengths)) + 1 + slack
+    bounds["mean_vowel_length"] = mean
+    bounds["std_vowel_length"] = std
+    bounds["max_vowel_length"] = max(mean - std ** 2 / mean, 1.0)
+    return bounds
+
+
+# manifest: the output of utils/sum_files.py, a data file and its labels file per line
+# search_only: derive the search and keep the priors of the model, for a model that was already trained, its
+# features were computed with those priors
+def main(manifest, model_file, margin=default_margin, search_only=False):
+    starts, ends, num_frames = list(), list(), list()
+    for line in open(manifest):
+        values = line.split()
+        if len(values) < 2:
+            continue
+        start, end = read_label(values[1])
+        starts.append(start)
+        ends.append(end)
+        num_frames.append(len(feature_format.read(values[0])))
+    if len(starts) == 0:
+        print >> sys.stderr, "no labels in the manifest: " + manifest
+        return None
+
+    bounds = derive(starts, ends, num_frames, margin)
+    lengths = np.subtract(ends, starts)
+    print "%d labels, vowel length %d-%d frames, mean %.3f std %.3f" % (
+        len(starts), np.min(lengths), np.max(lengths), np.mean(lengths), np.std(lengths))
+    if search_only:
+        previous = load(model_file)
+        for key, _ in defaults:
+            if key not in search_keys:
+                bounds[key] = previous[key]
+    write(bounds, model_file + extension)
+
+    # the labels searched per start frame, against the default bounds
+    default_lengths = dict(defaults)["max_vowel"] - dict(defaults)["min_vowel"]
+    print "%s: %d vowel lengths per start instead of %d" % (model_file + extension,
+                                                             bounds["max_vowel"] - bounds["min_vowel"], default_lengths)
+    return bounds
+
+
+if __name__ == "__main__":
+    # the first argument is a manifest of the corpus, the second the model the bounds are saved with
+    # -------------MENU-------------- #
+    # command line arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("manifest", help="The data and labels files of the corpus, the output of utils/sum_files.py")
+    parser.add_argument("model_file", help="The model, the bounds are written to <model_file>" + extension)
+    parser.add_argument("--margin", type=float, default=default_margin,
+                        help="Widen the search by this many standard deviations of the vowel length")
+    parser.add_argument("--search_only", action="store_true",
+                        help="Keep the priors of the model, for a model that was trained without these bounds")
+    args = parser.parse_args()
+
+    # main function
+    if main(args.manifest, args.model_file, args.margin, args.search_only) is None:
+        sys.exit(1)
@@ -0,0 +1,458 @@
+# coding=utf-8
+# !/usr/bin/env python
+
+import os
+import sys
+import math
+import argparse
+import numpy as np
+
+# the features files are read by the front end module
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from front_end import feature_format
+import model_weights
+import search_bounds
+
+__author__ = 'yossiadi'
+
+# a numpy port of the inference of the back end: FeatureFunctionsVD, FeatureFunctionsVDnoClassifier and
+# InferenceVowelDuration. the score of a label is W*phi(x, start, end), it is split as in DecomposedScores into the
+# features of the start frame, the features of the end frame and the features of the pair (the means from start to
+# end and the priors over the vowel length), so the start and end scores are computed for all the frames at once from
+# the cumulative sums of the columns and the pairs are scored as a matrix of starts x vowel lengths.
+# the results are the results of the back end, the labels and the scores are in the format of res/res.txt
+# the labels that are searched and the priors over the vowel length are the bounds of the model (search_bounds.py)
+
+# consts
+# MathHelpers.sigmoid uses this approximation of e
+sigmoid_base = 2.71828182846
+normalize = 0.05
+offset_10 = 2
+offset_20 = 4
+
+# the columns of the .data files
+short_term_energy = 0
+total_energy = 1
+low_energy = 2
+high_energy = 3
+wiener_entropy = 4
+auto_correlation = 5
+pitch = 6
+voicing = 7
+zero_crossing = 8
+is_vowel = 9
+is_nasal = 10
+sum_vowels = 13
+mfcc_1 = 16
+mfcc_2 = 17
+mfcc_3 = 18
+mfcc_4 = 19
+
+# the features in the order of convert, every feature is one of:
+#   ("diff", part, column, window, offset, is_abs) - calculateDiff at the start or end frame minus offset
+#   ("value", part, column, scale)                 - the value of the column at the start or end frame
+#   ("mean", column, window, is_prev)              - calculateMean from start to end
+#   ("gamma",), ("gaussian",)                      - the priors over the vowel length
+start = "start"
+end = "end"
+
+
+def diff(part, column, window, offset=0, is_abs=False):
+    return "diff", part, column, window, offset, is_abs
+
+
+def energy_features():
+    return [
+        # short term energy
+        diff(start, short_term_energy, 3), diff(start, short_term_energy, 4), diff(start, short_term_energy, 5),
+        diff(end, short_term_energy, 3), diff(end, short_term_energy, 4),
+        # total energy
+        diff(start, total_energy, 8, 0, True), diff(start, total_energy, 10, 0, True),
+        diff(start, total_energy, 8, offset_10, True), diff(start, total_energy, 10, offset_20, True),
+        diff(end, total_energy, 8, 0, True), diff(end, total_energy, 10, 0, True),
+        # low energy
+        diff(start, low_energy, 6), diff(start, low_energy, 8), diff(start, low_energy, 10),
+        diff(start, low_energy, 8, offset_10, True), diff(start, low_energy, 10, offset_20, True),
+        diff(end, low_energy, 8), diff(end, low_energy, 10),
+        # high energy
+        diff(start, high_energy, 8, 0, True), diff(start, high_energy, 10, 0, True),
+        diff(start, high_energy, 8, offset_10, True), diff(start, high_energy, 10, offset_20, True),
+        diff(end, high_energy, 8, 0, True), diff(end, high_energy, 10, 0, True),
+        # wiener entropy
+        diff(start, wiener_entropy, 8, 0, True), diff(start, wiener_entropy, 10, 0, True),
+        diff(end, wiener_entropy, 8, 0, True), diff(end, wiener_entropy, 10, 0, True),
+        # auto correlation
+        diff(start, auto_correlation, 1), diff(start, auto_correlation, 2), diff(start, auto_correlation, 3),
+        diff(start, auto_correlation, 4), diff(start, auto_correlation, 5),
+        # pitch
+        diff(start, pitch, 8), diff(start, pitch, 10), diff(end, pitch, 8), diff(end, pitch, 10),
+        # voicing
+        diff(start, voicing, 8), diff(start, voicing, 10), diff(end, voicing, 8), diff(end, voicing, 10),
+        # zero-crossing
+        diff(start, zero_crossing, 8), diff(start, zero_crossing, 10),
+        diff(end, zero_crossing, 8, 0, True), diff(end, zero_crossing, 10, 0, True)]
+
+
+def classifier_features():
+    return [
+        # vowels - indicator
+        diff(start, is_vowel, 6), diff(start, is_vowel, 8), diff(start, is_vowel, 10),
+        diff(end, is_vowel, 6), diff(end, is_vowel, 8), diff(end, is_vowel, 10),
+        # nasal - indicator
+        diff(end, is_nasal, 8), diff(end, is_nasal, 10),
+        # vowels - sum divide by sum all
+        diff(start, sum_vowels, 6), diff(start, sum_vowels, 8), diff(start, sum_vowels, 10),
+        diff(end, sum_vowels, 6), diff(end, sum_vowels, 8), diff(end, sum_vowels, 10)]
+
+
+def mfcc_features():
+    features = list()
+    for column in (mfcc_1, mfcc_2, mfcc_3, mfcc_4):
+        features += [diff(start, column, 3), diff(start, column, 10), diff(end, column, 3), diff(end, column, 10)]
+    return features
+
+
+def mean_features(columns):
+    features = list()
+    for column in columns:
+        features += [("mean", column, 10, True), ("mean", column, 10, False)]
+    return features
+
+
+def frame_features():
+    return [("value", start, total_energy, 1.0), ("value", start, low_energy, 1.0),
+            ("value", start, high_energy, 1.0), ("value", start, auto_correlation, 1.0)] + \
+           [("value", start, column, normalize) for column in (mfcc_1, mfcc_2, mfcc_3, mfcc_4)] + \
+           [("value", end, column, normalize) for column in (mfcc_1, mfcc_2, mfcc_3, mfcc_4)] + \
+           [("gamma",), ("gaussian",)]
+
+
+# the features of FeatureFunctionsVD and of FeatureFunctionsVDnoClassifier
+mean_columns = [short_term_energy, total_energy, high_energy, low_energy, voicing, zero_crossing]
+feature_functions = {
+    "classifier": energy_features() + classifier_features() + mfcc_features() +
+    mean_features(mean_columns + [sum_vowels]) + frame_features(),
+    "no_classifier": energy_features() + mfcc_features() + mean_features(mean_columns) + frame_features()}
+
+
+# the gamma distribution over the vowel length, normalized by its value at max_vowel_length
+def gamma_prior(vowel_length, bounds):
+    variance = bounds["std_vowel_length"] ** 2
+    shape = bounds["mean_vowel_length"] ** 2 / variance
+    scale = variance / bounds["mean_vowel_length"]
+    max_vowel_length = bounds["max_vowel_length"]
+    return np.exp((shape - 1) * np.log(vowel_length / max_vowel_length) - (vowel_length - max_vowel_length) / scale)
+
+
+# the gaussian distribution over the vowel length, without the normalization
+def gaussian_prior(vowel_length, bounds):
+    return np.exp(-(vowel_length - bounds["mean_vowel_length"]) ** 2 / (2 * bounds["std_vowel_length"] ** 2))
+
+
+def sigmoid(x):
+    with np.errstate(over='ignore', invalid='ignore'):
+        return 1.0 / (1.0 + np.power(sigmoid_base, -x))
+
+
+# the frames x columns matrix of a features file, nan values are zero as in the back end
+def read_frames(data_file):
+    frames = np.array(feature_format.read(data_file, mmap=False), dtype=np.float64)
+    frames[np.isnan(frames)] = 0.0
+    return frames
+
+
+# the pruned search of CandidatePruning: the starts are searched within margin frames of the top_k highest rises of
+# the vowel evidence (is_vowel + sum_vowels), the ends within margin frames of its top_k lowest falls. the rise at a
+# frame is the mean evidence of the rise_window frames from it minus the mean of the rise_window frames before it
+rise_window = 5
+min_evidence_range = 1e-3
+default_top_k = 3
+default_margin = 15
+# the coarse to fine search of CoarseToFine: the starts and the ends on a grid of default_stride frames (20 ms), then
+# every label near the default_hypotheses best labels of the grid
+default_stride = 4
+default_hypotheses = 5
+
+
+# the frames that may start and the frames that may end a label, as masks over the frames 0..num_frames + 1
+# None when the evidence is flat (the no classifier features), all the frames are candidates
+def prune_candidates(frames, top_k=default_top_k, margin=default_margin):
+    num_frames = len(frames)
+    if num_frames <= 2 or frames.shape[1] <= sum_vowels:
+        return None
+    evidence = frames[:, is_vowel] + frames[:, sum_vowels]
+    if evidence.max() - evidence.min() < min_evidence_range:
+        return None
+    cumulative = np.concatenate(([0.0], np.cumsum(evidence)))
+    locations = np.arange(num_frames)
+    after = cumulative[np.minimum(locations + rise_window, num_frames)] - cumulative[locations]
+    before = cumulative[locations] - cumulative[np.maximum(locations - rise_window, 0)]
+    rise = (after - before) / rise_window
+
+    # the local maxima of the rise are the onsets of the evidence, the local minima are the offsets
+    inner = rise[1:-1]
+    peaks = np.nonzero((inner > 0) & (inner > rise[:-2]) & (inner >= rise[2:]))[0] + 1
+    troughs = np.nonzero((inner < 0) & (inner < rise[:-2]) & (inner <= rise[2:]))[0] + 1
+
+    def mask(candidates, strength):
+        candidates = candidates[np.argsort(-strength[candidates], kind="mergesort")][:top_k]
+        result = np.zeros(num_frames + 2, dtype=bool)
+        for frame in candidates:
+            result[max(frame - margin, 0):frame + margin + 1] = True
+        return result
+    return mask(peaks, rise), mask(troughs, -rise)
+
+
+class VowelScorer(object):
+    # weights: the dense weights of the model, by feature
+    # features: the name of the feature functions, classifier or no_classifier
+    # bounds: the bounds of the model (search_bounds.load), by default the constants of the back end
+    def __init__(self, weights, features="classifier", bounds=None):
+        self.features = feature_functions[features]
+        self.bounds = bounds if bounds is not None else search_bounds.default_bounds()
+        # the weights may be shorter or longer than phi, as in DenseWeights.dot
+        self.weights = np.zeros(len(self.features))
+        size = min(len(weights), len(self.features))
+        self.weights[:size] = weights[:size]
+
+    # the cumulative sum of the column over the frames 0..locations, the locations are clamped to the frames
+    @staticmethod
+    def cumulative_at(cumulative, locations, column):
+        return cumulative[np.clip(locations, 0, len(cumulative) - 1), column]
+
+    # calculateDiff at every location
+    def calculate_diff(self, cumulative, locations, column, window):
+        before = self.cumulative_at(cumulative, locations - window, column)
+        at = self.cumulative_at(cumulative, locations, column)
+        after = self.cumulative_at(cumulative, locations + window, column)
+        with np.errstate(invalid='ignore'):
+            value = (after - at) / window - (at - before) / window
+        value[np.isnan(value)] = 0.0
+        return value
+
+    # the scores of the features of the start and of the end of every frame and the weighted mean and prior
+    # features, the parts of the score of a label that don't depend on the other end of the label
+    def frame_scores(self, frames):
+        num_frames = len(frames)
+        cumulative = np.cumsum(frames, axis=0)
+        locations = np.arange(num_frames)
+
+        start_scores = np.zeros(num_frames)
+        end_scores = np.zeros(num_frames)
+        means = list()
+        priors = list()
+        for feature, weight in zip(self.features, self.weights):
+            if weight == 0:
+                continue
+            kind = feature[0]
+            if kind == "diff":
+                _, part, column, window, offset, is_abs = feature
+                value = self.calculate_diff(cumulative, locations - offset, column, window)
+                if is_abs:
+                    value = np.abs(value)
+            elif kind == "value":
+                _, part, column, scale = feature
+                value = scale * frames[:, column]
+            elif kind == "mean":
+                means.append((feature, weight))
+                continue
+            else:
+                priors.append((gamma_prior if kind == "gamma" else gaussian_prior, weight))
+                continue
+            if part == start:
+                start_scores += weight * value
+            else:
+                end_scores += weight * value
+        return cumulative, start_scores, end_scores, means, priors
+
+    # the score of every (start, vowel length) pair of the frame scores, nan where the pair is not a label
+    # starts: the start frames, lengths: the vowel lengths
+    def pair_scores(self, frame_scores, starts, lengths):
+        cumulative, start_scores, end_scores, means, priors = frame_scores
+        num_frames = len(cumulative)
+        length_scores = np.zeros(len(lengths))
+        for prior, weight in priors:
+            length_scores += weight * prior(lengths.astype(np.float64), self.bounds)
+
+        ends = starts[:, None] + lengths[None, :]
+        valid = (ends <= num_frames - self.bounds["min_gap_end"] + 1) & (ends < num_frames)
+        ends = np.where(valid, ends, starts[:, None])
+        scores = start_scores[starts][:, None] + end_scores[ends] + length_scores[None, :]
+
+        # the means from start to end compared to the means before the start or after the end
+        for (_, column, window, is_prev), weight in means:
+            column_sums = cumulative[:, column]
+            average = (column_sums[ends] - column_sums[starts][:, None]) / lengths[None, :]
+            if is_prev:
+                outside = (column_sums[starts] - self.cumulative_at(cumulative, starts - window, column)) / window
+                outside = outside[:, None]
+            else:
+                outside = (column_sums[ends] - self.cumulative_at(cumulative, ends + window, column)) / window
+            value = sigmoid(average - outside)
+            value[np.isnan(value)] = 0.0
+            scores += weight * value
+
+        scores[~valid] = np.nan
+        return scores
+
+    # the score of every (start, vowel length) pair of the frames, nan where the pair is not a label
+    def score_matrix(self, frames, starts, lengths):
+        return self.pair_scores(self.frame_scores(frames), starts, lengths)
+
+    # the best label of the pairs of starts x lengths that are candidates, (start, end, score) or None
+    # the first best label in the order of the search of the back end, starts first then lengths
+    def best_label(self, frame_scores, starts, lengths, candidates=None, ends_range=None):
+        if candidates is not None:
+            starts = starts[candidates[0][starts]]
+        if len(starts) == 0 or len(lengths) == 0:
+            return None
+        scores = self.pair_scores(frame_scores, starts, lengths)
+        ends = starts[:, None] + lengths[None, :]
+        if candidates is not None:
+            scores[~candidates[1][np.minimum(ends, len(candidates[1]) - 1)]] = np.nan
+        if ends_range is not None:
+            scores[(ends < ends_range[0]) | (ends > ends_range[1])] = np.nan
+        if np.all(np.isnan(scores)):
+            return None
+        row, column = np.unravel_index(np.nanargmax(scores), scores.shape)
+        return int(starts[row]), int(starts[row] + lengths[column]), float(scores[row, column])
+
+    # the coarse to fine search of CoarseToFine: the labels with the starts and the ends on a grid of stride frames
+    # first, then every label within stride frames of the start and of the end of the num_hypotheses best of them
+    def coarse_to_fine(self, frame_scores, starts, lengths, stride, num_hypotheses, candidates=None):
+        coarse_starts = starts[::stride]
+        if candidates is not None:
+            coarse_starts = coarse_starts[candidates[0][coarse_starts]]
+        coarse_lengths = lengths[::stride]
+        if len(coarse_starts) == 0:
+            return None
+        scores = self.pair_scores(frame_scores, coarse_starts, coarse_lengths)
+        if candidates is not None:
+            ends = coarse_starts[:, None] + coarse_lengths[None, :]
+            scores[~candidates[1][np.minimum(ends, len(candidates[1]) - 1)]] = np.nan
+        flat = scores.ravel()
+        order = [index for index in np.argsort(-flat, kind="mergesort") if not np.isnan(flat[index])]
+
+        best = None
+        for index in order[:num_hypotheses]:
+            row, column = np.unravel_index(index, scores.shape)
+            hypothesis_start = coarse_starts[row]
+            hypothesis_end = hypothesis_start + coarse_lengths[column]
+            fine_starts = starts[np.abs(starts - hypothesis_start) <= stride]
+            fine_lengths = lengths[np.abs(lengths - coarse_lengths[column]) <= 2 * stride]
+            label = self.best_label(frame_scores, fine_starts, fine_lengths, candidates,
+                                    (hypothesis_end - stride, hypothesis_end + stride))
+            if label is not None and (best is None or label[2] > best[2] or
+                                      (label[2] == best[2] and label[:2] < best[:2])):
+                best = label
+        return best
+
+    # the best label of the frames, the argmax of W*phi(x, start, end) over the labels InferenceVowelDuration
+    # searches, in frames. returns (start, end, score), None if the frames are too short for a vowel
+    # pruning: (top_k, margin) searches the candidates of prune_candidates, all the labels when none of them is one
+    # coarse: (stride, num_hypotheses) searches coarse to fine, see coarse_to_fine
+    def predict(self, frames, pruning=None, coarse=None):
+        num_frames = len(frames)
+        min_gap_end, min_vowel = self.bounds["min_gap_end"], self.bounds["min_vowel"]
+        # the labels are (i + 1, j + 1) for min_gap_start <= i < num_frames - min_gap_end and
+        # i + min_vowel <= j < i + max_vowel, j <= num_frames - min_gap_end
+        starts = np.arange(self.bounds["min_gap_start"], num_frames - min_gap_end) + 1
+        lengths = np.arange(min_vowel, self.bounds["max_vowel"])
+        if len(starts) == 0 or starts[0] + min_vowel > num_frames - min_gap_end + 1:
+            return None
+        frame_scores = self.frame_scores(frames)
+        candidates = prune_candidates(frames, *pruning) if pruning is not None else None
+
+        label = None
+        if coarse is not None:
+            label = self.coarse_to_fine(frame_scores, starts, lengths, coarse[0], coarse[1], candidates)
+        if label is None and candidates is not None:
+            label = self.best_label(frame_scores, starts, lengths, candidates)
+        # when no candidate pair is a label all the labels are searched
+        if label is None:
+            label = self.best_label(frame_scores, starts, lengths)
+        return label
+
+
+# the line of a prediction in the format of res/res.txt
+def format_prediction(data_file, prediction):
+    onset, offset, score = prediction
+    return "%s %d-%d:%r \n" % (data_file, onset, offset, score)
+
+
+# the bounds saved with the model are used when it has them
+# pruning: (top_k, margin) of the pruned search, coarse: (stride, num_hypotheses) of the coarse to fine search, None
+# searches all the labels
+def main(data_files, model_file, output_file, features="classifier", pruning=None, coarse=None):
+    scorer = VowelScorer(model_weights.load(model_file), features, search_bounds.load(model_file))
+    fid = open(output_file, 'w')
+    errors = list()
+    for data_file in data_files:
+        prediction = scorer.predict(read_frames(data_file), pruning, coarse)
+        if prediction is None:
+            errors.append(data_file)
+            continue
+        fid.write(format_prediction(data_file, prediction))
+    fid.close()
+    return errors
+
+
+# decodes every data file with the exhaustive search and with the pruned or the coarse to fine search, returns the
+# number of files and the files the fast label differs from the exhaustive one, as (data file, exhaustive label,
+# fast label)
+def compare_search(data_files, model_file, features="classifier", pruning=None, coarse=None):
+    scorer = VowelScorer(model_weights.load(model_file), features, search_bounds.load(model_file))
+    num_files = 0
+    differ = list()
+    for data_file in data_files:
+        frames = read_frames(data_file)
+        exhaustive = scorer.predict(frames)
+        if exhaustive is None:
+            continue
+        fast = scorer.predict(frames, pruning, coarse)
+        num_files += 1
+        if exhaustive[:2] != fast[:2]:
+            differ.append((data_file, exhaustive[:2], fast[:2]))
+    return num_files, differ
+
+
+if __name__ == "__main__":
+    # the data files are .data files or a manifest of utils/sum_files.py with --manifest
+    # -------------MENU-------------- #
+    # command line arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model_file", help="The model, a .weights file of the back end or a dense weights file")
+    parser.add_argument("output_file", help="The output file, in the format of res/res.txt")
+    parser.add_argument("data_files", nargs="+", help="The features files")
+    parser.add_argument("--manifest", action="store_true", help="The data files are manifests, a data file per line")
+    parser.add_argument("--features", default="classifier", choices=sorted(feature_functions.keys()),
+                        help="The feature functions of the model")
+    parser.add_argument("--top_k", type=int, default=0,
+                        help="Search only near the top k rises and falls of the vowel evidence, 0 searches all")
+    parser.add_argument("--margin", type=int, default=default_margin,
+                        help="The frames around every rise and fall that are searched")
+    parser.add_argument("--stride", type=int, default=0,
+                        help="Search coarse to fine, the starts and the ends every stride frames first, 0 searches all")
+    parser.add_argument("--hypotheses", type=int, default=default_hypotheses,
+                        help="The best labels of the coarse search that are refined")
+    parser.add_argument("--compare", action="store_true",
+                        help="Report the files the pruned or coarse to fine label differs from the exhaustive one")
+    args = parser.parse_args()
+
+    # main function
+    files = args.data_files
+    if args.manifest:
+        files = [line.split()[0] for manifest in args.data_files for line in open(manifest) if line.strip()]
+    pruning = (args.top_k, args.margin) if args.top_k > 0 else None
+    coarse = (args.stride, args.hypotheses) if args.stride > 1 else None
+    for f in main(files, args.model_file, args.output_file, args.features, pruning, coarse):
+        print >> sys.stderr, "could not score: " + f
+    if args.compare:
+        # without a fast search the default pruning is compared
+        if pruning is None and coarse is None:
+            pruning = (default_top_k, args.margin)
+        count, different = compare_search(files, args.model_file, args.features, pruning, coarse)
+        for f, exhaustive_label, fast_label in different:
+            print "differs: %s exhaustive %d-%d fast %d-%d" % ((f,) + exhaustive_label + fast_label)
+        print "the fast label differs on %d of %d files (%.2f%%)" % (len(different), count,
+                                                                     100.0 * len(different) / max(count, 1))
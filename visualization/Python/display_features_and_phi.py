@@ -6,6 +6,10 @@ from optparse import OptionParser
 import numpy as np
 import matplotlib.pyplot as plt
 
+# the features files are read by the front end reader, text or binary
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.."))
+from front_end import feature_format
+
 NUM_OF_FEATURES = 20
 graphIndex = 0
 predict_line = 1
@@ -47,7 +51,7 @@ def display_features(filename, frame_begin_and_end_real, frame_begin_and_end_pre
     # compute the phi values   
     labels = frame_begin_and_end_real.split('-')
     predict = frame_begin_and_end_predict.split('-')
-    m = np.loadtxt(filename)
+    m = feature_format.read(filename)
     phi_m = np.zeros(m.shape, dtype=np.float64)
     phi_mean = np.zeros(m.shape, dtype=np.float64)
     window_size = 10  # 25ms window
@@ -5,6 +5,10 @@ from ggplot import *
 import pandas as pd
 import os
 
+# the features files are read by the front end reader, text or binary
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.."))
+from front_end import feature_format
+
 __author__ = 'adiyoss'
 
 NUM_OF_FEATURES = 22
@@ -13,7 +17,7 @@ NUM_OF_FEATURES = 22
 def display_features(filename, frame_begin_and_end_real, frame_begin_and_end_predict):
     labels = frame_begin_and_end_real.split('-')
     directory = 'eps/'
-    m = np.loadtxt(filename)
+    m = feature_format.read(filename)
     index = 0
     l = np.arange(0, len(m[:, index]))
 